@@ -0,0 +1,82 @@
+"""
+p50/p99 de `get_tuple` (último checkpoint + pending writes) com as duas leituras
+sequenciais vs concorrentes (CHECKPOINTER_CONCURRENT_READS).
+
+Aponte DYNAMODB_ENDPOINT_URL para o DynamoDB Local para medir com rede real; com o moto,
+SIMULATED_RTT_MS (padrão 10) adiciona um RTT fixo por chamada. O moto serializa as respostas
+no próprio processo, então a leitura especulativa dos writes mais recentes custa mais aqui
+do que contra um servidor de verdade.
+
+    python -m benchmarks.bench_checkpoint_get_tuple
+"""
+import os
+
+from benchmarks.common import (
+    create_checkpoint_tables, measure, print_summary, setup_environment, simulate_network_latency, summarize
+)
+
+setup_environment()
+
+from langgraph.checkpoint.base import empty_checkpoint, create_checkpoint  # noqa: E402
+from langchain_core.messages import HumanMessage, AIMessage  # noqa: E402
+
+ITERATIONS = 100
+TURNS = 30
+
+
+def build_saver(concurrent_reads: bool, endpoint_url: str, rtt_ms: float):
+    from lambdas.e_commerce_chatbot.memory.checkpointer import DynamoDBSaver
+
+    saver = DynamoDBSaver(
+        table_name=os.environ['DYNAMODB_CHECKPOINT_TABLE'],
+        writes_table_name=os.environ['DYNAMODB_WRITES_TABLE'],
+        region_name=os.environ['AWS_DEFAULT_REGION'],
+        endpoint_url=endpoint_url,
+        concurrent_reads=concurrent_reads,
+    )
+    simulate_network_latency(saver.table.meta.client, rtt_ms)
+    if saver.writes_table.meta.client is not saver.table.meta.client:
+        simulate_network_latency(saver.writes_table.meta.client, rtt_ms)
+    return saver
+
+
+def seed_thread(saver, thread_id: str):
+    config = {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+    checkpoint = empty_checkpoint()
+    messages = []
+
+    for step in range(TURNS):
+        messages = messages + [HumanMessage(content=f'mensagem {step}'), AIMessage(content=f'resposta {step}')]
+        checkpoint = create_checkpoint(checkpoint, None, step)
+        checkpoint['channel_values'] = {'messages': messages, 'route': 'generic'}
+        config = saver.put(config, checkpoint, {'source': 'loop', 'step': step}, {})
+        saver.put_writes(config, [('messages', [HumanMessage(content='pendente')]), ('route', 'generic')], f'task-{step}')
+
+
+def run():
+    endpoint_url = os.getenv('DYNAMODB_ENDPOINT_URL')
+    rtt_ms = float(os.getenv('SIMULATED_RTT_MS', '0' if endpoint_url else '10'))
+    create_checkpoint_tables(endpoint_url)
+
+    seed_thread(build_saver(False, endpoint_url, 0), 'bench#get_tuple')
+    config = {"configurable": {"thread_id": 'bench#get_tuple'}}
+
+    results = {}
+    for concurrent_reads in (False, True):
+        saver = build_saver(concurrent_reads, endpoint_url, rtt_ms)
+        label = 'concorrente' if concurrent_reads else 'sequencial'
+        results[label] = measure(lambda: saver.get_tuple(config), ITERATIONS)
+        print_summary(f'get_tuple {label}', results[label])
+
+    sequential, concurrent = summarize(results['sequencial']), summarize(results['concorrente'])
+    print(f"Economia: p50={sequential['p50'] - concurrent['p50']:.3f}ms  p99={sequential['p99'] - concurrent['p99']:.3f}ms")
+
+
+if __name__ == '__main__':
+    if os.getenv('DYNAMODB_ENDPOINT_URL'):
+        run()
+    else:
+        from moto import mock_aws
+
+        with mock_aws():
+            run()
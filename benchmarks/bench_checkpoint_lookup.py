@@ -0,0 +1,118 @@
+"""
+Latência e RCUs consumidas ao buscar um checkpoint por checkpoint_id em função
+do tamanho da thread: query filtrada (layout antigo) vs GetItem (layout novo).
+
+Roda contra o moto por padrão; use DYNAMODB_ENDPOINT_URL para apontar para o DynamoDB Local.
+Nem o moto nem o DynamoDB Local medem capacidade de verdade, então as RCUs são estimadas
+a partir dos bytes lidos (leitura eventualmente consistente: 0.5 RCU a cada 4 KB; a Query
+cobra pelos itens lidos antes do FilterExpression).
+
+    python -m benchmarks.bench_checkpoint_lookup
+"""
+import math
+import os
+
+from benchmarks.common import create_checkpoint_tables, measure, setup_environment, summarize
+
+setup_environment()
+
+from boto3.dynamodb.conditions import Key  # noqa: E402
+from langgraph.checkpoint.base import empty_checkpoint, create_checkpoint  # noqa: E402
+from langchain_core.messages import HumanMessage, AIMessage  # noqa: E402
+
+THREAD_LENGTHS = [10, 100, 500]
+ITERATIONS = 20
+
+
+def seed_thread(saver, thread_id: str, length: int):
+    """Grava `length` checkpoints com um histórico de mensagens crescente e devolve os ids."""
+    config = {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+    checkpoint = empty_checkpoint()
+    messages = []
+    checkpoint_ids = []
+
+    for step in range(length):
+        messages = messages + [HumanMessage(content=f'mensagem {step}'), AIMessage(content=f'resposta {step}')]
+        checkpoint = create_checkpoint(checkpoint, None, step)
+        checkpoint['channel_values'] = {'messages': messages, 'route': 'generic'}
+        config = saver.put(config, checkpoint, {'source': 'loop', 'step': step}, {})
+        checkpoint_ids.append(checkpoint['id'])
+
+    return checkpoint_ids
+
+
+def item_size(item) -> int:
+    return sum(len(str(name)) + len(bytes(value.value) if hasattr(value, 'value') else str(value))
+               for name, value in item.items())
+
+
+def estimate_rcu(read_bytes: int) -> float:
+    return math.ceil(read_bytes / 4096) * 0.5
+
+
+def legacy_lookup(saver, thread_id: str, checkpoint_id: str):
+    """Reproduz a busca antiga: begins_with + FilterExpression, paginando o partition."""
+    query_kwargs = {
+        'KeyConditionExpression': Key('thread_id').eq(thread_id) & Key('sort_key').begins_with('#'),
+        'FilterExpression': Key('checkpoint_id').eq(checkpoint_id),
+    }
+    while True:
+        response = saver.table.query(**query_kwargs)
+        if response.get('Items') or 'LastEvaluatedKey' not in response:
+            return response.get('Items', [])
+        query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def keyed_lookup(saver, thread_id: str, checkpoint_id: str):
+    response = saver.table.get_item(
+        Key={'thread_id': thread_id, 'sort_key': saver.checkpoint_sort_key('', checkpoint_id)}
+    )
+    return response.get('Item')
+
+
+def partition_bytes(saver, thread_id: str) -> int:
+    """Bytes que a query filtrada lê: todo o partition (até o limite de 1 MB por página)."""
+    query_kwargs = {'KeyConditionExpression': Key('thread_id').eq(thread_id)}
+    total = 0
+    while True:
+        response = saver.table.query(**query_kwargs)
+        total += sum(item_size(item) for item in response.get('Items', []))
+        if 'LastEvaluatedKey' not in response:
+            return total
+        query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def run():
+    from lambdas.e_commerce_chatbot.memory.checkpointer import DynamoDBSaver
+
+    endpoint_url = os.getenv('DYNAMODB_ENDPOINT_URL')
+    create_checkpoint_tables(endpoint_url)
+    saver = DynamoDBSaver(
+        table_name=os.environ['DYNAMODB_CHECKPOINT_TABLE'],
+        writes_table_name=os.environ['DYNAMODB_WRITES_TABLE'],
+        region_name=os.environ['AWS_DEFAULT_REGION'],
+        endpoint_url=endpoint_url,
+    )
+
+    print(f"{'checkpoints':>12} | {'query p50 (ms)':>14} | {'query RCU':>9} | {'get p50 (ms)':>12} | {'get RCU':>7}")
+    for length in THREAD_LENGTHS:
+        thread_id = f'bench#{length}'
+        checkpoint_ids = seed_thread(saver, thread_id, length)
+        target = checkpoint_ids[-1]
+
+        legacy_rcu = estimate_rcu(partition_bytes(saver, thread_id))
+        keyed_rcu = estimate_rcu(item_size(keyed_lookup(saver, thread_id, target)))
+        legacy = summarize(measure(lambda: legacy_lookup(saver, thread_id, target), ITERATIONS))
+        keyed = summarize(measure(lambda: keyed_lookup(saver, thread_id, target), ITERATIONS))
+
+        print(f"{length:>12} | {legacy['p50']:>14.3f} | {legacy_rcu:>9.1f} | {keyed['p50']:>12.3f} | {keyed_rcu:>7.1f}")
+
+
+if __name__ == '__main__':
+    if os.getenv('DYNAMODB_ENDPOINT_URL'):
+        run()
+    else:
+        from moto import mock_aws
+
+        with mock_aws():
+            run()
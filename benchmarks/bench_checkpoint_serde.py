@@ -0,0 +1,84 @@
+"""
+Tamanho do item e tempo de encode/decode do checkpoint para threads de 50 a 200 mensagens,
+com msgpack puro, msgpack+zlib e msgpack+zstd.
+
+    python -m benchmarks.bench_checkpoint_serde
+"""
+import json
+import random
+
+from benchmarks.common import measure, setup_environment, summarize
+
+setup_environment()
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage  # noqa: E402
+from langgraph.checkpoint.base import create_checkpoint, empty_checkpoint  # noqa: E402
+
+from lambdas.e_commerce_chatbot.memory.serde import CompressedSerializer, load_zstandard  # noqa: E402
+
+MESSAGE_COUNTS = [50, 100, 200]
+ITERATIONS = 30
+DYNAMODB_ITEM_LIMIT = 400 * 1024
+
+WORDS = (
+    'camiseta vestido calça jaqueta moletom algodão linho tamanho cor entrega prazo pedido troca '
+    'tecido macio estampa lisa bolso gola manga curta longa preto branco azul verde bege frete grátis '
+    'cupom desconto parcelamento pix cartão loja física São Paulo disponível estoque reposição semana'
+).split()
+
+
+def sentence(rng: random.Random, length: int) -> str:
+    return ' '.join(rng.choice(WORDS) for _ in range(length)).capitalize() + '.'
+
+
+def product_page(rng: random.Random, index: int) -> str:
+    return json.dumps({
+        'name': f'{sentence(rng, 3)} {index}',
+        'description': ' '.join(sentence(rng, rng.randint(8, 20)) for _ in range(3)),
+        'category': rng.choice(['Camisetas', 'Vestidos', 'Calças', 'Jaquetas']),
+        'price': round(rng.uniform(39, 499), 2),
+        'color': rng.sample(['branco', 'preto', 'azul', 'verde', 'bege', 'vinho'], 3),
+        'in_stock': rng.random() > 0.2,
+    }, ensure_ascii=False)
+
+
+def build_conversation(message_count: int):
+    rng = random.Random(message_count)
+    messages = []
+    for index in range(message_count // 4):
+        messages.append(HumanMessage(content=f'{sentence(rng, rng.randint(4, 15))} https://loja.exemplo/p/{index}'))
+        messages.append(AIMessage(content='', tool_calls=[{
+            'id': f'call_{rng.getrandbits(64):x}', 'name': 'analyse_product_by_link',
+            'args': {'url_site': f'https://loja.exemplo/p/{index}'},
+        }]))
+        messages.append(ToolMessage(content=product_page(rng, index), tool_call_id=messages[-1].tool_calls[0]['id']))
+        messages.append(AIMessage(content=' '.join(sentence(rng, rng.randint(6, 18)) for _ in range(3))))
+    return messages
+
+
+def build_checkpoint(message_count: int):
+    checkpoint = create_checkpoint(empty_checkpoint(), None, message_count)
+    checkpoint['channel_values'] = {'messages': build_conversation(message_count), 'route': 'generic'}
+    return checkpoint
+
+
+def run():
+    serializers = {'msgpack': CompressedSerializer(compression='none'),
+                   'msgpack+zlib': CompressedSerializer(compression='zlib')}
+    if load_zstandard() is not None:
+        serializers['msgpack+zstd'] = CompressedSerializer(compression='zstd')
+
+    print(f"{'mensagens':>9} | {'formato':<13} | {'bytes':>9} | {'% 400KB':>7} | {'encode p50':>10} | {'decode p50':>10}")
+    for message_count in MESSAGE_COUNTS:
+        checkpoint = build_checkpoint(message_count)
+        for name, serde in serializers.items():
+            typed = serde.dumps_typed(checkpoint)
+            encode = summarize(measure(lambda: serde.dumps_typed(checkpoint), ITERATIONS))
+            decode = summarize(measure(lambda: serde.loads_typed(typed), ITERATIONS))
+            size = len(typed[1])
+            print(f"{message_count:>9} | {name:<13} | {size:>9} | {size / DYNAMODB_ITEM_LIMIT:>6.1%} | "
+                  f"{encode['p50']:>8.3f}ms | {decode['p50']:>8.3f}ms")
+
+
+if __name__ == '__main__':
+    run()
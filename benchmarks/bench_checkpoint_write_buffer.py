@@ -0,0 +1,128 @@
+"""
+Chamadas ao DynamoDB por turno com `put_writes` gravando direto vs em buffer
+(CHECKPOINTER_BUFFER_WRITES), num fluxo com ferramentas como o `subgraph_generic`:
+router -> subgrafo (LLM com tool calls paralelas -> ToolNode -> LLM) -> interrupt.
+
+    python -m benchmarks.bench_checkpoint_write_buffer
+"""
+import os
+from typing import Annotated, Optional
+
+from benchmarks.common import CallCounter, create_checkpoint_tables, setup_environment
+
+setup_environment()
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage  # noqa: E402
+from langchain_core.tools import tool  # noqa: E402
+from langgraph.graph import END, START, StateGraph, add_messages  # noqa: E402
+from langgraph.prebuilt import ToolNode, tools_condition  # noqa: E402
+from langgraph.types import Command, interrupt  # noqa: E402
+from typing_extensions import TypedDict  # noqa: E402
+
+TURNS = 20
+PARALLEL_TOOL_CALLS = 3
+
+
+class BenchState(TypedDict):
+    messages: Annotated[list, add_messages]
+    route: str
+    order_id: Optional[str]
+
+
+@tool
+def analyse_product_by_link(link: str) -> str:
+    """Analisa um produto a partir do link."""
+    return f'Produto em {link}: camiseta básica, R$ 89,90, tamanhos P ao GG.'
+
+
+def build_graph():
+    def generic(state):
+        if isinstance(state['messages'][-1], ToolMessage):
+            return {'messages': [AIMessage(content='Os três produtos estão disponíveis. Quer que eu separe algum?')]}
+        tool_calls = [
+            {'name': 'analyse_product_by_link', 'args': {'link': f'https://loja.com/p/{i}'}, 'id': f'call_{i}'}
+            for i in range(PARALLEL_TOOL_CALLS)
+        ]
+        return {'messages': [AIMessage(content='', tool_calls=tool_calls)]}
+
+    subgraph = StateGraph(BenchState)
+    subgraph.add_node('ecom_generic_node', generic)
+    subgraph.add_node('tools', ToolNode([analyse_product_by_link]))
+    subgraph.add_edge(START, 'ecom_generic_node')
+    subgraph.add_conditional_edges('ecom_generic_node', tools_condition, {'tools': 'tools', END: END})
+    subgraph.add_edge('tools', 'ecom_generic_node')
+
+    def router(state):
+        return {'route': 'generic'}
+
+    def get_user_input(state):
+        return {'messages': [HumanMessage(content=interrupt('human_input'))]}
+
+    graph = StateGraph(BenchState)
+    graph.add_node('router', router)
+    graph.add_node('subgraph_generic', subgraph.compile())
+    graph.add_node('get_user_input', get_user_input)
+    graph.add_edge(START, 'router')
+    graph.add_edge('router', 'subgraph_generic')
+    graph.add_edge('subgraph_generic', 'get_user_input')
+    graph.add_edge('get_user_input', 'router')
+    return graph
+
+
+def run_conversation(buffer_writes: bool):
+    from lambdas.e_commerce_chatbot.memory.checkpointer import DynamoDBSaver
+
+    saver = DynamoDBSaver(
+        table_name=os.environ['DYNAMODB_CHECKPOINT_TABLE'],
+        writes_table_name=os.environ['DYNAMODB_WRITES_TABLE'],
+        region_name=os.environ['AWS_DEFAULT_REGION'],
+        endpoint_url=os.getenv('DYNAMODB_ENDPOINT_URL'),
+        buffer_writes=buffer_writes,
+    )
+    counters = [CallCounter(saver.table.meta.client)]
+    if saver.writes_table.meta.client is not saver.table.meta.client:
+        counters.append(CallCounter(saver.writes_table.meta.client))
+
+    graph = build_graph().compile(checkpointer=saver)
+    config = {"configurable": {"thread_id": f"bench#buffer-{buffer_writes}"}}
+
+    graph.invoke({'messages': [HumanMessage(content='Oi, tudo bem?')], 'route': 'generic'}, config)
+    saver.flush_writes()
+    for counter in counters:
+        counter.reset()
+
+    calls = {}
+    for turn in range(TURNS):
+        graph.invoke(Command(resume=f'Me fala desses produtos {turn}'), config)
+        saver.flush_writes()
+
+    for counter in counters:
+        for operation, count in counter.calls.items():
+            calls[operation] = calls.get(operation, 0) + count
+    return calls, graph.get_state(config)
+
+
+def run():
+    create_checkpoint_tables(os.getenv('DYNAMODB_ENDPOINT_URL'))
+    direct_calls, direct_state = run_conversation(buffer_writes=False)
+    buffered_calls, buffered_state = run_conversation(buffer_writes=True)
+
+    assert len(direct_state.values['messages']) == len(buffered_state.values['messages'])
+
+    print(f"{'operação':<16} | {'direto/turno':>12} | {'buffer/turno':>12}")
+    for operation in sorted(set(direct_calls) | set(buffered_calls)):
+        print(f"{operation:<16} | {direct_calls.get(operation, 0) / TURNS:>12.1f} | "
+              f"{buffered_calls.get(operation, 0) / TURNS:>12.1f}")
+    direct_total, buffered_total = sum(direct_calls.values()), sum(buffered_calls.values())
+    print(f"{'total':<16} | {direct_total / TURNS:>12.1f} | {buffered_total / TURNS:>12.1f}")
+    print(f"Redução: {100 * (1 - buffered_total / direct_total):.0f}%")
+
+
+if __name__ == '__main__':
+    if os.getenv('DYNAMODB_ENDPOINT_URL'):
+        run()
+    else:
+        from moto import mock_aws
+
+        with mock_aws():
+            run()
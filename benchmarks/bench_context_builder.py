@@ -0,0 +1,79 @@
+"""
+Tokens de prompt por chamada ao LLM: janela fixa das últimas 12 mensagens (antes) vs o
+ContextBuilder com orçamento de tokens (depois), numa conversa sintética em que parte dos
+turnos chama o analyse_product_by_link e recebe a página do produto em markdown.
+
+Também mede o tempo de montagem do prompt. Sem o arquivo do encoding do tiktoken (baixado no
+primeiro uso, ou o do ZIP via TIKTOKEN_CACHE_DIR=tiktoken_cache depois do build.py) os tokens são
+estimados por caracteres; o benchmark informa qual foi usado.
+
+    python -m benchmarks.bench_context_builder
+"""
+import random
+
+from benchmarks.common import measure, print_summary, setup_environment
+
+setup_environment()
+
+TURNS = 40
+TOOL_TURN_RATE = 0.25
+PAGE_CHARS = 40_000
+SYSTEM_PROMPT = 'Você é o assistente de atendimento da loja. ' * 40
+
+
+def product_page(rng: random.Random) -> str:
+    words = ['tamanho', 'cor', 'preto', 'algodão', 'frete', 'R$ 89,90', 'estoque', 'avaliação', '|', '###']
+    text = []
+    while sum(len(word) + 1 for word in text) < PAGE_CHARS:
+        text.append(rng.choice(words))
+    return ' '.join(text)
+
+
+def conversation():
+    """Histórico acumulado antes de cada chamada ao LLM (a conversa cresce turno a turno)."""
+    from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+    rng = random.Random(7)
+    messages = []
+    for turn in range(TURNS):
+        if rng.random() < TOOL_TURN_RATE:
+            messages.append(HumanMessage(content=f'esse produto serve pra mim? https://loja.com/p/{turn}'))
+            call_id = f'call_{turn}'
+            messages.append(AIMessage(content='', tool_calls=[{
+                'id': call_id, 'name': 'analyse_product_by_link', 'args': {'url_site': f'https://loja.com/p/{turn}'}
+            }]))
+            messages.append(ToolMessage(content=product_page(rng), tool_call_id=call_id))
+        else:
+            messages.append(HumanMessage(content=rng.choice(['oi', 'qual o prazo de entrega?', 'tem no azul?'])))
+        yield list(messages)
+        messages.append(AIMessage(content='Claro! ' + 'Segue a informação que você pediu. ' * rng.randint(1, 6)))
+
+
+def run():
+    from lambdas.e_commerce_chatbot.generics.nodes.context import _get_encoding, count_message_tokens
+    from lambdas.e_commerce_chatbot.generics.nodes.llm import SimpleLLMNode
+
+    window = SimpleLLMNode(name='window', system_message=SYSTEM_PROMPT, max_context_tokens=0)
+    budget = SimpleLLMNode(name='budget', system_message=SYSTEM_PROMPT)
+    model_name = budget.context_builder.model_name
+    tokenizer = 'tiktoken' if _get_encoding(model_name) is not None else 'estimativa por caracteres'
+    print(f"{TURNS} turnos, {TOOL_TURN_RATE:.0%} com página de produto, orçamento de "
+          f"{budget.context_builder.max_tokens} tokens ({tokenizer})")
+
+    for label, node in (('janela de 12 mensagens', window), ('orçamento de tokens', budget)):
+        prompt_tokens, prompt_messages = [], []
+        for history in conversation():
+            prompt = node._get_messages({'messages': history})
+            prompt_tokens.append(sum(count_message_tokens(message, model_name) for message in prompt))
+            prompt_messages.append(len(prompt) - 1)
+
+        histories = list(conversation())
+        durations = measure(lambda: [node._get_messages({'messages': history}) for history in histories], 20)
+        print(f"{label:<24} tokens médios={sum(prompt_tokens) / len(prompt_tokens):8.0f}  "
+              f"máximo={max(prompt_tokens):6d}  mensagens de histórico médias="
+              f"{sum(prompt_messages) / len(prompt_messages):5.1f}")
+        print_summary(f'  montagem ({TURNS} chamadas)', durations)
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,124 @@
+"""
+Rajadas de fragmentos concorrentes no debounce do post_message: fluxo antigo
+(get_item -> update_item/put_item -> update_execution_arn) vs `DynamoDBService.append_message`
+(um único UpdateItem condicional).
+
+Mede chamadas ao DynamoDB por mensagem e quantos fragmentos se perdem quando chegam juntos.
+Contra o DynamoDB Local, defina AWS_ENDPOINT_URL_DYNAMODB (lido pelo próprio boto3).
+
+    python -m benchmarks.bench_debounce_upsert
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import CallCounter, setup_environment
+
+setup_environment()
+os.environ.setdefault('DYNAMODB_TABLE', 'bench_received_messages')
+
+BURSTS = 20
+FRAGMENTS_PER_BURST = 8
+
+EXECUTION_ARN = 'arn:aws:states:us-east-1:123456789012:execution:e_commerce_WhatsAppDebounce:bench'
+
+
+def create_messages_table() -> None:
+    import boto3
+
+    boto3.client('dynamodb').create_table(
+        TableName=os.environ['DYNAMODB_TABLE'],
+        KeySchema=[
+            {'AttributeName': 'instance_name', 'KeyType': 'HASH'},
+            {'AttributeName': 'cellphone_number', 'KeyType': 'RANGE'},
+        ],
+        AttributeDefinitions=[
+            {'AttributeName': 'instance_name', 'AttributeType': 'S'},
+            {'AttributeName': 'cellphone_number', 'AttributeType': 'S'},
+        ],
+        BillingMode='PAY_PER_REQUEST',
+    )
+
+
+def legacy_upsert(service, cellphone_number: str, text: str) -> None:
+    """Sequência de leitura, escrita e gravação do ARN que o post_message fazia antes do append_message."""
+    key = {'instance_name': 'bench', 'cellphone_number': cellphone_number}
+    timestamp = int(time.time())
+    response = service._table.get_item(Key=key)
+    if 'Item' in response:
+        concatenated_text = f"{response['Item'].get('text', '')} {text}".strip()
+        service._table.update_item(
+            Key=key,
+            UpdateExpression="SET #txt = :t, last_update = :lu",
+            ExpressionAttributeNames={'#txt': 'text'},
+            ExpressionAttributeValues={':t': concatenated_text, ':lu': timestamp}
+        )
+    else:
+        service._table.put_item(Item=dict(key, text=text, last_update=timestamp))
+    service._table.update_item(
+        Key=key,
+        UpdateExpression="SET execution_arn = :arn",
+        ExpressionAttributeValues={':arn': EXECUTION_ARN}
+    )
+
+
+def atomic_upsert(service, cellphone_number: str, text: str) -> None:
+    service.append_message('bench', cellphone_number, text, int(time.time()), execution_arn=EXECUTION_ARN)
+
+
+def stored_fragments(service, cellphone_number: str) -> int:
+    item = service._table.get_item(Key={'instance_name': 'bench', 'cellphone_number': cellphone_number})['Item']
+    return len(item.get('fragments', [])) or len(item['text'].split())
+
+
+def run_bursts(label: str, upsert) -> None:
+    from lambdas.debouncer.post_message.services.dynamodb_service import DynamoDBService
+
+    service = DynamoDBService()
+    counter = CallCounter(service._table.meta.client)
+
+    calls = 0
+    lost = 0
+    with ThreadPoolExecutor(max_workers=FRAGMENTS_PER_BURST) as executor:
+        for burst in range(BURSTS):
+            cellphone_number = f'{label}-{burst}'
+            fragments = [f'f{i}' for i in range(FRAGMENTS_PER_BURST)]
+
+            counter.reset()
+            list(executor.map(lambda text: upsert(service, cellphone_number, text), fragments))
+            calls += counter.total
+
+            lost += FRAGMENTS_PER_BURST - stored_fragments(service, cellphone_number)
+
+    messages = BURSTS * FRAGMENTS_PER_BURST
+    print(f"{label:<8} chamadas/mensagem={calls / messages:.2f}  "
+          f"fragmentos perdidos={lost}/{messages}")
+
+
+def run():
+    create_messages_table()
+    run_bursts('antigo', legacy_upsert)
+    run_bursts('atomico', atomic_upsert)
+
+
+if __name__ == '__main__':
+    if os.getenv('AWS_ENDPOINT_URL_DYNAMODB'):
+        run()
+    else:
+        import threading
+
+        from moto import mock_aws
+        from moto.core.botocore_stubber import BotocoreStubber
+
+        # O DynamoDB aplica cada UpdateItem atomicamente; o moto não tem locks, então as requisições
+        # são serializadas para que o stand-in tenha a mesma garantia
+        stubber_lock = threading.Lock()
+        stubber_call = BotocoreStubber.__call__
+
+        def locked_call(self, *args, **kwargs):
+            with stubber_lock:
+                return stubber_call(self, *args, **kwargs)
+
+        BotocoreStubber.__call__ = locked_call
+        with mock_aws():
+            run()
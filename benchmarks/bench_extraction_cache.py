@@ -0,0 +1,93 @@
+"""
+Cache de transcrições por SHA-256 + modelo: chamadas ao modelo num tráfego com mídias
+encaminhadas (o mesmo áudio/flyer chegando de vários usuários), sem cache vs com o LRU local
+e a tabela do DynamoDB (moto) compartilhada por CONTAINERS containers.
+
+    python -m benchmarks.bench_extraction_cache
+"""
+import base64
+import os
+import random
+
+from benchmarks.common import setup_environment
+
+setup_environment()
+os.environ.setdefault('OPENAI_AUDIO_MODEL_NAME', 'whisper-1')
+
+MESSAGES = 400
+DISTINCT_MEDIA = 60
+CONTAINERS = 4
+LOCAL_ENTRIES = 16
+
+
+class FakeTranscriptions:
+    def __init__(self):
+        self.calls = 0
+
+    def create(self, model, file, language):
+        self.calls += 1
+        return type('Transcript', (), {'text': f'transcrição de {len(file[1].read())} bytes'})()
+
+
+def create_cache_table() -> None:
+    import boto3
+
+    boto3.client('dynamodb').create_table(
+        TableName='bench_extraction_cache',
+        KeySchema=[{'AttributeName': 'cache_key', 'KeyType': 'HASH'}],
+        AttributeDefinitions=[{'AttributeName': 'cache_key', 'AttributeType': 'S'}],
+        BillingMode='PAY_PER_REQUEST',
+    )
+
+
+def forwarded_traffic():
+    """Popularidade em cauda longa: poucos áudios/flyers concentram a maior parte dos envios."""
+    rng = random.Random(7)
+    media = [os.urandom(2048 + index) for index in range(DISTINCT_MEDIA)]
+    weights = [1 / (rank + 1) for rank in range(DISTINCT_MEDIA)]
+    return [base64.b64encode(rng.choices(media, weights)[0]).decode() for _ in range(MESSAGES)]
+
+
+def run_containers(traffic, build_cache):
+    from lambdas.debouncer.post_message.strategies.text_extraction_strategies import AudioExtractionStrategy
+
+    transcriptions = FakeTranscriptions()
+    containers = []
+    for _ in range(CONTAINERS):
+        strategy = AudioExtractionStrategy(build_cache())
+        strategy.client = type('Client', (), {'audio': type('Audio', (), {'transcriptions': transcriptions})()})()
+        containers.append(strategy)
+
+    # As mensagens se espalham entre os containers como numa Lambda escalada
+    for index, base_64 in enumerate(traffic):
+        containers[index % CONTAINERS].process({'base64': base_64})
+
+    totals = {}
+    for strategy in containers:
+        for name, value in (strategy.cache.stats() if strategy.cache else {}).items():
+            totals[name] = totals.get(name, 0) + value
+    return transcriptions.calls, totals
+
+
+def run():
+    from lambdas.debouncer.post_message.services.extraction_cache_service import ExtractionCacheService
+
+    create_cache_table()
+    traffic = forwarded_traffic()
+    print(f"{MESSAGES} mídias ({DISTINCT_MEDIA} distintas), {CONTAINERS} containers, LRU de {LOCAL_ENTRIES}")
+
+    scenarios = (
+        ('sem cache', lambda: None),
+        ('só LRU local', lambda: ExtractionCacheService(max_entries=LOCAL_ENTRIES)),
+        ('LRU + tabela', lambda: ExtractionCacheService(table_name='bench_extraction_cache', max_entries=LOCAL_ENTRIES)),
+    )
+    for label, build_cache in scenarios:
+        calls, stats = run_containers(traffic, build_cache)
+        print(f"{label:<14} chamadas ao modelo={calls:4d} ({calls / MESSAGES:6.1%})  {stats}")
+
+
+if __name__ == '__main__':
+    from moto import mock_aws
+
+    with mock_aws():
+        run()
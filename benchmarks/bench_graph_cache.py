@@ -0,0 +1,43 @@
+"""
+Compara o custo por invocação de montar o grafo a cada mensagem
+(GRAPH_CACHE_ENABLED=false) com o grafo compilado uma vez por container.
+
+    python -m benchmarks.bench_graph_cache
+"""
+import os
+
+from benchmarks.common import measure, print_summary, setup_environment
+
+setup_environment()
+
+from lambdas.e_commerce_chatbot import graph as graph_module  # noqa: E402
+
+ITERATIONS = 50
+
+
+def per_call_build():
+    os.environ['GRAPH_CACHE_ENABLED'] = 'false'
+    config = {"configurable": {"thread_id": "bench#5511999999999"}}
+    return measure(lambda: graph_module.get_workflow(config=config), ITERATIONS)
+
+
+def cached_build():
+    os.environ['GRAPH_CACHE_ENABLED'] = 'true'
+    graph_module._cached_workflow = None
+    config = {"configurable": {"thread_id": "bench#5511999999999"}}
+
+    cold_start = measure(lambda: graph_module.get_workflow(config=config), 1)
+    warm_start = measure(lambda: graph_module.get_workflow(config=config), ITERATIONS)
+    return cold_start, warm_start
+
+
+if __name__ == '__main__':
+    per_call = per_call_build()
+    cold_start, warm_start = cached_build()
+
+    print_summary('create_workflow por invocação', per_call)
+    print_summary('cache (cold start)', cold_start)
+    print_summary('cache (warm start)', warm_start)
+
+    saved = sum(per_call) / len(per_call) - sum(warm_start) / len(warm_start)
+    print(f"Tempo economizado por invocação em warm start: {saved:.3f}ms")
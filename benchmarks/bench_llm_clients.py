@@ -0,0 +1,114 @@
+"""
+Conexões com a API da OpenAI por turno: um ChatOpenAI com o próprio pool por node (como o
+langchain-openai < 0.3 faz quando nenhum http_client é passado) vs o registry de clients
+compartilhado (generics/nodes/clients.py).
+
+Um servidor local com keep-alive responde como a API de chat completions e atrasa a primeira
+resposta de cada conexão nova em TLS_HANDSHAKE_MS, o custo de um handshake TLS até a API.
+Cada turno chama os nodes de um fluxo típico (router, generic e fallback) e os turnos são
+separados por TURN_GAP_SECONDS, mais do que os 5s de keep-alive padrão do httpx.
+
+    python -m benchmarks.bench_llm_clients
+"""
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.common import print_summary, setup_environment
+
+setup_environment()
+
+TLS_HANDSHAKE_MS = 120
+TURNS = 4
+TURN_GAP_SECONDS = 6
+NODES_PER_TURN = 3
+
+COMPLETION = {
+    'id': 'chatcmpl-bench',
+    'object': 'chat.completion',
+    'created': 0,
+    'model': 'gpt-4o-mini',
+    'choices': [{
+        'index': 0,
+        'message': {'role': 'assistant', 'content': 'ok'},
+        'finish_reason': 'stop'
+    }],
+    'usage': {'prompt_tokens': 1, 'completion_tokens': 1, 'total_tokens': 2}
+}
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    connections = 0
+
+    def setup(self):
+        super().setup()
+        FakeOpenAIHandler.connections += 1
+        time.sleep(TLS_HANDSHAKE_MS / 1000)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        body = json.dumps(COMPLETION).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_server() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeOpenAIHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ['OPENAI_API_BASE'] = f'http://127.0.0.1:{server.server_port}/v1'
+    os.environ['OPENAI_BASE_URL'] = os.environ['OPENAI_API_BASE']
+    return server
+
+
+def per_node_models():
+    import httpx
+    from langchain_openai import ChatOpenAI
+
+    return [
+        ChatOpenAI(temperature=0, model=os.environ['OPENAI_LLM_MODEL_NAME'], http_client=httpx.Client())
+        for _ in range(NODES_PER_TURN)
+    ]
+
+
+def registry_models():
+    from lambdas.e_commerce_chatbot.generics.nodes.llm import SimpleLLMNode
+
+    return [SimpleLLMNode(name=f'node_{index}').llm for index in range(NODES_PER_TURN)]
+
+
+def run_turns(label: str, models) -> None:
+    FakeOpenAIHandler.connections = 0
+    durations = []
+    for turn in range(TURNS):
+        if turn:
+            time.sleep(TURN_GAP_SECONDS)
+        start = time.perf_counter()
+        for model in models:
+            model.invoke('oi')
+        durations.append((time.perf_counter() - start) * 1000)
+
+    print_summary(label, durations)
+    print(f"{'':<40} handshakes={FakeOpenAIHandler.connections} "
+          f"({FakeOpenAIHandler.connections / TURNS:.2f} por turno)")
+
+
+def run():
+    start_server()
+    print(f"{TURNS} turnos x {NODES_PER_TURN} nodes, {TURN_GAP_SECONDS}s entre turnos, "
+          f"handshake simulado de {TLS_HANDSHAKE_MS}ms")
+    run_turns('um pool por node', per_node_models())
+    run_turns('registry compartilhado', registry_models())
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,124 @@
+"""
+Overhead de CPU por turno em LLMNode.process: montar bind_tools/with_structured_output a cada
+chamada (antes) vs o runnable montado uma vez na construção do node (depois).
+
+O modelo é o ChatOpenAI do registry com um transport fake do httpx que responde na hora,
+então o tempo medido é só o do lado do cliente: mensagens, schemas, payload e parsing.
+
+    python -m benchmarks.bench_llm_node_process
+"""
+import json
+import logging
+
+from benchmarks.common import measure, print_summary, setup_environment
+
+setup_environment()
+
+ITERATIONS = 300
+
+# Argumentos devolvidos quando o structured output força a tool do output_model
+STRUCTURED_ARGS = {
+    'Router': {'route': 'generic'},
+    'GetsOrderNumber': {'order_id': 'A123'},
+}
+
+
+def fake_openai(request):
+    import httpx
+
+    body = json.loads(request.content)
+    message = {'role': 'assistant', 'content': 'Claro, posso ajudar.'}
+    tool_choice = body.get('tool_choice')
+    if isinstance(tool_choice, dict):
+        name = tool_choice['function']['name']
+        message = {
+            'role': 'assistant',
+            'content': None,
+            'tool_calls': [{
+                'id': 'call_bench',
+                'type': 'function',
+                'function': {'name': name, 'arguments': json.dumps(STRUCTURED_ARGS[name])}
+            }]
+        }
+    return httpx.Response(200, json={
+        'id': 'chatcmpl-bench',
+        'object': 'chat.completion',
+        'created': 0,
+        'model': body['model'],
+        'choices': [{'index': 0, 'message': message, 'finish_reason': 'stop'}],
+        'usage': {'prompt_tokens': 1, 'completion_tokens': 1, 'total_tokens': 2}
+    })
+
+
+def install_fake_transport() -> None:
+    import httpx
+
+    from lambdas.e_commerce_chatbot.generics.nodes import clients
+
+    clients._http_client = httpx.Client(transport=httpx.MockTransport(fake_openai))
+
+
+def build_nodes():
+    from lambdas.e_commerce_chatbot.generics.nodes.llm import (
+        SimpleLLMNode, StateUpdateStructureOutputLLMNode, StructuredOutputLLMNode
+    )
+    from lambdas.e_commerce_chatbot.graph import Router
+    from lambdas.e_commerce_chatbot.subgraphs.generic.tools import analyse_product_by_link
+    from lambdas.e_commerce_chatbot.subgraphs.order_status.stuctureOutput import GetsOrderNumber
+    from lambdas.e_commerce_chatbot.subgraphs.order_status.tools import check_status
+
+    return [
+        ('router (structured output)',
+         StructuredOutputLLMNode(name='router_node', system_message='router', output_model=Router)),
+        ('generic (bind_tools)',
+         SimpleLLMNode(name='ecom_generic_node', system_message='generic', tools=[analyse_product_by_link])),
+        ('order status (bind_tools)',
+         SimpleLLMNode(name='ecom_order_status_node', system_message='status', tools=[check_status])),
+        ('order number (structured output)',
+         StateUpdateStructureOutputLLMNode(name='saves_order_number_state', output_model=GetsOrderNumber,
+                                           state_field='order_id', attribute='order_id')),
+    ]
+
+
+def run():
+    from langchain_core.messages import AIMessage, HumanMessage
+
+    logging.disable(logging.INFO)
+    install_fake_transport()
+    state = {'messages': [
+        HumanMessage(content='oi'),
+        AIMessage(content='Olá! Como posso ajudar?'),
+        HumanMessage(content='quero saber do meu pedido A123'),
+    ]}
+    config = {'configurable': {'thread_id': 'bench#5511999999999'}}
+
+    total_build = 0.0
+    for label, node in build_nodes():
+        cached = node.runnable
+
+        def per_call():
+            # Comportamento anterior: o runnable era montado dentro de cada process
+            node.runnable = node.build_runnable()
+            return node.process(state, config)
+
+        def memoized():
+            node.runnable = cached
+            return node.process(state, config)
+
+        # Aquece caches de import e do pydantic antes de medir
+        measure(per_call, 20)
+        measure(memoized, 20)
+        build = measure(node.build_runnable, ITERATIONS)
+        before = measure(per_call, ITERATIONS)
+        after = measure(memoized, ITERATIONS)
+        print(label)
+        print_summary('  montagem do runnable', build)
+        print_summary('  process antes', before)
+        print_summary('  process depois', after)
+        total_build += sum(build) / len(build)
+
+    print(f"Montagem removida por turno somando os quatro nodes: {total_build:.3f}ms")
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,73 @@
+"""
+Pipeline completo do debouncer offline (LocalDebouncerService + InMemoryMessageStore):
+webhooks da Evolution -> post_message -> janela -> process_message -> dispatch.
+
+Dispara rajadas de fragmentos em várias conversas simultâneas e mede a precisão do timer
+(atraso do dispatch em relação ao fim da janela) e se cada rajada virou uma única mensagem.
+
+    python -m benchmarks.bench_local_debouncer
+"""
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import print_summary, setup_environment
+
+setup_environment()
+
+from lambdas.debouncer.local_server import build_local_pipeline  # noqa: E402
+from lambdas.debouncer.post_message.strategies.debounce_window_strategies import FixedWindowStrategy  # noqa: E402
+
+CONVERSATIONS = 50
+FRAGMENTS = 4
+FRAGMENT_GAP_SECONDS = 0.05
+WINDOW_SECONDS = 0.5
+
+
+def evolution_event(cellphone_number: str, text: str) -> dict:
+    return {'body': json.dumps({
+        'instance': 'bench',
+        'data': {
+            'key': {'remoteJid': f'{cellphone_number}@s.whatsapp.net', 'fromMe': False, 'id': f'{text}-{cellphone_number}'},
+            'message': {'conversation': text},
+        },
+    })}
+
+
+def run():
+    dispatched = []
+    dispatched_lock = threading.Lock()
+    last_fragment_at = {}
+
+    def record_dispatch(instance_name, cellphone_number, message, last_update):
+        with dispatched_lock:
+            dispatched.append((cellphone_number, message, time.perf_counter()))
+
+    processor, debouncer, _ = build_local_pipeline(
+        dispatch=record_dispatch, window_strategy=FixedWindowStrategy(WINDOW_SECONDS))
+
+    def send_burst(conversation: int):
+        cellphone_number = f'55119{conversation:08d}'
+        for fragment in range(FRAGMENTS):
+            processor.process_event(evolution_event(cellphone_number, f'f{fragment}'))
+            last_fragment_at[cellphone_number] = time.perf_counter()
+            time.sleep(FRAGMENT_GAP_SECONDS)
+
+    with ThreadPoolExecutor(max_workers=CONVERSATIONS) as executor:
+        list(executor.map(send_burst, range(CONVERSATIONS)))
+
+    time.sleep(WINDOW_SECONDS * 2)
+    debouncer.close()
+
+    expected = ' '.join(f'f{fragment}' for fragment in range(FRAGMENTS))
+    merged = sum(1 for _, message, _ in dispatched if message == expected)
+    delays = [(at - last_fragment_at[cellphone_number] - WINDOW_SECONDS) * 1000 for cellphone_number, _, at in dispatched]
+
+    print(f"{CONVERSATIONS} conversas x {FRAGMENTS} fragmentos, janela {WINDOW_SECONDS * 1000:.0f}ms")
+    print(f"mensagens despachadas={len(dispatched)}  rajadas consolidadas={merged}/{CONVERSATIONS}")
+    print_summary('atraso após o fim da janela', delays)
+
+
+if __name__ == '__main__':
+    run()
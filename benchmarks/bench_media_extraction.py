@@ -0,0 +1,123 @@
+"""
+Rajada de áudios no debouncer offline (InMemoryMessageStore + LocalDebouncerService), com a
+transcrição simulada por EXTRACTION_LATENCY_MS (padrão 1500).
+
+1. Um webhook com vários áudios: extração em série (1 worker) vs em paralelo no thread pool.
+2. Áudio que termina de transcrever depois da janela: o process_message segura o dispatch
+   (MediaPendingError + retry) até o texto da mídia chegar.
+
+    python -m benchmarks.bench_media_extraction
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import setup_environment
+
+setup_environment()
+
+from lambdas.debouncer.local_server import build_local_pipeline  # noqa: E402
+from lambdas.debouncer.post_message.strategies.debounce_window_strategies import FixedWindowStrategy  # noqa: E402
+
+VOICE_NOTES = 5
+WINDOW_SECONDS = 0.5
+
+
+class FakeTranscription:
+    def __init__(self, latency_seconds: float):
+        self.latency_seconds = latency_seconds
+
+    def process(self, content):
+        time.sleep(self.latency_seconds)
+        return f"[audio {content['base64']}]"
+
+
+def voice_note(cellphone_number: str, note_id: str) -> dict:
+    return {
+        'instance': 'bench',
+        'data': {
+            'key': {'remoteJid': f'{cellphone_number}@s.whatsapp.net', 'fromMe': False, 'id': note_id},
+            'message': {'audioMessage': {}, 'base64': note_id},
+        },
+    }
+
+
+def text_message(cellphone_number: str, text: str) -> dict:
+    return {
+        'instance': 'bench',
+        'data': {
+            'key': {'remoteJid': f'{cellphone_number}@s.whatsapp.net', 'fromMe': False, 'id': f'text-{text}'},
+            'message': {'conversation': text},
+        },
+    }
+
+
+def build_pipeline(latency_seconds: float, dispatched: list):
+    def record_dispatch(instance_name, cellphone_number, message, last_update):
+        dispatched.append((message, time.perf_counter()))
+
+    processor, debouncer, store = build_local_pipeline(
+        dispatch=record_dispatch, window_strategy=FixedWindowStrategy(WINDOW_SECONDS))
+    processor.evolution_handler.strategies['audioMessage'] = FakeTranscription(latency_seconds)
+    return processor, debouncer
+
+
+def burst_in_one_webhook(latency_seconds: float, workers: int) -> None:
+    dispatched = []
+    processor, debouncer = build_pipeline(latency_seconds, dispatched)
+    processor._extraction_executor = ThreadPoolExecutor(max_workers=workers)
+
+    notes = [voice_note('5511900000001', f'n{index}') for index in range(VOICE_NOTES)]
+    start = time.perf_counter()
+    processor.process_event({'body': json.dumps(notes)})
+    ingestion = time.perf_counter() - start
+
+    time.sleep(WINDOW_SECONDS * 2)
+    debouncer.close()
+
+    expected = ' '.join(f'[audio n{index}]' for index in range(VOICE_NOTES))
+    print(f"{workers} worker(s): ingestão={ingestion * 1000:7.0f}ms  despachos={len(dispatched)}  "
+          f"texto completo={bool(dispatched) and dispatched[0][0] == expected}")
+
+
+def media_outlives_window(latency_seconds: float) -> None:
+    dispatched = []
+    processor, debouncer = build_pipeline(latency_seconds, dispatched)
+
+    cellphone_number = '5511900000002'
+    start = time.perf_counter()
+    # O áudio chega logo depois do texto, em outra invocação, e demora mais que a janela para virar texto
+    audio = threading.Thread(
+        target=processor.process_event, args=({'body': json.dumps(voice_note(cellphone_number, 'late'))},))
+    processor.process_event({'body': json.dumps(text_message(cellphone_number, 'segue o audio'))})
+    audio.start()
+
+    deadline = time.perf_counter() + latency_seconds + 10
+    while not dispatched and time.perf_counter() < deadline:
+        time.sleep(0.05)
+    time.sleep(WINDOW_SECONDS * 2)
+    audio.join()
+    debouncer.close()
+
+    messages = [message for message, _ in dispatched]
+    waited = (dispatched[0][1] - start) if dispatched else float('nan')
+    print(f"mídia mais lenta que a janela: despachos={messages}  dispatch após {waited * 1000:.0f}ms")
+
+
+def run():
+    import logging
+
+    logging.disable(logging.INFO)
+    latency_seconds = float(os.getenv('EXTRACTION_LATENCY_MS', '1500')) / 1000
+
+    print(f"{VOICE_NOTES} áudios num webhook, transcrição de {latency_seconds * 1000:.0f}ms, "
+          f"janela {WINDOW_SECONDS * 1000:.0f}ms")
+    burst_in_one_webhook(latency_seconds, workers=1)
+    burst_in_one_webhook(latency_seconds, workers=VOICE_NOTES)
+    media_outlives_window(latency_seconds)
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,88 @@
+"""
+Pico de memória (tracemalloc) ao preparar uma mídia para o modelo, sem contar o base64 do
+webhook, que já está em memória:
+
+- áudio: b64decode + BytesIO (antes) vs MediaPayload.decode em blocos para o spool (depois);
+- imagem: data URL com o base64 original (antes) vs imagem reduzida para a resolução útil do
+  modelo de visão (depois), com o tamanho do que vai para a API. Os buffers de pixels do
+  Pillow ficam fora do tracemalloc; com o draft do JPEG eles já saem em escala reduzida.
+
+    python -m benchmarks.bench_media_payload
+"""
+import base64
+import gc
+import io
+import os
+import tracemalloc
+
+from benchmarks.common import setup_environment
+
+setup_environment()
+
+from lambdas.debouncer.post_message.media_payload import MediaPayload  # noqa: E402
+
+AUDIO_SIZES_MB = (1, 5, 20)
+IMAGE_SIZE = (4000, 3000)
+
+
+def peak_mb(fn) -> float:
+    gc.collect()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024 / 1024
+
+
+def audio_before(base_64: str) -> None:
+    audio_file = io.BytesIO(base64.b64decode(base_64))
+    audio_file.name = 'audio.mp3'
+    audio_file.read()
+
+
+def audio_after(base_64: str) -> None:
+    with MediaPayload.decode(base_64) as payload:
+        payload.file.read(64 * 1024)
+
+
+def photo_base64() -> str:
+    from PIL import Image
+
+    # Ruído para o JPEG não comprimir a quase nada, como uma foto de celular
+    image = Image.frombytes('RGB', IMAGE_SIZE, os.urandom(IMAGE_SIZE[0] * IMAGE_SIZE[1] * 3))
+    output = io.BytesIO()
+    image.save(output, format='JPEG', quality=90)
+    return base64.b64encode(output.getvalue()).decode('ascii')
+
+
+def run():
+    print("áudio (MB decodificados)   antes (MB)   depois (MB)")
+    for size_mb in AUDIO_SIZES_MB:
+        base_64 = base64.b64encode(os.urandom(size_mb * 1024 * 1024)).decode('ascii')
+        print(f"{size_mb:>24}   {peak_mb(lambda: audio_before(base_64)):10.1f}   "
+              f"{peak_mb(lambda: audio_after(base_64)):11.1f}")
+
+    try:
+        base_64 = photo_base64()
+    except ImportError:
+        print("Pillow não instalado, pulando a imagem")
+        return
+
+    sent = {}
+
+    def image_before():
+        sent['before'] = f"data:image/jpeg;base64,{base_64}"
+
+    def image_after():
+        with MediaPayload.decode(base_64) as payload:
+            mime_type, image_base_64 = payload.vision_base64()
+            sent['after'] = f"data:{mime_type};base64,{image_base_64}"
+
+    before, after = peak_mb(image_before), peak_mb(image_after)
+    print(f"imagem {IMAGE_SIZE[0]}x{IMAGE_SIZE[1]} ({len(base_64) / 1024 / 1024:.1f}MB em base64)")
+    print(f"  antes : pico={before:6.1f}MB  enviado={len(sent['before']) / 1024:8.0f}KB")
+    print(f"  depois: pico={after:6.1f}MB  enviado={len(sent['after']) / 1024:8.0f}KB")
+
+
+if __name__ == '__main__':
+    run()
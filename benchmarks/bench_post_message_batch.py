@@ -0,0 +1,120 @@
+"""
+Pico de campanha no post_message: um webhook por invocação, com os services recriados a cada
+chamada (handler antigo), vs um lote do SQS agrupado por conversa com os services reaproveitados
+(`MessageProcessor.process_records`).
+
+Com o moto, cada chamada ao DynamoDB e ao Step Functions ganha SIMULATED_RTT_MS (padrão 10) de RTT.
+Mede chamadas de API e tempo por mensagem.
+
+    python -m benchmarks.bench_post_message_batch
+"""
+import json
+import os
+import time
+
+from benchmarks.bench_debounce_upsert import create_messages_table
+from benchmarks.bench_local_debouncer import evolution_event
+from benchmarks.common import setup_environment
+
+setup_environment()
+os.environ.setdefault('DYNAMODB_TABLE', 'bench_received_messages')
+
+CONVERSATIONS = 40
+MESSAGES_PER_CONVERSATION = 5
+SQS_BATCH_SIZE = 100
+
+
+class ApiCallCounter:
+    """Conta as chamadas de todos os clients criados pela sessão padrão do boto3 e simula o RTT."""
+
+    def __init__(self, rtt_ms: float):
+        import boto3
+
+        self.rtt_ms = rtt_ms
+        self.calls = 0
+        boto3.setup_default_session()
+        boto3.DEFAULT_SESSION.events.register('before-call', self._on_call)
+
+    def _on_call(self, **kwargs):
+        self.calls += 1
+        if self.rtt_ms > 0:
+            time.sleep(self.rtt_ms / 1000)
+
+
+def create_state_machine() -> None:
+    import boto3
+
+    state_machine = boto3.client('stepfunctions').create_state_machine(
+        name='e_commerce_WhatsAppDebounce',
+        definition=json.dumps({'StartAt': 'Done', 'States': {'Done': {'Type': 'Succeed'}}}),
+        roleArn='arn:aws:iam::123456789012:role/bench',
+    )
+    os.environ['STEP_FUNCTION_ARN'] = state_machine['stateMachineArn']
+
+
+def campaign_messages(label: str):
+    """Respostas de uma campanha: várias conversas, cada uma mandando alguns fragmentos intercalados."""
+    return [
+        evolution_event(f'{label}-{conversation}', f'f{fragment}')
+        for fragment in range(MESSAGES_PER_CONVERSATION)
+        for conversation in range(CONVERSATIONS)
+    ]
+
+
+def run_single(counter: ApiCallCounter):
+    from lambdas.debouncer.post_message.lambda_function import MessageProcessor
+    from lambdas.debouncer.post_message.services.dynamodb_service import DynamoDBService
+    from lambdas.debouncer.post_message.services.step_function_service import StepFunctionService
+    from lambdas.debouncer.post_message.webhook_handler import EvolutionHandler
+
+    events = campaign_messages('single')
+    counter.calls = 0
+    start = time.perf_counter()
+    for event in events:
+        processor = MessageProcessor(DynamoDBService(), StepFunctionService(), EvolutionHandler())
+        processor.process_event(event)
+    return (time.perf_counter() - start) * 1000, counter.calls, len(events)
+
+
+def run_batched(counter: ApiCallCounter):
+    from lambdas.debouncer.post_message.lambda_function import get_processor
+
+    events = campaign_messages('batch')
+    records = [{'messageId': str(index), 'body': event['body']} for index, event in enumerate(events)]
+    processor = get_processor()
+
+    counter.calls = 0
+    start = time.perf_counter()
+    failures = []
+    for offset in range(0, len(records), SQS_BATCH_SIZE):
+        failures += processor.process_records(records[offset:offset + SQS_BATCH_SIZE])['batchItemFailures']
+    assert not failures, failures
+    return (time.perf_counter() - start) * 1000, counter.calls, len(events)
+
+
+def run():
+    import logging
+
+    logging.disable(logging.INFO)
+    counter = ApiCallCounter(float(os.getenv('SIMULATED_RTT_MS', '10')))
+    create_messages_table()
+    create_state_machine()
+
+    print(f"{CONVERSATIONS} conversas x {MESSAGES_PER_CONVERSATION} mensagens, lotes de {SQS_BATCH_SIZE}, "
+          f"RTT {counter.rtt_ms:.0f}ms")
+    results = {}
+    for label, runner in (('um webhook por invocação', run_single), ('lote agrupado por conversa', run_batched)):
+        elapsed_ms, calls, messages = runner(counter)
+        results[label] = elapsed_ms
+        print(f"{label:<28} chamadas/mensagem={calls / messages:5.2f}  ms/mensagem={elapsed_ms / messages:7.2f}  "
+              f"mensagens/s={messages / elapsed_ms * 1000:7.1f}")
+
+    single, batched = results.values()
+    print(f"Vazão: {single / batched:.1f}x")
+
+
+if __name__ == '__main__':
+    from moto import mock_aws
+
+    with mock_aws():
+        run()
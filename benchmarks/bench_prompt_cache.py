@@ -0,0 +1,128 @@
+"""
+Tokens cacheados por node ao longo de uma conversa, lidos das estatísticas que o LLMNode
+registra a partir do usage de cada resposta (generics/nodes/usage.py).
+
+O transport fake do httpx simula o cache de prompt do provedor: o prefixo da requisição
+(tools e depois as mensagens, na ordem enviada) é cacheado a partir de 1024 tokens, em
+incrementos de 128, e só os tokens fora do cache pagam o prefill (PREFILL_MS_PER_1K_TOKENS).
+Os tokens são estimados por caracteres. A conversa passa do orçamento de contexto, então o
+início do histórico avança: um bloco por turno (LLM_CONTEXT_WINDOW_STEP=1) vs em degraus de 8
+blocos (padrão). Também mostra o prefill que as mesmas chamadas teriam sem nenhum cache.
+
+    python -m benchmarks.bench_prompt_cache
+"""
+import hashlib
+import json
+import logging
+import time
+
+from benchmarks.common import setup_environment
+
+setup_environment()
+
+TURNS = 40
+MAX_CONTEXT_TOKENS = 3000
+CHARS_PER_TOKEN = 4
+CACHE_MIN_TOKENS = 1024
+CACHE_INCREMENT_TOKENS = 128
+PREFILL_MS_PER_1K_TOKENS = 30
+REPLY = ('Claro! Temos esse modelo em três cores e entregamos em todo o Brasil. '
+         'O prazo depende do CEP e o frete é grátis acima de R$ 199. ') * 3
+
+
+class PrefixCache:
+    def __init__(self):
+        self.prefixes = set()
+
+    def lookup_and_store(self, text: str) -> int:
+        tokens = len(text) // CHARS_PER_TOKEN
+        cached = 0
+        for boundary in range(CACHE_MIN_TOKENS, tokens + 1, CACHE_INCREMENT_TOKENS):
+            digest = hashlib.sha256(text[:boundary * CHARS_PER_TOKEN].encode('utf-8')).digest()
+            if digest in self.prefixes:
+                cached = boundary
+            self.prefixes.add(digest)
+        return cached
+
+
+def fake_openai_with_cache(cache: PrefixCache, prefill_totals: dict):
+    import httpx
+
+    def handler(request):
+        body = json.loads(request.content)
+        prompt = json.dumps(body.get('tools'), ensure_ascii=False) + ''.join(
+            json.dumps(message, ensure_ascii=False) for message in body['messages'])
+        prompt_tokens = len(prompt) // CHARS_PER_TOKEN
+        cached_tokens = cache.lookup_and_store(prompt)
+        prefill_totals['uncached'] += (prompt_tokens - cached_tokens) * PREFILL_MS_PER_1K_TOKENS / 1000
+        prefill_totals['no_cache'] += prompt_tokens * PREFILL_MS_PER_1K_TOKENS / 1000
+        time.sleep((prompt_tokens - cached_tokens) * PREFILL_MS_PER_1K_TOKENS / 1000 / 1000)
+
+        message = {'role': 'assistant', 'content': REPLY}
+        tool_choice = body.get('tool_choice')
+        if isinstance(tool_choice, dict):
+            message = {'role': 'assistant', 'content': None, 'tool_calls': [{
+                'id': 'call_bench', 'type': 'function',
+                'function': {'name': tool_choice['function']['name'], 'arguments': json.dumps({'route': 'generic'})}
+            }]}
+        return httpx.Response(200, json={
+            'id': 'chatcmpl-bench', 'object': 'chat.completion', 'created': 0, 'model': body['model'],
+            'choices': [{'index': 0, 'message': message, 'finish_reason': 'stop'}],
+            'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': 60,
+                      'total_tokens': prompt_tokens + 60,
+                      'prompt_tokens_details': {'cached_tokens': cached_tokens}}
+        })
+
+    return handler
+
+
+def run_conversation(label: str, window_step: int) -> None:
+    import httpx
+    from langchain_core.messages import AIMessage, HumanMessage
+
+    from lambdas.e_commerce_chatbot.generics.nodes import clients
+    from lambdas.e_commerce_chatbot.generics.nodes.llm import SimpleLLMNode, StructuredOutputLLMNode
+    from lambdas.e_commerce_chatbot.generics.nodes.usage import reset_usage_stats, usage_stats
+    from lambdas.e_commerce_chatbot.graph import Router
+    from lambdas.e_commerce_chatbot.graphs.prompts import BOT_GENERIC, ROUTER_PROMPT
+    from lambdas.e_commerce_chatbot.subgraphs.generic.tools import analyse_product_by_link
+
+    prefill_totals = {'uncached': 0.0, 'no_cache': 0.0}
+    clients._http_client = httpx.Client(transport=httpx.MockTransport(
+        fake_openai_with_cache(PrefixCache(), prefill_totals)))
+    clients._chat_models.clear()
+    reset_usage_stats()
+
+    nodes = [
+        StructuredOutputLLMNode(name='router_node', system_message=ROUTER_PROMPT, output_model=Router),
+        SimpleLLMNode(name='ecom_generic_node', system_message=BOT_GENERIC, tools=[analyse_product_by_link]),
+    ]
+    for node in nodes:
+        node.context_builder.max_tokens = MAX_CONTEXT_TOKENS
+        node.context_builder.window_step = window_step
+
+    state = {'messages': []}
+    for turn in range(TURNS):
+        state['messages'].append(HumanMessage(content=f'pergunta {turn}: tem no azul e qual o prazo?'))
+        for node in nodes:
+            node.process(state, {})
+        state['messages'].append(AIMessage(content=REPLY))
+
+    print(label)
+    for node_name, stats in usage_stats().items():
+        print(f"  {node_name:<20} chamadas={stats['calls']:3d}  tokens de entrada={stats['input_tokens']:7d}  "
+              f"cacheados={stats['cached_tokens']:7d} ({stats['cache_hit_rate']:.0%})  "
+              f"latência média={stats['mean_latency_ms']:6.1f}ms")
+    print(f"  prefill simulado: {prefill_totals['uncached']:.0f}ms (sem cache seriam "
+          f"{prefill_totals['no_cache']:.0f}ms)")
+
+
+def run():
+    logging.disable(logging.INFO)
+    print(f"{TURNS} turnos, orçamento de {MAX_CONTEXT_TOKENS} tokens, cache a partir de {CACHE_MIN_TOKENS} tokens")
+    run_conversation('janela avançando um bloco por turno', window_step=1)
+    run_conversation('janela em degraus de 8 blocos', window_step=8)
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,110 @@
+"""
+Reenvios de webhook da Evolution no post_message (DynamoDB e Step Functions no moto): parte das
+mensagens chega de novo, às vezes no mesmo container e às vezes em outro. Compara as conversas
+com fragmentos duplicados e as execuções do Step Functions sem e com o IdempotencyService.
+
+    python -m benchmarks.bench_webhook_dedup
+"""
+import os
+import random
+
+from benchmarks.bench_debounce_upsert import create_messages_table
+from benchmarks.bench_local_debouncer import evolution_event
+from benchmarks.bench_post_message_batch import ApiCallCounter, create_state_machine
+from benchmarks.common import setup_environment
+
+setup_environment()
+os.environ.setdefault('DYNAMODB_TABLE', 'bench_received_messages')
+
+CONVERSATIONS = 20
+MESSAGES_PER_CONVERSATION = 5
+REDELIVERY_RATE = 0.3
+CONTAINERS = 2
+
+
+class StartExecutionCounter:
+    def __init__(self):
+        import boto3
+
+        self.calls = 0
+        boto3.DEFAULT_SESSION.events.register('before-call.sfn.StartExecution', self._on_call)
+
+    def _on_call(self, **kwargs):
+        self.calls += 1
+
+
+def create_dedup_table() -> None:
+    import boto3
+
+    boto3.client('dynamodb').create_table(
+        TableName='bench_webhook_dedup',
+        KeySchema=[{'AttributeName': 'message_id', 'KeyType': 'HASH'}],
+        AttributeDefinitions=[{'AttributeName': 'message_id', 'AttributeType': 'S'}],
+        BillingMode='PAY_PER_REQUEST',
+    )
+
+
+def deliveries(label: str):
+    """Cada webhook pode ser reentregue logo depois, para o mesmo container ou para outro."""
+    rng = random.Random(3)
+    events = []
+    for fragment in range(MESSAGES_PER_CONVERSATION):
+        for conversation in range(CONVERSATIONS):
+            event = evolution_event(f'{label}-{conversation}', f'f{fragment}')
+            events.append((rng.randrange(CONTAINERS), event))
+            if rng.random() < REDELIVERY_RATE:
+                events.append((rng.randrange(CONTAINERS), event))
+    return events
+
+
+def run_scenario(label: str, dedup: bool, starts: StartExecutionCounter, api_calls: ApiCallCounter):
+    from lambdas.debouncer.post_message.lambda_function import MessageProcessor
+    from lambdas.debouncer.post_message.services.dynamodb_service import DynamoDBService
+    from lambdas.debouncer.post_message.services.idempotency_service import IdempotencyService
+    from lambdas.debouncer.post_message.services.step_function_service import StepFunctionService
+    from lambdas.debouncer.post_message.webhook_handler import EvolutionHandler
+
+    dynamodb_service = DynamoDBService()
+    containers = [
+        MessageProcessor(
+            dynamodb_service, StepFunctionService(), EvolutionHandler(),
+            idempotency_service=IdempotencyService(table_name='bench_webhook_dedup') if dedup else None)
+        for _ in range(CONTAINERS)
+    ]
+
+    events = deliveries(label)
+    starts.calls = api_calls.calls = 0
+    for container, event in events:
+        containers[container].process_event(event)
+
+    expected = [f'f{fragment}' for fragment in range(MESSAGES_PER_CONVERSATION)]
+    duplicated = sum(
+        1 for conversation in range(CONVERSATIONS)
+        if dynamodb_service._table.get_item(
+            Key={'instance_name': 'bench', 'cellphone_number': f'{label}-{conversation}'})['Item']['fragments'] != expected
+    )
+    print(f"{label:<10} webhooks={len(events)}  conversas com fragmento duplicado={duplicated}/{CONVERSATIONS}  "
+          f"StartExecution={starts.calls}  chamadas de API={api_calls.calls}")
+
+
+def run():
+    import logging
+
+    logging.disable(logging.INFO)
+    api_calls = ApiCallCounter(rtt_ms=0)
+    starts = StartExecutionCounter()
+    create_messages_table()
+    create_state_machine()
+    create_dedup_table()
+
+    print(f"{CONVERSATIONS} conversas x {MESSAGES_PER_CONVERSATION} mensagens, "
+          f"{REDELIVERY_RATE:.0%} reentregues, {CONTAINERS} containers")
+    run_scenario('sem-dedup', False, starts, api_calls)
+    run_scenario('com-dedup', True, starts, api_calls)
+
+
+if __name__ == '__main__':
+    from moto import mock_aws
+
+    with mock_aws():
+        run()
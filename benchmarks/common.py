@@ -0,0 +1,104 @@
+"""
+Utilitários compartilhados pelos benchmarks.
+
+Os benchmarks rodam a partir da raiz do repositório, ex.:
+    python -m benchmarks.bench_graph_cache
+"""
+import os
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+CHATBOT_DIR = os.path.join(BASE_DIR, 'lambdas', 'e_commerce_chatbot')
+
+
+def setup_environment() -> None:
+    """Deixa os imports `lambdas.*` e `shared.*` resolvíveis e define variáveis fake."""
+    for path in (BASE_DIR, CHATBOT_DIR):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+
+    os.environ.setdefault('OPENAI_API_KEY', 'sk-benchmark')
+    os.environ.setdefault('OPENAI_LLM_MODEL_NAME', 'gpt-4o-mini')
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+    os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+    os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+    os.environ.setdefault('DYNAMODB_CHECKPOINT_TABLE', 'bench_checkpoints')
+    os.environ.setdefault('DYNAMODB_WRITES_TABLE', 'bench_writes')
+    os.environ.setdefault('TARGET_LAMBDA', 'bench_target')
+
+
+def measure(fn: Callable, iterations: int) -> List[float]:
+    """Executa `fn` `iterations` vezes e retorna as durações em milissegundos."""
+    durations = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        durations.append((time.perf_counter() - start) * 1000)
+    return durations
+
+
+def summarize(durations: List[float]) -> Dict[str, float]:
+    ordered = sorted(durations)
+    p99_index = min(len(ordered) - 1, int(round(len(ordered) * 0.99)) - 1)
+    return {
+        'mean': statistics.mean(ordered),
+        'p50': statistics.median(ordered),
+        'p99': ordered[max(0, p99_index)],
+    }
+
+
+def print_summary(label: str, durations: List[float]) -> None:
+    stats = summarize(durations)
+    print(f"{label:<40} mean={stats['mean']:8.3f}ms  p50={stats['p50']:8.3f}ms  p99={stats['p99']:8.3f}ms")
+
+
+def create_checkpoint_tables(endpoint_url: str = None) -> None:
+    """Cria as tabelas de checkpoints e writes com o mesmo schema do módulo terraform `arboria/memory`."""
+    import boto3
+
+    dynamodb = boto3.client('dynamodb', endpoint_url=endpoint_url)
+    for table_name in (os.environ['DYNAMODB_CHECKPOINT_TABLE'], os.environ['DYNAMODB_WRITES_TABLE']):
+        dynamodb.create_table(
+            TableName=table_name,
+            KeySchema=[
+                {'AttributeName': 'thread_id', 'KeyType': 'HASH'},
+                {'AttributeName': 'sort_key', 'KeyType': 'RANGE'},
+            ],
+            AttributeDefinitions=[
+                {'AttributeName': 'thread_id', 'AttributeType': 'S'},
+                {'AttributeName': 'sort_key', 'AttributeType': 'S'},
+            ],
+            BillingMode='PAY_PER_REQUEST',
+        )
+
+
+def simulate_network_latency(boto_client, rtt_ms: float) -> None:
+    """Adiciona um RTT fixo a cada chamada do client (útil com o moto, que responde em memória)."""
+    if rtt_ms <= 0:
+        return
+
+    def _sleep(**kwargs):
+        time.sleep(rtt_ms / 1000)
+
+    boto_client.meta.events.register('before-call.dynamodb.*', _sleep)
+
+
+class CallCounter:
+    """Conta as chamadas feitas por um client do DynamoDB, por operação."""
+
+    def __init__(self, boto_client):
+        self.reset()
+        boto_client.meta.events.register('before-call.dynamodb.*', self._on_call)
+
+    def reset(self) -> None:
+        self.calls: Dict[str, int] = {}
+
+    @property
+    def total(self) -> int:
+        return sum(self.calls.values())
+
+    def _on_call(self, model, **kwargs):
+        self.calls[model.name] = self.calls.get(model.name, 0) + 1
@@ -0,0 +1,142 @@
+"""
+Simulador das políticas de janela do debounce (DEBOUNCE_WINDOW_POLICY).
+
+Reproduz traces de mensagens recebidas com a mesma semântica do post_message/process_message:
+cada fragmento cancela a execução pendente e inicia outra com a janela da política; mídias
+marcam `pending_media` ao chegar e só viram texto após `extraction_seconds`; quando a janela
+expira sem novo fragmento, todos os fragmentos acumulados viram uma resposta.
+
+Reporta a latência da resposta (a partir do último fragmento enviado pelo usuário) e a taxa de
+merge (turnos do usuário respondidos numa única resposta com todos os fragmentos).
+
+Formato do trace (lista de conversas; `turn` agrupa os fragmentos de uma mesma intenção):
+    [{"conversation": "c00", "events": [
+        {"t": 0.0, "turn": 1, "type": "text", "text": "oi"},
+        {"t": 2.4, "turn": 1, "type": "audio", "text": "...", "extraction_seconds": 3.5}]}]
+
+benchmarks/traces/debounce_sample.json é uma amostra sintética com esse formato; exporte os
+horários reais de chegada dos webhooks para o mesmo formato e passe com --traces.
+
+    python -m benchmarks.sim_debounce_window [--traces caminho.json]
+"""
+import argparse
+import heapq
+import itertools
+import json
+import os
+import statistics
+from typing import Dict, List
+
+from benchmarks.common import setup_environment
+
+setup_environment()
+
+from lambdas.debouncer.post_message.strategies.debounce_window_strategies import (  # noqa: E402
+    AdaptiveWindowStrategy, DebounceWindowStrategy, FixedWindowStrategy
+)
+
+DEFAULT_TRACES = os.path.join(os.path.dirname(__file__), 'traces', 'debounce_sample.json')
+
+POLICIES = {
+    'fixed-10s (atual)': FixedWindowStrategy(10),
+    'fixed-5s': FixedWindowStrategy(5),
+    'adaptive': AdaptiveWindowStrategy(),
+}
+
+
+def simulate_conversation(events: List[Dict], strategy: DebounceWindowStrategy) -> List[Dict]:
+    """Retorna as respostas disparadas: horário e fragmentos (turn, horário de chegada) incluídos."""
+    queue = []
+    sequence = itertools.count()
+    for index, event in enumerate(events):
+        heapq.heappush(queue, (event['t'], next(sequence), 'arrival', index))
+
+    item = None
+    current_execution = None
+    replies = []
+
+    while queue:
+        now, _, kind, payload = heapq.heappop(queue)
+
+        if kind == 'arrival':
+            event = events[payload]
+            if event['type'] != 'text':
+                item = item or {'fragments': [], 'pending_media': set()}
+                item['pending_media'].add(payload)
+                heapq.heappush(queue, (now + event['extraction_seconds'], next(sequence), 'append', payload))
+            else:
+                heapq.heappush(queue, (now, next(sequence), 'append', payload))
+
+        elif kind == 'append':
+            event = events[payload]
+            timestamp = int(event['t'])
+            previous_message = {}
+            if item is not None:
+                previous_message = {'pending_media': item['pending_media'] - {payload}}
+                if item['fragments']:
+                    previous_message['last_update'] = item['last_update']
+
+            item = item or {'fragments': [], 'pending_media': set()}
+            item['pending_media'].discard(payload)
+            item['fragments'].append((event['turn'], event['t']))
+            item['last_update'] = max(timestamp, item.get('last_update', timestamp))
+
+            window = strategy.compute(event['text'], timestamp, previous_message)
+            current_execution = next(sequence)
+            heapq.heappush(queue, (now + window, current_execution, 'fire', item['last_update']))
+
+        elif kind == 'fire':
+            if _ != current_execution or item is None or item.get('last_update') != payload:
+                continue
+            replies.append({'at': now, 'fragments': item['fragments']})
+            item = None
+            current_execution = None
+
+    return replies
+
+
+def evaluate(conversations: List[Dict], strategy: DebounceWindowStrategy) -> Dict[str, float]:
+    latencies = []
+    merged_turns = 0
+    total_turns = 0
+    total_replies = 0
+
+    for conversation in conversations:
+        replies = simulate_conversation(conversation['events'], strategy)
+        total_replies += len(replies)
+
+        replies_by_turn: Dict[int, int] = {}
+        for reply in replies:
+            latencies.append(reply['at'] - max(arrival for _, arrival in reply['fragments']))
+            for turn in {turn for turn, _ in reply['fragments']}:
+                replies_by_turn[turn] = replies_by_turn.get(turn, 0) + 1
+
+        turns = {event['turn'] for event in conversation['events']}
+        total_turns += len(turns)
+        merged_turns += sum(1 for turn in turns if replies_by_turn.get(turn) == 1)
+
+    ordered = sorted(latencies)
+    return {
+        'p50': statistics.median(ordered),
+        'p90': ordered[int(len(ordered) * 0.9)],
+        'merge_rate': merged_turns / total_turns,
+        'replies_per_turn': total_replies / total_turns,
+    }
+
+
+def run(traces_path: str) -> None:
+    with open(traces_path, encoding='utf-8') as traces_file:
+        conversations = json.load(traces_file)
+
+    print(f"{'política':<18} | {'latência p50':>12} | {'p90':>6} | {'merge':>6} | {'respostas/turno':>15}")
+    for label, strategy in POLICIES.items():
+        stats = evaluate(conversations, strategy)
+        print(f"{label:<18} | {stats['p50']:>11.1f}s | {stats['p90']:>5.1f}s | "
+              f"{stats['merge_rate']:>6.0%} | {stats['replies_per_turn']:>15.2f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Simula as políticas de janela do debounce.')
+    parser.add_argument('--traces', default=DEFAULT_TRACES)
+    args = parser.parse_args()
+    run(args.traces)
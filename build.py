@@ -1,27 +1,43 @@
+import hashlib
 import os
 import shutil
 import subprocess
 import tempfile
 import re
+import urllib.request
 
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__)))
 DEPLOYMENTS_DIR = os.path.join(BASE_DIR, 'terraform', 'deployments')
+# Encodings do tiktoken embutidos no ZIP do chatbot (INCLUDE = tiktoken_cache, lido via TIKTOKEN_CACHE_DIR),
+# para o Lambda não baixar o arquivo a cada container novo
+TIKTOKEN_CACHE_DIR = os.path.join(BASE_DIR, 'tiktoken_cache')
+TIKTOKEN_ENCODING_URLS = [
+    'https://openaipublic.blob.core.windows.net/encodings/o200k_base.tiktoken',
+    'https://openaipublic.blob.core.windows.net/encodings/cl100k_base.tiktoken',
+]
 
 
 def parse_folders_to_zip_config(config_file):
-    """Lê o arquivo de configuração e retorna um dicionário com diretórios e pastas."""
+    """
+    Lê o arquivo de configuração e retorna uma lista de (diretório, pasta, pacotes incluídos).
+    `INCLUDE =` lista pacotes compartilhados copiados para dentro de cada ZIP do bloco `DIR`.
+    """
     folders_to_process = []
     with open(config_file, 'r', encoding='utf-8') as f:
         current_dir = None
+        current_includes = []
         for line in f:
             line = line.strip()
             if line.startswith('DIR ='):
                 current_dir = line.split('=')[1].strip()
+                current_includes = []
+            elif line.startswith('INCLUDE =') and current_dir:
+                current_includes.extend(path.strip() for path in line.split('=')[1].strip().split(','))
             elif line.startswith('FOLDERS_TO_ZIP =') and current_dir:
                 folders = line.split('=')[1].strip().split(',')
                 folders = [folder.strip() for folder in folders]
                 for folder in folders:
-                    folders_to_process.append((current_dir, folder))
+                    folders_to_process.append((current_dir, folder, current_includes))
     return folders_to_process
 
 
@@ -58,8 +74,24 @@ def install_dependencies_to_temp(source_path, temp_dir):
         print(f"[AVISO] Nenhum arquivo de requisitos encontrado em {source_path}.")
 
 
-def adjust_imports(folder_path, base_module):
-    """Ajusta importações removendo o prefixo do módulo base, apenas em arquivos que precisam."""
+def download_tiktoken_encodings(cache_dir=TIKTOKEN_CACHE_DIR):
+    """Baixa os encodings com o nome de arquivo que o tiktoken procura no cache (sha1 da URL)."""
+    os.makedirs(cache_dir, exist_ok=True)
+    for url in TIKTOKEN_ENCODING_URLS:
+        cache_path = os.path.join(cache_dir, hashlib.sha1(url.encode()).hexdigest())
+        if os.path.exists(cache_path):
+            continue
+        print(f"Baixando encoding do tiktoken: {url}")
+        with urllib.request.urlopen(url, timeout=60) as response, open(cache_path + '.tmp', 'wb') as f:
+            shutil.copyfileobj(response, f)
+        os.replace(cache_path + '.tmp', cache_path)
+
+
+def adjust_imports(folder_path, base_module, replacement=''):
+    """
+    Ajusta importações removendo o prefixo do módulo base (ou trocando por `replacement`),
+    apenas em arquivos que precisam.
+    """
     print(f"Ajustando importações na pasta: {folder_path}")
     for root, _, files in os.walk(folder_path):
         for file in files:
@@ -73,7 +105,7 @@ def adjust_imports(folder_path, base_module):
                     if base_module in content:
                         updated_content = re.sub(
                             rf'\b{re.escape(base_module)}\.',
-                            '',
+                            f'{replacement}.' if replacement else '',
                             content
                         )
                         # Sobrescreve o arquivo apenas se houve alteração
@@ -85,8 +117,8 @@ def adjust_imports(folder_path, base_module):
                     print(f"[ERRO] Falha ao processar {file_path}: {e}")
 
 
-def create_zip(base_dir, folder_name):
-    """Cria o arquivo ZIP da Lambda."""
+def create_zip(base_dir, folder_name, includes=()):
+    """Cria o arquivo ZIP da Lambda, com os pacotes compartilhados de `includes` na raiz."""
     source_path = os.path.join(BASE_DIR, base_dir, folder_name)
     zip_path = os.path.join(DEPLOYMENTS_DIR, f"{folder_name}.zip")
 
@@ -106,6 +138,13 @@ def create_zip(base_dir, folder_name):
         base_module = f"{base_dir}.{folder_name}".replace('/', '.')
         adjust_imports(temp_source, base_module)
 
+        # Copia os pacotes compartilhados para a raiz do ZIP (ex.: lambdas.debouncer.common -> common)
+        for include in includes:
+            package_name = os.path.basename(include)
+            shutil.copytree(os.path.join(BASE_DIR, include), os.path.join(temp_source, package_name),
+                            ignore=shutil.ignore_patterns('__pycache__'))
+            adjust_imports(temp_source, include.replace('/', '.'), package_name)
+
         # Cria o ZIP a partir do diretório temporário
         shutil.make_archive(base_name=zip_path.replace('.zip', ''), format='zip', root_dir=temp_source)
         print(f"[SUCESSO] Arquivo ZIP criado: {zip_path}")
@@ -119,6 +158,11 @@ if not os.path.exists(DEPLOYMENTS_DIR):
 config_file_path = os.path.join(BASE_DIR, 'folders_to_zip')
 folders_to_process = parse_folders_to_zip_config(config_file_path)
 
+# O cache do tiktoken é baixado antes de ser copiado por algum INCLUDE
+if any(os.path.join(BASE_DIR, include) == TIKTOKEN_CACHE_DIR
+       for _, _, includes in folders_to_process for include in includes):
+    download_tiktoken_encodings()
+
 # Processa cada pasta conforme a configuração
-for base_dir, folder in folders_to_process:
-    create_zip(base_dir, folder)
+for base_dir, folder, includes in folders_to_process:
+    create_zip(base_dir, folder, includes)
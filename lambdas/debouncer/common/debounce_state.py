@@ -0,0 +1,124 @@
+"""
+Debounce item lifecycle shared by post_message, process_message and the chatbot (when the state
+machine invokes it directly). build.py copies this package into the Lambda zips (INCLUDE in folders_to_zip).
+"""
+import os
+import time
+
+# A Step Functions execution is waiting (pending) or process_message has claimed the
+# conversation and is invoking the chatbot (dispatched)
+EXECUTION_PENDING = 'pending'
+EXECUTION_DISPATCHED = 'dispatched'
+# No media extraction in progress (or the one in progress is past its deadline)
+MEDIA_SETTLED_CONDITION = '(attribute_not_exists(pending_media) OR pending_media_deadline < :now)'
+# After this many seconds a dispatched conversation is considered stuck and post_message takes it over
+DISPATCH_TIMEOUT_SECONDS = int(os.getenv('DISPATCH_TIMEOUT_SECONDS', '60'))
+
+
+class MediaPendingError(Exception):
+    """
+    The conversation still has media being transcribed/described. Raised so the state machine
+    retries the task (Retry on MediaPendingError) instead of dispatching without the media.
+    """
+
+
+def dispatch_deadline():
+    return int(time.time()) + DISPATCH_TIMEOUT_SECONDS
+
+
+def message_text(item):
+    """Joins the claimed fragments (items written before fragments existed keep their text in `text`)."""
+    fragments = [item.get('text', '')] + item.get('fragments', [])
+    return ' '.join(fragment for fragment in fragments if fragment).strip()
+
+
+class DynamoDBMessageStore:
+    """
+    Claims and releases debounce items with conditional writes, so a conversation is dispatched
+    by a single execution and fragments that arrive while the chatbot answers are kept for the next turn.
+    """
+
+    def __init__(self, message_table):
+        self._table = message_table
+
+    def claim_message(self, instance_name, cellphone_number, last_update, dispatch_deadline):
+        """
+        Marks the conversation as dispatched if `last_update` is still the latest, taking its fragments.
+        Returns the claimed item, or None if a newer message arrived. Raises MediaPendingError
+        while media of the conversation are still being extracted.
+        """
+        try:
+            return self._table.update_item(
+                Key={'instance_name': instance_name, 'cellphone_number': cellphone_number},
+                UpdateExpression='SET execution_status = :dispatched, dispatch_deadline = :deadline '
+                                 'REMOVE fragments, #txt',
+                ConditionExpression='last_update = :lu AND '
+                                    '(attribute_not_exists(execution_status) OR execution_status = :pending) AND '
+                                    f'{MEDIA_SETTLED_CONDITION}',
+                ExpressionAttributeNames={'#txt': 'text'},
+                ExpressionAttributeValues={
+                    ':dispatched': EXECUTION_DISPATCHED,
+                    ':pending': EXECUTION_PENDING,
+                    ':deadline': dispatch_deadline,
+                    ':lu': last_update,
+                    ':now': int(time.time())
+                },
+                ReturnValues='ALL_OLD',
+                ReturnValuesOnConditionCheckFailure='ALL_OLD'
+            )['Attributes']
+        except self._table.meta.client.exceptions.ConditionalCheckFailedException as e:
+            stored_item = e.response.get('Item', {})
+            if ('pending_media' in stored_item and 'last_update' in stored_item
+                    and int(stored_item['last_update']['N']) == last_update
+                    and stored_item.get('execution_status', {}).get('S', EXECUTION_PENDING) == EXECUTION_PENDING):
+                raise MediaPendingError(f'Media still being extracted for {cellphone_number}')
+            return None
+
+    def release_message(self, instance_name, cellphone_number, last_update, dispatch_deadline):
+        """
+        Deletes the dispatched conversation, unless fragments were queued while it was dispatched:
+        those are claimed for the next turn and returned. Returns None when there is nothing left
+        to send (or post_message already took over a stuck dispatch).
+        """
+        key = {'instance_name': instance_name, 'cellphone_number': cellphone_number}
+        try:
+            self._table.delete_item(
+                Key=key,
+                ConditionExpression='last_update = :lu AND execution_status = :dispatched',
+                ExpressionAttributeValues={':lu': last_update, ':dispatched': EXECUTION_DISPATCHED}
+            )
+            return None
+        except self._table.meta.client.exceptions.ConditionalCheckFailedException:
+            pass
+
+        try:
+            return self._table.update_item(
+                Key=key,
+                UpdateExpression='SET dispatch_deadline = :deadline REMOVE fragments',
+                ConditionExpression=f'execution_status = :dispatched AND last_update > :lu AND {MEDIA_SETTLED_CONDITION}',
+                ExpressionAttributeValues={
+                    ':dispatched': EXECUTION_DISPATCHED,
+                    ':deadline': dispatch_deadline,
+                    ':lu': last_update,
+                    ':now': int(time.time())
+                },
+                ReturnValues='ALL_OLD'
+            )['Attributes']
+        except self._table.meta.client.exceptions.ConditionalCheckFailedException:
+            pass
+
+        # Queued fragments wait for a media extraction: the media fragment starts the next execution
+        try:
+            self._table.update_item(
+                Key=key,
+                UpdateExpression='SET execution_status = :pending REMOVE execution_arn',
+                ConditionExpression='execution_status = :dispatched AND last_update > :lu',
+                ExpressionAttributeValues={
+                    ':dispatched': EXECUTION_DISPATCHED,
+                    ':pending': EXECUTION_PENDING,
+                    ':lu': last_update
+                }
+            )
+        except self._table.meta.client.exceptions.ConditionalCheckFailedException:
+            pass
+        return None
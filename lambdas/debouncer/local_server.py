@@ -0,0 +1,83 @@
+"""
+Modo de execução local do debouncer: post_message, janela de debounce e process_message num
+único processo, sem DynamoDB nem Step Functions.
+
+    python -m lambdas.debouncer.local_server --port 8080
+
+O webhook da Evolution aponta para http://<host>:8080/ e cada conversa consolidada é enviada
+ao chatbot com o mesmo `invoke_lambda` do process_message (PROCESSING_LAMBDA_FUNCTION), ou
+apenas registrada no log com --log-only.
+"""
+import argparse
+import json
+import os
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional, Tuple
+
+from lambdas.debouncer.post_message.configs.logging_config import logger
+from lambdas.debouncer.post_message.lambda_function import MessageProcessor
+from lambdas.debouncer.post_message.services.idempotency_service import IdempotencyService
+from lambdas.debouncer.post_message.services.local_debouncer_service import LocalDebouncerService
+from lambdas.debouncer.post_message.services.memory_message_store import InMemoryMessageStore
+from lambdas.debouncer.post_message.strategies.debounce_window_strategies import DebounceWindowStrategy
+from lambdas.debouncer.process_message.lambda_function import MediaPendingError, invoke_lambda, process_event
+
+
+def log_dispatch(instance_name, cellphone_number, message, last_update):
+    logger.info(f"[{instance_name}] {cellphone_number}: {message}")
+
+
+def build_local_pipeline(
+        dispatch: Callable = invoke_lambda,
+        evolution_handler=None,
+        window_strategy: Optional[DebounceWindowStrategy] = None
+) -> Tuple[MessageProcessor, LocalDebouncerService, InMemoryMessageStore]:
+    """Monta o MessageProcessor com o store em memória e o debouncer local."""
+    if evolution_handler is None:
+        from lambdas.debouncer.post_message.webhook_handler import EvolutionHandler
+        evolution_handler = EvolutionHandler()
+
+    message_store = InMemoryMessageStore()
+    debouncer = LocalDebouncerService(
+        on_expire=lambda execution_input: process_event(execution_input, message_store, dispatch),
+        window_strategy=window_strategy,
+        retry_on=(MediaPendingError,),
+    )
+    processor = MessageProcessor(
+        message_store, debouncer, evolution_handler, idempotency_service=IdempotencyService())
+    return processor, debouncer, message_store
+
+
+def run_server(port: int, dispatch: Callable) -> None:
+    processor, debouncer, _ = build_local_pipeline(dispatch=dispatch)
+
+    class WebhookHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0))).decode('utf-8')
+            try:
+                response = processor.process_event({'body': body})
+            except Exception as e:
+                logger.error(f"Error processing message: {str(e)}")
+                response = {'statusCode': 500, 'body': json.dumps("Internal server error")}
+
+            self.send_response(response['statusCode'])
+            self.send_header('Content-Type', 'application/json')
+            self.end_headers()
+            self.wfile.write(response['body'].encode('utf-8'))
+
+    server = ThreadingHTTPServer(('0.0.0.0', port), WebhookHandler)
+    logger.info(f"Local debouncer listening on port {port}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        debouncer.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Debouncer local (sem Step Functions).')
+    parser.add_argument('--port', type=int, default=int(os.getenv('LOCAL_DEBOUNCER_PORT', '8080')))
+    parser.add_argument('--log-only', action='store_true', help='Só registra as conversas em vez de invocar o chatbot')
+    args = parser.parse_args()
+
+    run_server(args.port, log_dispatch if args.log_only else invoke_lambda)
@@ -1,80 +1,314 @@
 import json
+import os
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 from lambdas.debouncer.post_message.configs.logging_config import logger
 from lambdas.debouncer.post_message.services.dynamodb_service import DynamoDBService
+from lambdas.debouncer.post_message.services.idempotency_service import IdempotencyService
+from lambdas.debouncer.post_message.services.media_extraction_service import LambdaMediaExtractionService
 from lambdas.debouncer.post_message.services.step_function_service import StepFunctionService
 from lambdas.debouncer.post_message.webhook_handler import EvolutionHandler
 
+# Reaproveitado entre invocações do mesmo container (clients boto3 e OpenAI incluídos)
+_processor = None
+
 
 class MessageProcessor:
-    def __init__(self, dynamodb_service, step_function_service, evolution_handler):
+    # Transcrições e descrições de imagem do mesmo lote rodam em paralelo
+    EXTRACTION_WORKERS = int(os.getenv('MEDIA_EXTRACTION_WORKERS', '8'))
+
+    def __init__(self, dynamodb_service, step_function_service, evolution_handler, media_extraction_service=None,
+                 idempotency_service=None):
         self.dynamodb_service = dynamodb_service
         self.step_function_service = step_function_service
         self.evolution_handler = evolution_handler
+        # Sem o service as mídias são extraídas na própria invocação
+        self.media_extraction_service = media_extraction_service
+        # Sem o service os reenvios da Evolution não são descartados
+        self.idempotency_service = idempotency_service
+        self._extraction_executor = ThreadPoolExecutor(max_workers=self.EXTRACTION_WORKERS)
 
     def process_event(self, event):
-        """Processa o evento recebido."""
+        """
+        Processa o evento recebido. O body pode ser um webhook da Evolution ou um array de
+        webhooks; as mensagens da mesma conversa viram uma única atualização do debounce.
+        """
         logger.info("Received event: %s", json.dumps(event))
-        message = json.loads(event["body"])
-        timestamp = int(time.time())
+        messages = self.parse_body(event["body"])
 
-        # Processa a mensagem com o EvolutionHandler
-        result = self.evolution_handler.process(message)
-        if not result:
+        conversations, handed_off, duplicates = self.group_messages(messages)
+        if not conversations and handed_off:
+            return {
+                "statusCode": 200,
+                "body": json.dumps("Message received and media extraction started"),
+            }
+        if not conversations and duplicates:
+            return {
+                "statusCode": 200,
+                "body": json.dumps("Duplicate message ignored"),
+            }
+        if not conversations:
             logger.warning("Thread ID not found in checkpoint table, skipping processing.")
             return {
                 "statusCode": 404,
                 "body": json.dumps("Thread ID not found in checkpoint table"),
             }
 
-        cellphone_number, text, instance_name = result
-        logger.info("Received message from %s in app %s: %s", cellphone_number, instance_name, text)
-
-        updated_message = self._handle_message(instance_name, cellphone_number, text, timestamp)
-        execution_arn = self._start_execution_arn(instance_name, cellphone_number, updated_message)
+        queued = 0
+        items = list(conversations.items())
+        for position, ((instance_name, cellphone_number), conversation) in enumerate(items):
+            try:
+                queued += self.debounce_conversation(instance_name, cellphone_number, conversation)
+            except Exception:
+                # A Evolution reenvia o webhook que falhou; ele não pode ser descartado como duplicado
+                for _, pending_conversation in items[position:]:
+                    self._release_messages(pending_conversation)
+                raise
 
+        if queued == len(conversations):
+            return {
+                "statusCode": 200,
+                "body": json.dumps("Message queued for the next turn"),
+            }
         return {
             "statusCode": 200,
             "body": json.dumps("Message received and Step Functions execution started"),
         }
 
-    def _handle_message(self, instance_name, cellphone_number, text, timestamp):
-        """Verifica e atualiza mensagens no DynamoDB."""
-        response = self.dynamodb_service.get_existing_message(instance_name, cellphone_number)
+    def process_records(self, records):
+        """
+        Processa um lote do SQS (um webhook, ou array de webhooks, por record). Conversas que
+        falham devolvem seus records em batchItemFailures para o SQS reenviar só eles.
+        """
+        logger.info("Received %d SQS records", len(records))
+        failed_records = set()
+        messages = []
+        for record in records:
+            try:
+                messages.extend((record["messageId"], message) for message in self.parse_body(record["body"]))
+            except Exception as e:
+                logger.error(f"Invalid SQS record {record.get('messageId')}: {str(e)}")
+                failed_records.add(record["messageId"])
 
-        if "Item" in response:
-            existing_message = response["Item"]
-            logger.info("Existing message found: %s", existing_message)
-            self.step_function_service.cancel_existing_execution(existing_message)
-            return self.dynamodb_service.update_existing_message(
-                instance_name, cellphone_number, existing_message, text, timestamp
-            )
-        else:
-            return self.dynamodb_service.create_new_message(
-                instance_name, cellphone_number, text, timestamp
+        conversations, _, _ = self.group_messages(messages)
+        for (instance_name, cellphone_number), conversation in conversations.items():
+            try:
+                self.debounce_conversation(instance_name, cellphone_number, conversation)
+            except Exception as e:
+                logger.error(f"Error processing messages from {cellphone_number} in app {instance_name}: {str(e)}")
+                failed_records.update(conversation["record_ids"])
+                self._release_messages(conversation)
+
+        return {"batchItemFailures": [{"itemIdentifier": record_id} for record_id in sorted(failed_records)]}
+
+    def process_media_extraction(self, messages):
+        """Etapa assíncrona: extrai o texto das mídias repassadas pelo webhook e acrescenta no debounce."""
+        # Os ids já foram reservados pelo webhook que repassou a mídia
+        conversations, _, _ = self.group_messages(messages, hand_off_media=False, deduplicate=False)
+        for (instance_name, cellphone_number), conversation in conversations.items():
+            self.debounce_conversation(instance_name, cellphone_number, conversation)
+        return {"statusCode": 200, "body": json.dumps("Media extracted")}
+
+    @staticmethod
+    def parse_body(body):
+        """Webhooks da Evolution contidos no body: objeto único, array, ou `data` com várias mensagens."""
+        payload = json.loads(body) if isinstance(body, str) else body
+        webhooks = payload if isinstance(payload, list) else [payload]
+
+        messages = []
+        for webhook in webhooks:
+            if isinstance(webhook.get("data"), list):
+                messages.extend({**webhook, "data": data} for data in webhook["data"])
+            else:
+                messages.append(webhook)
+        return messages
+
+    def group_messages(self, messages, hand_off_media=True, deduplicate=True):
+        """
+        Agrupa as mensagens por conversa (instance#phone), na ordem de chegada. Aceita webhooks
+        ou pares (record_id, webhook). Reenvios da mesma mensagem são descartados antes de tudo.
+        As mídias são marcadas como pendentes antes de qualquer extração, para o debounce
+        aguardar; com o media_extraction_service elas seguem para a etapa assíncrona, senão são
+        extraídas aqui em paralelo.
+
+        Retorna as conversas, quantas mídias foram repassadas para a etapa assíncrona e quantos
+        reenvios foram descartados.
+        """
+        messages = [message if isinstance(message, tuple) else (None, message) for message in messages]
+        message_ids = [self.evolution_handler.get_message_id(message) for _, message in messages]
+
+        duplicates = 0
+        if deduplicate and self.idempotency_service:
+            first_deliveries = [self._is_first_delivery(message_id) for message_id in message_ids]
+            messages = [message for message, first in zip(messages, first_deliveries) if first]
+            message_ids = [message_id for message_id, first in zip(message_ids, first_deliveries) if first]
+            duplicates = first_deliveries.count(False)
+
+        try:
+            conversations, handed_off = self._group_messages(messages, message_ids, hand_off_media)
+            return conversations, handed_off, duplicates
+        except Exception:
+            if deduplicate and self.idempotency_service:
+                self.idempotency_service.release(message_id for message_id in message_ids if message_id)
+            raise
+
+    def _group_messages(self, messages, message_ids, hand_off_media):
+        media_ids = {}
+        for index, (_, message) in enumerate(messages):
+            # Mídias levam segundos para virar texto; marca a pendência para o debounce aguardar
+            media_message = self.evolution_handler.get_media_message(message)
+            if media_message:
+                media_cellphone_number, media_instance_name, media_id = media_message
+                self.dynamodb_service.mark_media_pending(media_instance_name, media_cellphone_number, media_id)
+                media_ids[index] = media_id
+
+        handed_off = 0
+        if hand_off_media and self.media_extraction_service:
+            messages = [
+                (record_id, None if index in media_ids and self._hand_off_media(message) else message)
+                for index, (record_id, message) in enumerate(messages)
+            ]
+            handed_off = sum(1 for _, message in messages if message is None)
+
+        # Processa as mensagens com o EvolutionHandler
+        results = self._extraction_executor.map(
+            lambda message: self.evolution_handler.process(message[1]) if message[1] is not None else None, messages
+        )
+
+        results = list(results)
+        if media_ids:
+            logger.info("Extraction cache: %s", self.evolution_handler.extraction_cache.stats())
+
+        conversations = OrderedDict()
+        for index, ((record_id, _), result) in enumerate(zip(messages, results)):
+            if not result:
+                continue
+
+            cellphone_number, text, instance_name = result
+            logger.info("Received message from %s in app %s: %s", cellphone_number, instance_name, text)
+
+            conversation = conversations.setdefault(
+                (instance_name, cellphone_number),
+                {"texts": [], "media_ids": set(), "record_ids": set(), "message_ids": set()}
             )
+            conversation["texts"].append(text)
+            if message_ids[index]:
+                conversation["message_ids"].add(message_ids[index])
+            if index in media_ids:
+                conversation["media_ids"].add(media_ids[index])
+            if record_id is not None:
+                conversation["record_ids"].add(record_id)
+
+        return conversations, handed_off
+
+    def _is_first_delivery(self, message_id):
+        if message_id is None or self.idempotency_service.claim(message_id):
+            return True
+        logger.info("Duplicate webhook for message %s, skipping", message_id)
+        return False
+
+    def _release_messages(self, conversation):
+        if self.idempotency_service:
+            self.idempotency_service.release(conversation["message_ids"])
+
+    def _hand_off_media(self, message):
+        """Repassa a mídia para a etapa assíncrona; se não der (ex.: payload grande demais), extrai aqui."""
+        try:
+            self.media_extraction_service.submit(message)
+            return True
+        except Exception:
+            return False
+
+    def debounce_conversation(self, instance_name, cellphone_number, conversation):
+        """
+        Uma atualização do debounce por conversa com todos os fragmentos do lote. Retorna True
+        se a conversa já estava despachada e os fragmentos ficaram para o próximo turno.
+        """
+        text = " ".join(text for text in conversation["texts"] if text)
+        updated_message, previous_message, execution_name = self._handle_message(
+            instance_name, cellphone_number, text, int(time.time()), conversation["media_ids"],
+            conversation["message_ids"]
+        )
+        if updated_message["execution_status"] == DynamoDBService.EXECUTION_DISPATCHED:
+            # O chatbot já está respondendo esta conversa; o process_message envia o fragmento no próximo turno
+            logger.info("Conversation %s already dispatched, message queued for the next turn", cellphone_number)
+            return True
+
+        self._start_execution_arn(
+            instance_name, cellphone_number, updated_message, execution_name, previous_message
+        )
+        return False
+
+    def _handle_message(self, instance_name, cellphone_number, text, timestamp, media_ids=None, message_ids=None):
+        """
+        Acrescenta a mensagem no DynamoDB com um único UpdateItem, que já grava o ARN da nova
+        execução e devolve o item anterior para cancelar a execução pendente. Só há o que cancelar
+        quando a execução anterior ainda está esperando a janela (`pending`). Os `message_ids` ficam
+        no item: se o start da execução falhar, o reenvio da Evolution não duplica o fragmento.
+        """
+        execution_name = self.step_function_service.build_execution_name(instance_name, cellphone_number)
+        execution_arn = self.step_function_service.get_execution_arn(execution_name)
+
+        updated_message, previous_message = self.dynamodb_service.append_message(
+            instance_name, cellphone_number, text, timestamp, execution_arn=execution_arn, media_ids=media_ids,
+            message_ids=message_ids
+        )
+
+        if previous_message:
+            logger.info("Existing message found: %s", previous_message)
+            if self._has_pending_execution(updated_message, previous_message):
+                self.step_function_service.cancel_existing_execution(previous_message)
+
+        return updated_message, previous_message, execution_name
 
-    def _start_execution_arn(self, instance_name, cellphone_number, updated_message):
-        """Inicia a execução do Step Functions e atualiza o ARN no DynamoDB."""
-        execution_arn = self.step_function_service.start_step_function_execution(
+    @staticmethod
+    def _has_pending_execution(updated_message, previous_message):
+        """Itens gravados antes do ciclo de vida não têm execution_status e seguem sendo cancelados."""
+        return (
+            updated_message["execution_status"] == DynamoDBService.EXECUTION_PENDING
+            and "execution_arn" in previous_message
+            and previous_message.get("execution_status", DynamoDBService.EXECUTION_PENDING)
+            == DynamoDBService.EXECUTION_PENDING
+        )
+
+    def _start_execution_arn(self, instance_name, cellphone_number, updated_message, execution_name,
+                             previous_message=None):
+        """Inicia a execução do Step Functions com o nome cujo ARN já foi gravado no DynamoDB."""
+        return self.step_function_service.start_step_function_execution(
             instance_name,
             cellphone_number,
             updated_message["text"],
             updated_message["last_update"],
+            execution_name=execution_name,
+            previous_message=previous_message,
+        )
+
+
+def get_processor():
+    global _processor
+    if _processor is None:
+        media_extraction_service = (
+            LambdaMediaExtractionService() if os.getenv('MEDIA_EXTRACTION_MODE', 'inline') == 'async' else None
+        )
+        _processor = MessageProcessor(
+            DynamoDBService(), StepFunctionService(), EvolutionHandler(), media_extraction_service,
+            IdempotencyService()
         )
-        self.dynamodb_service.update_execution_arn(instance_name, cellphone_number, execution_arn)
-        return execution_arn
+    return _processor
 
 
 def lambda_handler(event, context):
-    try:
-        dynamodb_service = DynamoDBService()
-        step_function_service = StepFunctionService()
-        evolution_handler = EvolutionHandler()
+    if LambdaMediaExtractionService.EVENT_KEY in event:
+        return get_processor().process_media_extraction(event[LambdaMediaExtractionService.EVENT_KEY])
+
+    # Lotes do SQS: falhas parciais voltam em batchItemFailures (ReportBatchItemFailures)
+    if "Records" in event:
+        return get_processor().process_records(event["Records"])
 
-        processor = MessageProcessor(dynamodb_service, step_function_service, evolution_handler)
-        return processor.process_event(event)
+    try:
+        return get_processor().process_event(event)
     except Exception as e:
         logger.error(f"Error processing message: {str(e)}")
         return {
@@ -0,0 +1,104 @@
+"""
+Decodificação das mídias recebidas em base64 sem cópias inteiras em memória.
+
+O base64 é decodificado em blocos para um SpooledTemporaryFile (que passa para o /tmp acima de
+SPOOL_MAX_BYTES), calculando o SHA-256 no caminho. Os limites de tamanho são checados pelo
+tamanho do texto em base64, antes de decodificar qualquer coisa.
+"""
+import base64
+import hashlib
+import io
+import os
+import tempfile
+from typing import Optional, Tuple
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow é opcional; sem ele a imagem segue no tamanho original
+    Image = None
+
+DECODE_CHUNK_CHARS = 64 * 1024  # múltiplo de 4
+SPOOL_MAX_BYTES = int(os.getenv('MEDIA_SPOOL_MAX_BYTES', str(1024 * 1024)))
+
+# Resolução útil do modelo de visão: maior lado até 2048px e menor lado até 768px
+VISION_MAX_SIDE = int(os.getenv('VISION_MAX_SIDE', '2048'))
+VISION_MAX_SHORT_SIDE = int(os.getenv('VISION_MAX_SHORT_SIDE', '768'))
+VISION_JPEG_QUALITY = 85
+
+
+def decoded_size(base_64: str) -> int:
+    """Tamanho em bytes da mídia, calculado pelo base64 (sem decodificar)."""
+    padding = base_64[-2:].count('=')
+    return len(base_64) * 3 // 4 - padding
+
+
+class MediaPayload:
+    """Mídia decodificada num arquivo temporário, com o SHA-256 do conteúdo."""
+
+    def __init__(self, file, sha256: str, size: int, base_64: str):
+        self.file = file
+        self.sha256 = sha256
+        self.size = size
+        # Texto original, para quando ele puder ser reaproveitado sem reencode
+        self.base_64 = base_64
+
+    @classmethod
+    def decode(cls, base_64: str) -> 'MediaPayload':
+        file = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+        digest = hashlib.sha256()
+        size = 0
+        pending = ''
+        for start in range(0, len(base_64), DECODE_CHUNK_CHARS):
+            # Quebras de linha desalinhariam os blocos de 4 caracteres
+            chunk = pending + base_64[start:start + DECODE_CHUNK_CHARS].replace('\n', '').replace('\r', '')
+            aligned = len(chunk) - len(chunk) % 4
+            pending = chunk[aligned:]
+            data = base64.b64decode(chunk[:aligned])
+            digest.update(data)
+            file.write(data)
+            size += len(data)
+        if pending:
+            raise ValueError('Invalid base64 payload: truncated input')
+
+        file.seek(0)
+        return cls(file, digest.hexdigest(), size, base_64)
+
+    def __enter__(self) -> 'MediaPayload':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.file.close()
+
+    def vision_base64(self) -> Tuple[str, str]:
+        """
+        Imagem reduzida para a resolução útil do modelo de visão e reencodada em JPEG.
+        Retorna (mime type, base64); sem Pillow, ou se a imagem já é pequena, usa a original.
+        """
+        if Image is None:
+            return 'image/jpeg', self.base_64
+
+        self.file.seek(0)
+        with Image.open(self.file) as image:
+            width, height = image.size
+            scale = vision_scale(width, height)
+            if scale >= 1:
+                return 'image/jpeg', self.base_64
+
+            target = (max(1, int(width * scale)), max(1, int(height * scale)))
+            # Em JPEG, o draft já decodifica numa escala reduzida (menos memória que a imagem cheia)
+            image.draft('RGB', target)
+            resized = image.convert('RGB').resize(target, Image.LANCZOS) if image.size != target else image.convert('RGB')
+
+            output = io.BytesIO()
+            resized.save(output, format='JPEG', quality=VISION_JPEG_QUALITY, optimize=True)
+        return 'image/jpeg', base64.b64encode(output.getvalue()).decode('ascii')
+
+
+def vision_scale(width: int, height: int) -> float:
+    return min(1.0, VISION_MAX_SIDE / max(width, height), VISION_MAX_SHORT_SIDE / min(width, height))
+
+
+def audio_duration_seconds(content: dict) -> Optional[int]:
+    """Duração informada pela Evolution no audioMessage, quando presente."""
+    seconds = content.get('audioMessage', {}).get('seconds')
+    return int(seconds) if seconds is not None else None
@@ -1,12 +1,21 @@
 import boto3
 import os
+import time
 from decimal import Decimal
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterable, Optional, Tuple
 
+from lambdas.debouncer.common.debounce_state import EXECUTION_DISPATCHED, EXECUTION_PENDING
 from lambdas.debouncer.post_message.configs.logging_config import logger
 
 
 class DynamoDBService:
+    # Lifecycle of the debounce item: a Step Functions execution is waiting (pending) or
+    # process_message has claimed the conversation and is invoking the chatbot (dispatched)
+    EXECUTION_PENDING = EXECUTION_PENDING
+    EXECUTION_DISPATCHED = EXECUTION_DISPATCHED
+    # Longest a media extraction is waited for (covers the post_message Lambda timeout)
+    MEDIA_PENDING_TIMEOUT_SECONDS = int(os.getenv('MEDIA_PENDING_TIMEOUT_SECONDS', '30'))
+
     def __init__(self, table_name: Optional[str] = None):
         """
         Initialize DynamoDB service with a specific table.
@@ -24,87 +33,127 @@ class DynamoDBService:
             return float(obj)
         raise TypeError(f'Type {obj.__class__.__name__} not serializable')
 
-    def get_existing_message(self, instance_name: str, cellphone_number: str) -> Dict[str, Any]:
-        """
-        Retrieve an existing message from DynamoDB.
-        """
-        try:
-            return self._table.get_item(
-                Key={'instance_name': instance_name, 'cellphone_number': cellphone_number}
-            )
-        except Exception as e:
-            logger.error(
-                f"Failed to retrieve message for instance_name {instance_name} and phone {cellphone_number}: {str(e)}")
-            raise
-
-    def update_existing_message(
+    def append_message(
             self,
             instance_name: str,
             cellphone_number: str,
-            existing_message: Dict[str, Any],
-            new_text: str,
-            timestamp: int
-    ) -> Dict[str, Any]:
+            text: str,
+            timestamp: int,
+            execution_arn: Optional[str] = None,
+            media_ids: Optional[Iterable[str]] = None,
+            message_ids: Optional[Iterable[str]] = None
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
         """
-        Update the existing message in DynamoDB.
+        Append a message fragment, bump last_update and store the new execution ARN in a single
+        conditional UpdateItem. Fragments are appended server-side with list_append, so fragments
+        arriving together are never lost to a stale read. `media_ids` clears the marks left by
+        `mark_media_pending` for the media in this fragment.
+
+        `message_ids` (the WhatsApp ids of the fragment) are recorded on the item. A redelivery of a
+        fragment that was appended but whose execution failed to start finds its ids there: the
+        fragment is not appended again, only the execution ARN and status are updated.
+
+        While process_message is dispatching the conversation (`execution_status` is `dispatched`
+        and `dispatch_deadline` has not passed) the fragment is queued for the next turn instead:
+        the item keeps its status and no execution ARN is stored. A dispatch past its deadline is
+        taken over as a new pending execution.
+
+        Returns the updated message ({'text', 'last_update', 'execution_status'}) and the previous
+        item (empty if none).
         """
-        logger.info(f"Updating existing message for {cellphone_number} in app {instance_name}")
-        existing_text = existing_message.get('text', '')
-        concatenated_text = f"{existing_text} {new_text}".strip()
+        now = int(time.time())
+        media_ids = set(media_ids or ())
+        message_ids = sorted(set(message_ids or ()))
+        queue = False
+        duplicate = False
 
-        try:
-            return self._table.update_item(
-                Key={'instance_name': instance_name, 'cellphone_number': cellphone_number},
-                UpdateExpression="SET #txt = :t, last_update = :lu",
-                ExpressionAttributeNames={'#txt': 'text'},
-                ExpressionAttributeValues={
-                    ':t': concatenated_text,
-                    ':lu': timestamp
-                },
-                ReturnValues="ALL_NEW"
-            )['Attributes']
-        except Exception as e:
-            logger.error(
-                f"Failed to update message for instance_name {instance_name} and phone {cellphone_number}: {str(e)}")
-            raise
+        while True:
+            update_expression = "SET last_update = :lu"
+            expression_values = {':lu': timestamp, ':dispatched': self.EXECUTION_DISPATCHED, ':now': now}
+            if not duplicate:
+                update_expression += ", fragments = list_append(if_not_exists(fragments, :empty), :fragment)"
+                expression_values.update({':empty': [], ':fragment': [text]})
+            if queue:
+                condition_expression = "execution_status = :dispatched AND dispatch_deadline >= :now"
+            else:
+                update_expression += ", execution_status = :pending"
+                expression_values[':pending'] = self.EXECUTION_PENDING
+                if execution_arn:
+                    update_expression += ", execution_arn = :arn"
+                    expression_values[':arn'] = execution_arn
+                condition_expression = (
+                    "(attribute_not_exists(execution_status) OR execution_status <> :dispatched"
+                    " OR dispatch_deadline < :now)"
+                )
+            if media_ids:
+                update_expression += " DELETE pending_media :media_ids"
+                expression_values[':media_ids'] = media_ids
+            if message_ids and not duplicate:
+                update_expression += " ADD message_ids :message_ids"
+                expression_values[':message_ids'] = set(message_ids)
+                for index, message_id in enumerate(message_ids):
+                    condition_expression += f" AND NOT contains(message_ids, :message_id{index})"
+                    expression_values[f':message_id{index}'] = message_id
+            # last_update never moves backwards, even if Lambda clocks disagree
+            condition_expression += " AND (attribute_not_exists(last_update) OR last_update <= :lu)"
 
-    def create_new_message(
-            self,
-            instance_name: str,
-            cellphone_number: str,
-            text: str,
-            timestamp: int
-    ) -> Dict[str, Any]:
+            try:
+                response = self._table.update_item(
+                    Key={'instance_name': instance_name, 'cellphone_number': cellphone_number},
+                    UpdateExpression=update_expression,
+                    ConditionExpression=condition_expression,
+                    ExpressionAttributeValues=expression_values,
+                    ReturnValues="ALL_OLD",
+                    ReturnValuesOnConditionCheckFailure="ALL_OLD"
+                )
+                break
+            except self._table.meta.client.exceptions.ConditionalCheckFailedException as e:
+                stored_item = e.response.get('Item', {})
+                if 'last_update' in stored_item and int(stored_item['last_update']['N']) > timestamp:
+                    timestamp = int(stored_item['last_update']['N'])
+                    logger.warning(f"Stored last_update {timestamp} is newer, retrying with it")
+                if set(message_ids) & set(stored_item.get('message_ids', {}).get('SS', [])):
+                    duplicate = True
+                    logger.info(f"Messages {message_ids} of {cellphone_number} already appended, updating only the execution")
+                queue = (
+                    stored_item.get('execution_status', {}).get('S') == self.EXECUTION_DISPATCHED
+                    and int(stored_item.get('dispatch_deadline', {}).get('N', 0)) >= now
+                )
+            except Exception as e:
+                logger.error(
+                    f"Failed to append message for instance_name {instance_name} and phone {cellphone_number}: {str(e)}")
+                raise
+
+        previous_message = response.get('Attributes', {})
+        if media_ids and 'pending_media' in previous_message:
+            previous_message['pending_media'] = previous_message['pending_media'] - media_ids
+        # Items written before fragments existed keep their text in the `text` attribute
+        appended = [] if duplicate else [text]
+        fragments = [previous_message.get('text', '')] + previous_message.get('fragments', []) + appended
+        concatenated_text = " ".join(fragment for fragment in fragments if fragment).strip()
+        execution_status = self.EXECUTION_DISPATCHED if queue else self.EXECUTION_PENDING
+
+        return {'text': concatenated_text, 'last_update': timestamp, 'execution_status': execution_status}, previous_message
+
+    def mark_media_pending(self, instance_name: str, cellphone_number: str, media_id: str) -> None:
         """
-        Create a new message entry in DynamoDB.
+        Flag a media fragment whose text is still being extracted, so the debounce window of
+        fragments arriving meanwhile waits for it. A string set (not a counter) stays consistent
+        even if the item is deleted before the mark is cleared.
+
+        process_message holds the dispatch while marks are pending, until `pending_media_deadline`,
+        so a lost extraction cannot block the conversation.
         """
-        logger.info(f"Creating new message for {cellphone_number} in app {instance_name}")
         try:
-            self._table.put_item(
-                Item={
-                    'instance_name': instance_name,
-                    'cellphone_number': cellphone_number,
-                    'text': text,
-                    'last_update': timestamp
+            self._table.update_item(
+                Key={'instance_name': instance_name, 'cellphone_number': cellphone_number},
+                UpdateExpression="ADD pending_media :media_ids SET pending_media_deadline = :deadline",
+                ExpressionAttributeValues={
+                    ':media_ids': {media_id},
+                    ':deadline': int(time.time()) + self.MEDIA_PENDING_TIMEOUT_SECONDS
                 }
             )
-            return {'text': text, 'last_update': timestamp}
         except Exception as e:
             logger.error(
-                f"Failed to create new message for instance_name {instance_name} and phone {cellphone_number}: {str(e)}")
+                f"Failed to mark pending media for instance_name {instance_name} and phone {cellphone_number}: {str(e)}")
             raise
-
-    def update_execution_arn(
-            self,
-            instance_name: str,
-            cellphone_number: str,
-            execution_arn: str
-    ) -> None:
-        """
-        Update the execution ARN in the DynamoDB table.
-        """
-        self._table.update_item(
-            Key={'instance_name': instance_name, 'cellphone_number': cellphone_number},
-            UpdateExpression="SET execution_arn = :arn",
-            ExpressionAttributeValues={':arn': execution_arn}
-        )
@@ -0,0 +1,98 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import boto3
+
+from lambdas.debouncer.post_message.configs.logging_config import logger
+
+
+class ExtractionCacheService:
+    """
+    Cache of media transcriptions/descriptions keyed by model name + SHA-256 of the decoded media,
+    so forwarded images and voice notes skip the model call.
+
+    Two tiers: an LRU in the container and, when a table is configured, a DynamoDB table shared by
+    all containers, whose items expire through TTL. Hits and misses are counted per tier.
+    """
+
+    def __init__(
+            self,
+            table_name: Optional[str] = None,
+            max_entries: int = int(os.getenv('EXTRACTION_CACHE_MAX_ENTRIES', '512')),
+            ttl_seconds: int = int(os.getenv('EXTRACTION_CACHE_TTL_SECONDS', str(30 * 24 * 3600)))
+    ):
+        table_name = table_name or os.getenv('EXTRACTION_CACHE_TABLE')
+        self._table = boto3.resource('dynamodb').Table(table_name) if table_name else None
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._entries: 'OrderedDict[str, str]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {'local_hits': 0, 'table_hits': 0, 'misses': 0}
+
+    @staticmethod
+    def build_key(model_name: str, media_sha256: str) -> str:
+        return f"{model_name}#{media_sha256}"
+
+    def get(self, model_name: str, media_sha256: str) -> Optional[str]:
+        """
+        Cached text for the media (by the SHA-256 hex digest of its decoded bytes), or None.
+        Table hits are promoted to the local tier.
+        """
+        key = self.build_key(model_name, media_sha256)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._counters['local_hits'] += 1
+                return self._entries[key]
+
+        text = self._get_from_table(key)
+        with self._lock:
+            if text is None:
+                self._counters['misses'] += 1
+                return None
+            self._counters['table_hits'] += 1
+            self._store_local(key, text)
+        return text
+
+    def put(self, model_name: str, media_sha256: str, text: str) -> None:
+        key = self.build_key(model_name, media_sha256)
+        with self._lock:
+            self._store_local(key, text)
+
+        if self._table is None:
+            return
+        try:
+            self._table.put_item(Item={
+                'cache_key': key,
+                'text': text,
+                'expires_at': int(time.time()) + self._ttl_seconds
+            })
+        except Exception as e:
+            # A failed write only costs a future model call
+            logger.warning(f"Failed to store extraction {key} in cache table: {str(e)}")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counters, local_entries=len(self._entries))
+
+    def _get_from_table(self, key: str) -> Optional[str]:
+        if self._table is None:
+            return None
+        try:
+            item = self._table.get_item(Key={'cache_key': key}).get('Item')
+        except Exception as e:
+            logger.warning(f"Failed to read extraction {key} from cache table: {str(e)}")
+            return None
+        # TTL deletion lags by up to a couple of days, so expired items are ignored here
+        if item is None or int(item.get('expires_at', 0)) < time.time():
+            return None
+        return item['text']
+
+    def _store_local(self, key: str, text: str) -> None:
+        self._entries[key] = text
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
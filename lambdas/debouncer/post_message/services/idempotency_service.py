@@ -0,0 +1,80 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+import boto3
+
+from lambdas.debouncer.post_message.configs.logging_config import logger
+
+
+class IdempotencyService:
+    """
+    Drops webhook redeliveries by WhatsApp message id (`data.key.id`).
+
+    Ids already seen by this container are answered from an LRU; otherwise the id is claimed with
+    a conditional PutItem on a table whose items expire through TTL, so redeliveries handled by
+    other containers are caught too. Without a table only the container cache is used.
+    """
+
+    def __init__(
+            self,
+            table_name: Optional[str] = None,
+            max_entries: int = int(os.getenv('WEBHOOK_DEDUP_MAX_ENTRIES', '4096')),
+            ttl_seconds: int = int(os.getenv('WEBHOOK_DEDUP_TTL_SECONDS', str(24 * 3600)))
+    ):
+        table_name = table_name or os.getenv('WEBHOOK_DEDUP_TABLE')
+        self._table = boto3.resource('dynamodb').Table(table_name) if table_name else None
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._seen: 'OrderedDict[str, None]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def claim(self, message_id: str) -> bool:
+        """
+        True the first time the id is seen, False for a redelivery.
+        """
+        with self._lock:
+            if message_id in self._seen:
+                self._seen.move_to_end(message_id)
+                return False
+            self._remember(message_id)
+
+        if self._table is None:
+            return True
+
+        now = int(time.time())
+        try:
+            self._table.put_item(
+                Item={'message_id': message_id, 'expires_at': now + self._ttl_seconds},
+                # TTL deletion lags, so an expired claim counts as free
+                ConditionExpression='attribute_not_exists(message_id) OR expires_at < :now',
+                ExpressionAttributeValues={':now': now}
+            )
+            return True
+        except self._table.meta.client.exceptions.ConditionalCheckFailedException:
+            return False
+        except Exception as e:
+            # Without the table a duplicate is less harmful than a lost message
+            logger.warning(f"Failed to claim message {message_id}, processing it anyway: {str(e)}")
+            return True
+
+    def release(self, message_ids: Iterable[str]) -> None:
+        """
+        Forget claims of messages whose processing failed, so their retry is not taken for a duplicate.
+        """
+        for message_id in message_ids:
+            with self._lock:
+                self._seen.pop(message_id, None)
+            if self._table is None:
+                continue
+            try:
+                self._table.delete_item(Key={'message_id': message_id})
+            except Exception as e:
+                logger.error(f"Failed to release message {message_id}: {str(e)}")
+
+    def _remember(self, message_id: str) -> None:
+        self._seen[message_id] = None
+        while len(self._seen) > self._max_entries:
+            self._seen.popitem(last=False)
@@ -0,0 +1,141 @@
+import asyncio
+import json
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple, Type
+
+from lambdas.debouncer.post_message.configs.logging_config import logger
+from lambdas.debouncer.post_message.services.dynamodb_service import DynamoDBService
+from lambdas.debouncer.post_message.services.step_function_service import StepFunctionService
+from lambdas.debouncer.post_message.strategies.debounce_window_strategies import (
+    DebounceWindowStrategy,
+    build_window_strategy,
+)
+
+
+class LocalDebouncerService:
+    """
+    Drop-in replacement for StepFunctionService that debounces in-process.
+
+    Timers run on an asyncio loop in a background thread, one per conversation
+    (`instance_name#cellphone_number`). Starting a new execution replaces the conversation's
+    timer, and an expired timer hands the execution input to `on_expire` (the process_message
+    logic) in a worker thread, so no Step Functions or Lambda calls are made. Errors in
+    `retry_on` are retried like the state machine's Retry block.
+    """
+
+    ARN_PREFIX = 'local:execution:'
+
+    def __init__(
+            self,
+            on_expire: Callable[[Dict[str, Any]], Any],
+            window_strategy: Optional[DebounceWindowStrategy] = None,
+            retry_on: Tuple[Type[Exception], ...] = (),
+            retry_seconds: float = 3,
+            max_retries: int = 10
+    ):
+        self._on_expire = on_expire
+        self._window_strategy = window_strategy or build_window_strategy()
+        self._retry_on = retry_on
+        self._retry_seconds = retry_seconds
+        self._max_retries = max_retries
+        self._timers: Dict[str, Tuple[str, asyncio.TimerHandle]] = {}
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='local-debouncer', daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def _conversation_key(instance_name: str, cellphone_number: str) -> str:
+        return f"{instance_name}#{cellphone_number}"
+
+    @staticmethod
+    def build_execution_name(instance_name: str, cellphone_number: str) -> str:
+        return StepFunctionService.build_execution_name(instance_name, cellphone_number)
+
+    def get_execution_arn(self, execution_name: str) -> str:
+        return f"{self.ARN_PREFIX}{execution_name}"
+
+    def cancel_existing_execution(self, existing_message: Dict[str, Any]) -> None:
+        """
+        Cancel the conversation's timer if it still belongs to the given execution.
+        """
+        if 'execution_arn' in existing_message:
+            key = self._conversation_key(existing_message['instance_name'], existing_message['cellphone_number'])
+            self._loop.call_soon_threadsafe(self._cancel, key, existing_message['execution_arn'])
+
+    def start_step_function_execution(
+            self,
+            instance_name: str,
+            cellphone_number: str,
+            message_text: str,
+            last_update: int,
+            execution_name: Optional[str] = None,
+            previous_message: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """
+        Schedule the conversation's processing after its debounce window, replacing any pending timer.
+        """
+        execution_arn = self.get_execution_arn(
+            execution_name or self.build_execution_name(instance_name, cellphone_number))
+        wait_seconds = self._window_strategy.compute(message_text, int(last_update), previous_message)
+
+        # Same input the state machine passes to process_message
+        execution_input = json.loads(json.dumps({
+            'instance_name': instance_name,
+            'cellphone_number': cellphone_number,
+            'message': message_text,
+            'last_update': last_update,
+            'wait_seconds': wait_seconds
+        }, default=DynamoDBService.decimal_to_float))
+
+        key = self._conversation_key(instance_name, cellphone_number)
+        self._loop.call_soon_threadsafe(self._schedule, key, execution_arn, wait_seconds, execution_input)
+        return execution_arn
+
+    def pending_conversations(self) -> int:
+        return len(self._timers)
+
+    def close(self) -> None:
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    def _schedule(self, key: str, execution_arn: str, wait_seconds: float, execution_input: Dict[str, Any]) -> None:
+        self._cancel(key)
+        handle = self._loop.call_later(wait_seconds, self._expire, key, execution_arn, execution_input)
+        self._timers[key] = (execution_arn, handle)
+
+    def _cancel(self, key: str, execution_arn: Optional[str] = None) -> None:
+        timer = self._timers.get(key)
+        if timer is None or (execution_arn is not None and timer[0] != execution_arn):
+            return
+
+        logger.info(f"Cancelling local execution {timer[0]}")
+        timer[1].cancel()
+        del self._timers[key]
+
+    def _expire(self, key: str, execution_arn: str, execution_input: Dict[str, Any], attempt: int = 0) -> None:
+        self._timers.pop(key, None)
+        future = self._loop.run_in_executor(None, self._on_expire, execution_input)
+        future.add_done_callback(lambda done: self._on_done(key, execution_arn, execution_input, attempt, done))
+
+    def _on_done(
+            self,
+            key: str,
+            execution_arn: str,
+            execution_input: Dict[str, Any],
+            attempt: int,
+            future: asyncio.Future
+    ) -> None:
+        error = future.exception()
+        if error is None:
+            return
+
+        # The retry is a timer of the same execution, so a new message still cancels it
+        if isinstance(error, self._retry_on) and attempt < self._max_retries and key not in self._timers:
+            logger.info(f"Retrying local execution {execution_arn} in {self._retry_seconds}s: {error}")
+            handle = self._loop.call_later(
+                self._retry_seconds, self._expire, key, execution_arn, execution_input, attempt + 1)
+            self._timers[key] = (execution_arn, handle)
+            return
+
+        logger.error(f"Local execution {execution_arn} failed: {error}")
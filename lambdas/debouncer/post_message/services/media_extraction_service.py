@@ -0,0 +1,36 @@
+import json
+import os
+from typing import Any, Dict, Optional
+
+import boto3
+
+from lambdas.debouncer.post_message.configs.logging_config import logger
+
+
+class LambdaMediaExtractionService:
+    """
+    Hands media messages off to an asynchronous invocation of the post_message Lambda itself,
+    so the webhook returns as soon as the media is marked as pending. The extraction invocation
+    transcribes/describes the media and appends the text to the debounce item.
+    """
+
+    EVENT_KEY = 'media_extraction'
+
+    def __init__(self, function_name: Optional[str] = None):
+        self._lambda = boto3.client('lambda')
+        self._function_name = function_name or os.environ['AWS_LAMBDA_FUNCTION_NAME']
+
+    def submit(self, message: Dict[str, Any]) -> None:
+        """
+        Start the extraction of one Evolution webhook, each in its own invocation so the media
+        of a burst are extracted concurrently.
+        """
+        try:
+            self._lambda.invoke(
+                FunctionName=self._function_name,
+                InvocationType='Event',
+                Payload=json.dumps({self.EVENT_KEY: [message]})
+            )
+        except Exception as e:
+            logger.error(f"Failed to start media extraction in {self._function_name}: {str(e)}")
+            raise
@@ -0,0 +1,138 @@
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from lambdas.debouncer.common.debounce_state import MediaPendingError
+from lambdas.debouncer.post_message.services.dynamodb_service import DynamoDBService
+
+
+class InMemoryMessageStore:
+    """
+    In-process stand-in for DynamoDBService (and for the store used by process_message),
+    for the local debouncer. Fragments are coalesced and claimed under a lock, with the same
+    semantics as the DynamoDB conditional writes.
+    """
+
+    decimal_to_float = staticmethod(DynamoDBService.decimal_to_float)
+
+    def __init__(self):
+        self._items: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def append_message(
+            self,
+            instance_name: str,
+            cellphone_number: str,
+            text: str,
+            timestamp: int,
+            execution_arn: Optional[str] = None,
+            media_ids: Optional[Iterable[str]] = None,
+            message_ids: Optional[Iterable[str]] = None
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Append a message fragment, or queue it while the conversation is dispatched. A fragment whose
+        `message_ids` were already appended is not appended again.
+        Returns the updated message ({'text', 'last_update', 'execution_status'}) and the previous item.
+        """
+        key = (instance_name, cellphone_number)
+        message_ids = set(message_ids or ())
+        with self._lock:
+            previous_message = self._copy(self._items.get(key))
+            item = self._items.setdefault(key, {'instance_name': instance_name, 'cellphone_number': cellphone_number})
+
+            if not message_ids & item.get('message_ids', set()):
+                item['fragments'] = item.get('fragments', []) + [text]
+                if message_ids:
+                    item['message_ids'] = item.get('message_ids', set()) | message_ids
+            item['last_update'] = max(timestamp, item.get('last_update', timestamp))
+            if not self._in_flight(item):
+                item['execution_status'] = DynamoDBService.EXECUTION_PENDING
+                if execution_arn:
+                    item['execution_arn'] = execution_arn
+            if media_ids:
+                item['pending_media'] = item.get('pending_media', set()) - set(media_ids)
+                if not item['pending_media']:
+                    # DynamoDB removes a set attribute once it is empty
+                    del item['pending_media']
+                if 'pending_media' in previous_message:
+                    previous_message['pending_media'] = previous_message['pending_media'] - set(media_ids)
+
+            updated_message = {
+                'text': " ".join(item.get('fragments', [])).strip(),
+                'last_update': item['last_update'],
+                'execution_status': item['execution_status']
+            }
+            return updated_message, previous_message
+
+    def mark_media_pending(self, instance_name: str, cellphone_number: str, media_id: str) -> None:
+        key = (instance_name, cellphone_number)
+        with self._lock:
+            item = self._items.setdefault(key, {'instance_name': instance_name, 'cellphone_number': cellphone_number})
+            item['pending_media'] = item.get('pending_media', set()) | {media_id}
+            item['pending_media_deadline'] = int(time.time()) + DynamoDBService.MEDIA_PENDING_TIMEOUT_SECONDS
+
+    # Same contract as the DynamoDBMessageStore in common.debounce_state
+
+    def claim_message(
+            self,
+            instance_name: str,
+            cellphone_number: str,
+            last_update: int,
+            dispatch_deadline: int
+    ) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            item = self._items.get((instance_name, cellphone_number))
+            if (item is None or item.get('last_update') != last_update
+                    or item.get('execution_status') == DynamoDBService.EXECUTION_DISPATCHED):
+                return None
+            if self._media_pending(item):
+                raise MediaPendingError(f"Media still being extracted for {cellphone_number}")
+            return self._take_fragments(item, dispatch_deadline)
+
+    def release_message(
+            self,
+            instance_name: str,
+            cellphone_number: str,
+            last_update: int,
+            dispatch_deadline: int
+    ) -> Optional[Dict[str, Any]]:
+        key = (instance_name, cellphone_number)
+        with self._lock:
+            item = self._items.get(key)
+            if item is None or item.get('execution_status') != DynamoDBService.EXECUTION_DISPATCHED:
+                return None
+            if item['last_update'] == last_update:
+                del self._items[key]
+                return None
+            if self._media_pending(item):
+                # The media fragment starts the next execution once extracted
+                item['execution_status'] = DynamoDBService.EXECUTION_PENDING
+                item.pop('execution_arn', None)
+                return None
+            return self._take_fragments(item, dispatch_deadline)
+
+    def _take_fragments(self, item: Dict[str, Any], dispatch_deadline: int) -> Dict[str, Any]:
+        claimed = self._copy(item)
+        item.pop('fragments', None)
+        item['execution_status'] = DynamoDBService.EXECUTION_DISPATCHED
+        item['dispatch_deadline'] = dispatch_deadline
+        return claimed
+
+    @staticmethod
+    def _in_flight(item: Dict[str, Any]) -> bool:
+        return (item.get('execution_status') == DynamoDBService.EXECUTION_DISPATCHED
+                and item.get('dispatch_deadline', 0) >= int(time.time()))
+
+    @staticmethod
+    def _media_pending(item: Dict[str, Any]) -> bool:
+        return bool(item.get('pending_media')) and item.get('pending_media_deadline', 0) >= int(time.time())
+
+    @staticmethod
+    def _copy(item: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        if item is None:
+            return {}
+        copied = dict(item)
+        for attribute in ('fragments', 'pending_media', 'message_ids'):
+            if attribute in copied:
+                copied[attribute] = copied[attribute].copy()
+        return copied
@@ -1,20 +1,30 @@
 import os
 import json
+import re
+import uuid
 import boto3
 from typing import Dict, Any, Optional
 
 from lambdas.debouncer.post_message.configs.logging_config import logger
 from lambdas.debouncer.post_message.services.dynamodb_service import DynamoDBService
+from lambdas.debouncer.post_message.strategies.debounce_window_strategies import (
+    DebounceWindowStrategy,
+    build_window_strategy,
+)
 
 
 class StepFunctionService:
-    def __init__(self, step_function_arn: Optional[str] = None):
+    def __init__(
+            self,
+            step_function_arn: Optional[str] = None,
+            window_strategy: Optional[DebounceWindowStrategy] = None
+    ):
         """
         Initialize Step Functions service.
         """
         self._step_functions = boto3.client('stepfunctions')
         self._step_function_arn = step_function_arn or os.environ['STEP_FUNCTION_ARN']
-        self._dynamodb_service = DynamoDBService()
+        self._window_strategy = window_strategy or build_window_strategy()
 
     def cancel_existing_execution(self, existing_message: Dict[str, Any]) -> None:
         """
@@ -35,16 +45,38 @@ class StepFunctionService:
             except Exception as e:
                 logger.error(f"Failed to cancel execution {execution_arn}: {str(e)}")
 
+    @staticmethod
+    def build_execution_name(instance_name: str, cellphone_number: str) -> str:
+        """
+        Unique execution name (max 80 chars, no special characters), chosen before the execution starts.
+        """
+        prefix = re.sub(r'[^A-Za-z0-9_-]', '_', f"{instance_name}-{cellphone_number}")[:43]
+        return f"{prefix}-{uuid.uuid4()}"
+
+    def get_execution_arn(self, execution_name: str) -> str:
+        """
+        ARN a Standard workflow execution will have, so it can be stored before the execution starts.
+        """
+        state_machine_arn = self._step_function_arn.replace(':stateMachine:', ':execution:', 1)
+        return f"{state_machine_arn}:{execution_name}"
+
     def start_step_function_execution(
             self,
             instance_name: str,
             cellphone_number: str,
             message_text: str,
-            last_update: int
+            last_update: int,
+            execution_name: Optional[str] = None,
+            previous_message: Optional[Dict[str, Any]] = None
     ) -> str:
         """
         Start a new Step Functions execution.
+        The debounce window is computed for this conversation and read by the Wait state via SecondsPath.
         """
+        execution_kwargs = {'name': execution_name} if execution_name else {}
+        wait_seconds = self._window_strategy.compute(message_text, int(last_update), previous_message)
+        logger.info(f"Debounce window for {cellphone_number} in app {instance_name}: {wait_seconds}s")
+
         try:
             execution = self._step_functions.start_execution(
                 stateMachineArn=self._step_function_arn,
@@ -52,8 +84,10 @@ class StepFunctionService:
                     'instance_name': instance_name,
                     'cellphone_number': cellphone_number,
                     'message': message_text,
-                    'last_update': last_update
-                }, default=self._dynamodb_service.decimal_to_float)
+                    'last_update': last_update,
+                    'wait_seconds': wait_seconds
+                }, default=DynamoDBService.decimal_to_float),
+                **execution_kwargs
             )
             return execution['executionArn']
         except Exception as e:
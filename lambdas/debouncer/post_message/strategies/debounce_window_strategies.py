@@ -0,0 +1,79 @@
+import os
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional
+
+
+class DebounceWindowStrategy(ABC):
+    @abstractmethod
+    def compute(self, text: str, timestamp: int, previous_message: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Retorna quantos segundos esperar antes de processar a conversa.
+        `previous_message` é o item do debounce antes desta mensagem (sem `last_update` se ela abriu a janela).
+        """
+        pass
+
+
+class FixedWindowStrategy(DebounceWindowStrategy):
+    def __init__(self, seconds: int = 10):
+        self.seconds = seconds
+
+    def compute(self, text: str, timestamp: int, previous_message: Optional[Dict[str, Any]] = None) -> int:
+        return self.seconds
+
+
+class AdaptiveWindowStrategy(DebounceWindowStrategy):
+    """
+    Janela curta para uma mensagem única que fecha uma frase, maior enquanto o usuário manda
+    fragmentos em sequência (proporcional ao intervalo entre eles) e estendida enquanto há
+    transcrição de áudio pendente.
+    """
+
+    SENTENCE_ENDINGS = ('.', '!', '?')
+
+    def __init__(
+            self,
+            complete_seconds: int = 2,
+            default_seconds: int = 10,
+            burst_seconds: int = 6,
+            max_burst_seconds: int = 10,
+            burst_gap_factor: float = 2.0,
+            media_pending_seconds: int = 15
+    ):
+        self.complete_seconds = complete_seconds
+        self.default_seconds = default_seconds
+        self.burst_seconds = burst_seconds
+        self.max_burst_seconds = max_burst_seconds
+        self.burst_gap_factor = burst_gap_factor
+        self.media_pending_seconds = media_pending_seconds
+
+    def compute(self, text: str, timestamp: int, previous_message: Optional[Dict[str, Any]] = None) -> int:
+        previous_message = previous_message or {}
+
+        if previous_message.get('pending_media'):
+            return self.media_pending_seconds
+
+        last_update = previous_message.get('last_update')
+        if last_update is not None:
+            # Quem digita devagar ganha uma janela maior: espera o dobro do último intervalo
+            gap = timestamp - int(last_update)
+            return min(self.max_burst_seconds, max(self.burst_seconds, int(gap * self.burst_gap_factor)))
+
+        if self._ends_sentence(text):
+            return self.complete_seconds
+
+        return self.default_seconds
+
+    def _ends_sentence(self, text: str) -> bool:
+        return bool(text) and text.rstrip().endswith(self.SENTENCE_ENDINGS)
+
+
+def build_window_strategy(policy: Optional[str] = None) -> DebounceWindowStrategy:
+    """Cria a estratégia a partir de DEBOUNCE_WINDOW_POLICY (adaptive ou fixed)."""
+    policy = policy or os.getenv('DEBOUNCE_WINDOW_POLICY', 'adaptive')
+    strategies = {
+        'adaptive': AdaptiveWindowStrategy,
+        'fixed': FixedWindowStrategy,
+    }
+    if policy not in strategies:
+        raise ValueError(f"Unknown debounce window policy: {policy}")
+    return strategies[policy]()
@@ -1,82 +1,124 @@
-import io
-import base64
 import os
 from abc import ABC, abstractmethod
-from typing import Dict
+from typing import Dict, Optional
 
 from openai import OpenAI
 from dotenv import load_dotenv
 
+from lambdas.debouncer.post_message.media_payload import MediaPayload, audio_duration_seconds, decoded_size
+from lambdas.debouncer.post_message.services.extraction_cache_service import ExtractionCacheService
+
 load_dotenv()
 
 
 class TextExtractionStrategy(ABC):
-    def __init__(self):
+    description = 'media text extraction'
+    max_bytes = 20 * 1024 * 1024
+
+    def __init__(self, cache: Optional[ExtractionCacheService] = None):
         self.client = OpenAI()
+        self.cache = cache
+
+    def process(self, content: Dict):
+        base_64 = content.get("base64")
+        if not base_64:
+            return ''
+
+        # Os limites são checados antes de decodificar qualquer byte
+        if not self.within_limits(content, decoded_size(base_64)):
+            return self._handle_limit_exceeded()
+
+        try:
+            with MediaPayload.decode(base_64) as payload:
+                model_name = self.model_name()
+
+                # Mídias encaminhadas repetem o mesmo conteúdo: reaproveita o texto já extraído
+                if self.cache:
+                    cached_text = self.cache.get(model_name, payload.sha256)
+                    if cached_text is not None:
+                        return cached_text
+
+                text = self.extract(payload, model_name)
+        except Exception as e:
+            print(f'Error during {self.description}: {e}')
+            return self._handle_extraction_error()
+
+        if self.cache:
+            self.cache.put(model_name, payload.sha256, text)
+        return text
+
+    def within_limits(self, content: Dict, size: int) -> bool:
+        return size <= self.max_bytes
+
+    @abstractmethod
+    def model_name(self) -> str:
+        raise NotImplementedError("This method should be overridden by subclasses")
 
     @abstractmethod
-    def process(self, base_64):
+    def extract(self, payload: MediaPayload, model_name: str) -> str:
         raise NotImplementedError("This method should be overridden by subclasses")
 
     @staticmethod
     def _handle_extraction_error():
         return 'Escreva isso sem nenhuma explicação extra e sem as aspas: "Não consigo compreender a mídia no momento, poderia escrever o que deseja por favor?"'
 
+    @staticmethod
+    def _handle_limit_exceeded():
+        return 'Escreva isso sem nenhuma explicação extra e sem as aspas: "Essa mídia é grande demais para eu abrir, poderia escrever o que deseja ou enviar uma versão menor por favor?"'
+
 
 class AudioExtractionStrategy(TextExtractionStrategy):
-    def process(self, content: Dict):
-        base_64 = content.get("base64")
-        if not base_64:
-            return ''
+    description = 'audio transcription'
+    # Limite de upload do Whisper
+    max_bytes = int(os.getenv('MEDIA_MAX_AUDIO_BYTES', str(25 * 1024 * 1024)))
+    max_seconds = int(os.getenv('MEDIA_MAX_AUDIO_SECONDS', '600'))
 
-        try:
-            decoded_audio = base64.b64decode(base_64)
+    def model_name(self) -> str:
+        return os.getenv('OPENAI_AUDIO_MODEL_NAME')
 
-            audio_file = io.BytesIO(decoded_audio)
-            audio_file.name = 'audio.mp3'
+    def within_limits(self, content: Dict, size: int) -> bool:
+        duration = audio_duration_seconds(content)
+        return super().within_limits(content, size) and (duration is None or duration <= self.max_seconds)
 
-            transcript = self.client.audio.transcriptions.create(
-                model=os.getenv('OPENAI_AUDIO_MODEL_NAME'),
-                file=audio_file,
-                language='pt'
-            )
+    def extract(self, payload: MediaPayload, model_name: str) -> str:
+        transcript = self.client.audio.transcriptions.create(
+            model=model_name,
+            file=('audio.mp3', payload.file),
+            language='pt'
+        )
 
-            return transcript.text
-        except Exception as e:
-            print(f'Error during audio transcription: {e}')
-            return self._handle_extraction_error()
+        return transcript.text
 
 
 class ImageExtractionStrategy(TextExtractionStrategy):
-    def process(self, content: Dict):
-        base_64 = content.get("base64")
-        if not base_64:
-            return ''
-
-        try:
-            response = self.client.chat.completions.create(
-                model=os.getenv('OPENAI_VISION_MODEL_NAME'),
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": "Descreva o que está nessa imagem. Caso tenha texto, diga o que está escrito.",
+    description = 'image text extraction'
+    # Limite de imagem da API de visão
+    max_bytes = int(os.getenv('MEDIA_MAX_IMAGE_BYTES', str(20 * 1024 * 1024)))
+
+    def model_name(self) -> str:
+        return os.getenv('OPENAI_VISION_MODEL_NAME')
+
+    def extract(self, payload: MediaPayload, model_name: str) -> str:
+        mime_type, image_base_64 = payload.vision_base64()
+        response = self.client.chat.completions.create(
+            model=model_name,
+            messages=[
+                {
+                    "role": "user",
+                    "content": [
+                        {
+                            "type": "text",
+                            "text": "Descreva o que está nessa imagem. Caso tenha texto, diga o que está escrito.",
+                        },
+                        {
+                            "type": "image_url",
+                            "image_url": {
+                                "url": f"data:{mime_type};base64,{image_base_64}"
                             },
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/jpeg;base64,{base_64}"
-                                },
-                            },
-                        ],
-                    },
-                ],
-            )
-
-            return response.choices[0].message.content
+                        },
+                    ],
+                },
+            ],
+        )
 
-        except Exception as e:
-            print(f'Error during image text extraction: {e}')
-            return self._handle_extraction_error()
+        return response.choices[0].message.content
@@ -1,7 +1,7 @@
 from abc import ABC, abstractmethod
 from typing import Optional, Tuple
-import boto3
 
+from lambdas.debouncer.post_message.services.extraction_cache_service import ExtractionCacheService
 from lambdas.debouncer.post_message.strategies.evolution_responses_strategies import ListResponseStrategy
 from lambdas.debouncer.post_message.strategies.text_extraction_strategies import AudioExtractionStrategy, ImageExtractionStrategy
 
@@ -13,13 +13,16 @@ class MessageHandler(ABC):
 
 
 class EvolutionHandler(MessageHandler):
-    def __init__(self):
+    MEDIA_MESSAGE_TYPES = ('audioMessage', 'imageMessage')
+
+    def __init__(self, extraction_cache: Optional[ExtractionCacheService] = None):
+        # Compartilhado pelas estratégias de mídia (tabela opcional via EXTRACTION_CACHE_TABLE)
+        self.extraction_cache = extraction_cache or ExtractionCacheService()
         self.strategies = {
-            'audioMessage': AudioExtractionStrategy(),
-            'imageMessage': ImageExtractionStrategy(),
+            'audioMessage': AudioExtractionStrategy(self.extraction_cache),
+            'imageMessage': ImageExtractionStrategy(self.extraction_cache),
             'listResponseMessage': ListResponseStrategy()
         }
-        self.dynamodb_client = boto3.client('dynamodb')
 
     def process(self, message: dict) -> Optional[Tuple[str, str, Optional[str]]]:
         if not self._is_valid_evolution_message(message):
@@ -34,6 +37,34 @@ class EvolutionHandler(MessageHandler):
 
         return cellphone_number, text, instance_name
 
+    def get_media_message(self, message: dict) -> Optional[Tuple[str, str, str]]:
+        """
+        Para mensagens de mídia (texto extraído por transcrição/visão), retorna
+        (cellphone_number, instance_name, message_id) antes da extração começar.
+        """
+        if not self._is_valid_evolution_message(message):
+            return None
+
+        data = message.get('data', {})
+        content = data.get('message', {})
+        message_id = data['key'].get('id')
+        if not message_id or not any(message_type in content for message_type in self.MEDIA_MESSAGE_TYPES):
+            return None
+
+        cellphone_number = data['key']['remoteJid'].split('@')[0]
+        return cellphone_number, message.get('instance'), message_id
+
+    def get_message_id(self, message: dict) -> Optional[str]:
+        """
+        Identificador da mensagem do WhatsApp (`data.key.id`), prefixado pela instância, que
+        se repete quando a Evolution reenvia o mesmo webhook.
+        """
+        if not self._is_valid_evolution_message(message):
+            return None
+
+        message_id = message['data'].get('key', {}).get('id')
+        return f"{message.get('instance')}#{message_id}" if message_id else None
+
     @staticmethod
     def _is_valid_evolution_message(message: dict) -> bool:
         return (
@@ -3,17 +3,24 @@ import boto3
 import os
 import logging
 
+from lambdas.debouncer.common.debounce_state import (
+    DynamoDBMessageStore, MediaPendingError, dispatch_deadline, message_text
+)
+
 # Set up logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 # Get environment variables
-DYNAMODB_TABLE = os.environ['DYNAMODB_TABLE']
-PROCESSING_LAMBDA_FUNCTION = os.environ['PROCESSING_LAMBDA_FUNCTION']
+DYNAMODB_TABLE = os.getenv('DYNAMODB_TABLE')
+PROCESSING_LAMBDA_FUNCTION = os.getenv('PROCESSING_LAMBDA_FUNCTION')
+# RequestResponse keeps the conversation dispatched until the chatbot answers, so fragments sent
+# meanwhile are queued for the next turn; Event only waits for the invocation to be accepted
+PROCESSING_INVOCATION_TYPE = os.getenv('PROCESSING_INVOCATION_TYPE', 'RequestResponse')
+
 
-# Set up DynamoDB resource
-dynamodb = boto3.resource('dynamodb')
-table = dynamodb.Table(DYNAMODB_TABLE)
+# Set up DynamoDB store (the local debouncer passes its own in-memory store instead)
+message_store = DynamoDBMessageStore(boto3.resource('dynamodb').Table(DYNAMODB_TABLE)) if DYNAMODB_TABLE else None
 
 
 def invoke_lambda(instance_name, cellphone_number, message, last_update):
@@ -33,44 +40,58 @@ def invoke_lambda(instance_name, cellphone_number, message, last_update):
     try:
         response = lambda_client.invoke(
             FunctionName=PROCESSING_LAMBDA_FUNCTION,
-            InvocationType='Event',  # Asynchronous invocation
+            InvocationType=PROCESSING_INVOCATION_TYPE,
             Payload=json.dumps(payload)
         )
-        logger.info(f'Invoked Lambda for instance_name {instance_name} with response: {response}')
+        if 'FunctionError' in response:
+            logger.error(f'Processing Lambda failed for instance_name {instance_name}: {response["Payload"].read()}')
+        else:
+            logger.info(f'Invoked Lambda for instance_name {instance_name} with status: {response["StatusCode"]}')
     except Exception as e:
         logger.error(f'Failed to invoke Lambda for instance_name {instance_name}: {str(e)}')
 
 
 def lambda_handler(event, context):
+    return process_event(event, message_store)
+
+
+def process_event(event, store, dispatch=invoke_lambda):
+    """
+    Processes a debounced conversation: claims it if it is still the most recent version,
+    dispatches it and releases it. Fragments queued while the chatbot was answering are
+    dispatched right after, as the next turn. Raises MediaPendingError, retried by the
+    state machine, while media of the conversation are still being extracted.
+    """
     logger.info('Received event: %s', json.dumps(event))
 
     instance_name = event['instance_name']
     cellphone_number = event['cellphone_number']
-    message = event['message']
     last_update = event['last_update']
 
     # Double-check if the message is still the most recent one
-    response = table.get_item(Key={'instance_name': instance_name, 'cellphone_number': cellphone_number})
-
-    if 'Item' not in response or response['Item']['last_update'] != last_update:
+    item = store.claim_message(instance_name, cellphone_number, last_update, dispatch_deadline())
+    if item is None:
         logger.info('Message was updated, skipping processing for %s', cellphone_number)
         return {
             'statusCode': 200,
             'body': json.dumps('Message was updated, skipping processing')
         }
 
-    logger.info('Processing message: %s', message)
+    while item is not None:
+        message = message_text(item) or event['message']
+        last_update = int(item['last_update'])
+        logger.info('Processing message: %s', message)
 
-    invoke_lambda(instance_name, cellphone_number, message, last_update)
+        dispatch(instance_name, cellphone_number, message, last_update)
 
-    # After sending, delete the message from DynamoDB
-    try:
-        table.delete_item(Key={'instance_name': instance_name, 'cellphone_number': cellphone_number})
-        logger.info('Message from app %s and phone number %s processed and deleted from DynamoDB', instance_name,
-                    cellphone_number)
-    except Exception as e:
-        logger.error(f'Failed to delete item for app {instance_name} and phone number {cellphone_number}: {str(e)}')
+        # After sending, delete the message from DynamoDB (or take the fragments queued meanwhile)
+        try:
+            item = store.release_message(instance_name, cellphone_number, last_update, dispatch_deadline())
+        except Exception as e:
+            logger.error(f'Failed to release item for app {instance_name} and phone number {cellphone_number}: {str(e)}')
+            break
 
+    logger.info('Message from app %s and phone number %s processed', instance_name, cellphone_number)
     return {
         'statusCode': 200,
         'body': json.dumps('Message processed successfully')
@@ -1,11 +1,19 @@
 import json
 import os
+import time
 from abc import ABC, abstractmethod
 from typing import Optional, Any, Callable, List, Dict
 
 from dotenv import load_dotenv
 from langchain_core.messages import SystemMessage, ToolMessage, AIMessage
-from langchain_openai import ChatOpenAI
+from langchain_core.runnables import RunnableConfig
+from langchain_core.output_parsers.openai_tools import PydanticToolsParser
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from lambdas.e_commerce_chatbot.generics.nodes.clients import get_chat_model
+from lambdas.e_commerce_chatbot.generics.nodes.context import CONTEXT_MAX_TOKENS, ContextBuilder
+from lambdas.e_commerce_chatbot.generics.nodes.usage import record_usage
+from lambdas.e_commerce_chatbot.memory.summary import summary_message
 
 load_dotenv()
 
@@ -22,7 +30,7 @@ class Node(ABC):
         self.state_update_fn = state_update_fn
 
     @abstractmethod
-    def process(self, state: Any, config: Dict) -> Dict:
+    def process(self, state: Any, config: RunnableConfig) -> Dict:
         pass
 
     def update_state(self, state: Any):
@@ -39,20 +47,56 @@ class LLMNode(Node, ABC):
             output_model: Optional[Any] = None,
             tool_choice: str = 'auto',
             tools: Optional[List] = None,
-            state_update_fn: Optional[Callable] = None
+            state_update_fn: Optional[Callable] = None,
+            max_context_tokens: int = CONTEXT_MAX_TOKENS
     ):
         super().__init__(name=name, tools=tools, state_update_fn=state_update_fn)
         self.system_message = system_message
+        # Prefixo estático do prompt, idêntico byte a byte em toda chamada para o cache de prompt do provedor
+        self.system_prefix = SystemMessage(content=system_message)
         self.msgs_to_extend = msgs_to_extend
+        # Com orçamento, o histórico é escolhido por tokens; sem ele, pela janela de msgs_to_extend
+        self.context_builder = ContextBuilder(max_tokens=max_context_tokens) if max_context_tokens > 0 else None
         self.output_model = output_model
         self.tool_choice = tool_choice
-        self.llm = ChatOpenAI(
-            temperature=0,
-            model=os.getenv('OPENAI_LLM_MODEL_NAME')
+        self.llm = get_chat_model(os.getenv('OPENAI_LLM_MODEL_NAME'), temperature=0)
+        # Montado uma vez na construção do grafo: os schemas das tools/output_model não são refeitos a cada turno
+        self.runnable = self.build_runnable()
+
+    def build_runnable(self) -> Any:
+        """Runnable invocado em `process`; subclasses ligam tools ou structured output ao modelo."""
+        return self.llm
+
+    def bind_output_model(self) -> Any:
+        """
+        Equivalente ao with_structured_output(method='function_calling'), mas o runnable devolve a
+        AIMessage (com o usage da resposta) e o parsing para o output_model fica em `_parsed`.
+        """
+        self.output_parser = PydanticToolsParser(tools=[self.output_model], first_tool_only=True)
+        return self.llm.bind_tools(
+            [self.output_model],
+            tool_choice=convert_to_openai_tool(self.output_model)['function']['name'],
+            parallel_tool_calls=False
         )
 
+    def _invoke(self, messages: List, config: Dict) -> Any:
+        """Invoca o runnable registrando tokens de entrada, tokens cacheados e latência do node."""
+        start = time.perf_counter()
+        result = self.runnable.invoke(messages, config)
+        record_usage(self.name, result, (time.perf_counter() - start) * 1000)
+        return result
+
     def _get_messages(self, state: Any) -> List:
-        messages = [SystemMessage(content=self.system_message)]
+        """
+        Ordem fixa do prompt: primeiro o que não muda entre chamadas (system prompt do node; as
+        tools vão antes das mensagens na requisição), depois o resumo e por fim o histórico.
+        """
+        summary_text = self._get_summary(state)
+        summary = summary_message(summary_text) if summary_text else None
+        if self.context_builder:
+            return self.context_builder.build(self.system_prefix, state['messages'], summary)
+
+        messages = [self.system_prefix] + ([summary] if summary else [])
 
         start_index = len(state['messages']) + self.msgs_to_extend if self.msgs_to_extend < 0 else self.msgs_to_extend
         start_index = max(0, start_index)
@@ -63,6 +107,15 @@ class LLMNode(Node, ABC):
         messages.extend(valid_messages)
         return messages
 
+    def _parsed(self, message: AIMessage) -> Any:
+        return self.output_parser.invoke(message)
+
+    @staticmethod
+    def _get_summary(state: Any) -> Optional[str]:
+        if isinstance(state, dict):
+            return state.get('summary')
+        return state['summary']
+
     @staticmethod
     def _validate_message_sequence(messages: List) -> List:
         valid_messages = []
@@ -91,7 +144,7 @@ class LLMNode(Node, ABC):
 
     @staticmethod
     def _handle_list_tool_message(messages: List) -> Optional[Dict]:
-        if isinstance(messages[-1], ToolMessage):
+        if messages and isinstance(messages[-1], ToolMessage):
             try:
                 content = json.loads(messages[-1].content)
                 if isinstance(content, Dict) and 'list_response' in content:
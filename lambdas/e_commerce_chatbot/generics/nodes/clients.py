@@ -0,0 +1,49 @@
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+import httpx
+from langchain_openai import ChatOpenAI
+
+# Conexões ociosas sobrevivem entre turnos da mesma conversa (o padrão do httpx fecha após 5s)
+KEEPALIVE_EXPIRY_SECONDS = float(os.getenv('LLM_HTTP_KEEPALIVE_SECONDS', '60'))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS', '20'))
+
+_lock = threading.Lock()
+_http_client: Optional[httpx.Client] = None
+_chat_models: Dict[Tuple[str, float], ChatOpenAI] = {}
+
+
+def get_http_client() -> httpx.Client:
+    """
+    Client httpx do processo: todos os nodes e invocações do container reaproveitam o mesmo
+    pool keep-alive, em vez de abrir (e fazer o handshake TLS de) um pool por ChatOpenAI.
+    """
+    global _http_client
+    with _lock:
+        if _http_client is None:
+            _http_client = httpx.Client(
+                limits=httpx.Limits(
+                    max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=KEEPALIVE_EXPIRY_SECONDS
+                )
+            )
+        return _http_client
+
+
+def get_chat_model(model: Optional[str] = None, temperature: float = 0) -> ChatOpenAI:
+    """
+    ChatOpenAI compartilhado por modelo e temperatura, todos usando o mesmo pool HTTP síncrono
+    (o grafo roda com `stream`, então só o client síncrono é usado).
+    """
+    model = model or os.getenv('OPENAI_LLM_MODEL_NAME')
+    key = (model, float(temperature))
+    http_client = get_http_client()
+    with _lock:
+        if key not in _chat_models:
+            _chat_models[key] = ChatOpenAI(
+                temperature=temperature,
+                model=model,
+                http_client=http_client
+            )
+        return _chat_models[key]
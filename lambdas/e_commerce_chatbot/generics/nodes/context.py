@@ -0,0 +1,176 @@
+import json
+import os
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage, SystemMessage, ToolMessage
+
+from shared.configs.logging_config import logger
+
+# Orçamento de tokens do prompt (system + histórico); 0 volta para a janela fixa de msgs_to_extend
+CONTEXT_MAX_TOKENS = int(os.getenv('LLM_CONTEXT_MAX_TOKENS', '6000'))
+# Saídas de tool maiores que isso (página de produto do Firecrawl, por exemplo) são truncadas
+TOOL_OUTPUT_MAX_TOKENS = int(os.getenv('LLM_TOOL_OUTPUT_MAX_TOKENS', '1500'))
+# Quando o histórico passa do orçamento, o início da janela avança de tantos em tantos blocos: o prefixo
+# (system, resumo e histórico mais antigo) se repete por vários turnos e o cache de prompt do provedor acerta
+CONTEXT_WINDOW_STEP = int(os.getenv('LLM_CONTEXT_WINDOW_STEP', '8'))
+# Tokens que o formato de chat acrescenta a cada mensagem (papel e separadores)
+MESSAGE_OVERHEAD_TOKENS = 4
+# Sem o tokenizer, estimativa conservadora de caracteres por token
+CHARS_PER_TOKEN = 3
+TRUNCATION_NOTICE = '\n[... saída truncada, {omitted} tokens omitidos]'
+# Entradas dos caches de contagem e de truncamento; ao encher, o cache é esvaziado
+TOKEN_COUNT_CACHE_MAX = 4096
+TRUNCATED_TEXT_CACHE_MAX = 256
+
+# Chaveados pelo hash e tamanho do texto, para o cache não manter vivos os textos (páginas de produto) já descartados
+_token_counts: Dict[Tuple[int, int, Optional[str]], int] = {}
+_truncated_texts: Dict[Tuple[int, int, Optional[str], int], str] = {}
+
+
+@lru_cache(maxsize=None)
+def _get_encoding(model_name: Optional[str]):
+    """
+    Encoding do tiktoken do modelo, carregado uma vez por processo. Retorna None se o tiktoken
+    não estiver disponível. No Lambda o arquivo do encoding vem no ZIP (TIKTOKEN_CACHE_DIR, ver
+    build.py); fora dele o tiktoken baixa o arquivo no primeiro uso.
+    """
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model_name or '')
+        except KeyError:
+            return tiktoken.get_encoding('o200k_base')
+    except Exception as e:
+        logger.warning(f"Tokenizer indisponível, estimando tokens por caracteres: {e}")
+        return None
+
+
+def _text_key(text: str, model_name: Optional[str]) -> Tuple[int, int, Optional[str]]:
+    # O hash da str fica guardado no próprio objeto: recontar o mesmo texto não percorre ele de novo
+    return hash(text), len(text), model_name
+
+
+def count_text_tokens(text: str, model_name: Optional[str] = None) -> int:
+    key = _text_key(text, model_name)
+    count = _token_counts.get(key)
+    if count is None:
+        encoding = _get_encoding(model_name)
+        if encoding is None:
+            count = -(-len(text) // CHARS_PER_TOKEN)
+        else:
+            count = len(encoding.encode(text, disallowed_special=()))
+        if len(_token_counts) >= TOKEN_COUNT_CACHE_MAX:
+            _token_counts.clear()
+        _token_counts[key] = count
+    return count
+
+
+def _message_text(message: BaseMessage) -> str:
+    content = message.content
+    if isinstance(content, list):
+        content = ' '.join(part.get('text', '') if isinstance(part, dict) else str(part) for part in content)
+    if isinstance(message, AIMessage) and message.tool_calls:
+        content += json.dumps([{'name': call.get('name'), 'args': call.get('args')} for call in message.tool_calls],
+                              ensure_ascii=False)
+    return content
+
+
+def count_message_tokens(message: BaseMessage, model_name: Optional[str] = None) -> int:
+    return count_text_tokens(_message_text(message), model_name) + MESSAGE_OVERHEAD_TOKENS
+
+
+def truncate_text(text: str, max_tokens: int, model_name: Optional[str] = None) -> str:
+    total = count_text_tokens(text, model_name)
+    if total <= max_tokens:
+        return text
+
+    key = _text_key(text, model_name) + (max_tokens,)
+    truncated = _truncated_texts.get(key)
+    if truncated is None:
+        encoding = _get_encoding(model_name)
+        if encoding is None:
+            head = text[:max_tokens * CHARS_PER_TOKEN]
+        else:
+            head = encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens])
+        truncated = head + TRUNCATION_NOTICE.format(omitted=total - max_tokens)
+        if len(_truncated_texts) >= TRUNCATED_TEXT_CACHE_MAX:
+            _truncated_texts.clear()
+        _truncated_texts[key] = truncated
+    return truncated
+
+
+def group_message_blocks(messages: List) -> List[List]:
+    """
+    Agrupa o histórico em blocos que entram ou saem juntos do contexto: uma AIMessage com
+    tool_calls leva junto as ToolMessages que respondem a ela. ToolMessages sem a chamada
+    correspondente são descartadas, como em LLMNode._validate_message_sequence.
+    """
+    blocks = []
+    pending_tool_call_ids = set()
+    for message in messages:
+        if isinstance(message, AIMessage) and message.tool_calls:
+            pending_tool_call_ids = {tool_call.get('id') for tool_call in message.tool_calls}
+            blocks.append([message])
+        elif isinstance(message, ToolMessage):
+            if message.tool_call_id in pending_tool_call_ids:
+                blocks[-1].append(message)
+                pending_tool_call_ids.remove(message.tool_call_id)
+        else:
+            pending_tool_call_ids = set()
+            blocks.append([message])
+    return blocks
+
+
+class ContextBuilder:
+    """
+    Monta o prompt de um LLMNode: system message (e o resumo da conversa, se houver) mais o
+    histórico mais recente que couber em `max_tokens`, sem separar chamadas de tool dos seus resultados. Saídas de tool acima de
+    `tool_output_max_tokens` são truncadas; a última mensagem sempre entra. O primeiro bloco
+    enviado fica alinhado a múltiplos de `window_step`, para o começo do histórico não mudar a cada turno.
+    """
+
+    def __init__(
+            self,
+            max_tokens: int = CONTEXT_MAX_TOKENS,
+            tool_output_max_tokens: int = TOOL_OUTPUT_MAX_TOKENS,
+            model_name: Optional[str] = None,
+            window_step: int = CONTEXT_WINDOW_STEP
+    ):
+        self.max_tokens = max_tokens
+        self.tool_output_max_tokens = tool_output_max_tokens
+        self.window_step = max(1, window_step)
+        self.model_name = model_name or os.getenv('OPENAI_LLM_MODEL_NAME')
+
+    def build(self, system_prefix: SystemMessage, messages: List, summary: Optional[SystemMessage] = None) -> List:
+        prefix = [system_prefix] + ([summary] if summary else [])
+        budget = self.max_tokens - sum(count_message_tokens(message, self.model_name) for message in prefix)
+
+        blocks = group_message_blocks(messages)
+        fitted = []
+        for block in reversed(blocks):
+            block = [self._fit_tool_output(message) for message in block]
+            block_tokens = sum(count_message_tokens(message, self.model_name) for message in block)
+            if fitted and block_tokens > budget:
+                break
+            fitted.append(block)
+            budget -= block_tokens
+
+        start = len(blocks) - len(fitted)
+        if start:
+            # Descarta alguns blocos a mais para o início da janela só mudar a cada `window_step` blocos
+            aligned_start = min(-(-start // self.window_step) * self.window_step, len(blocks) - 1)
+            fitted = fitted[:len(blocks) - aligned_start]
+
+        return prefix + [message for block in reversed(fitted) for message in block]
+
+    def _fit_tool_output(self, message: Any) -> Any:
+        if not isinstance(message, ToolMessage) or not isinstance(message.content, str):
+            return message
+        content = truncate_text(message.content, self.tool_output_max_tokens, self.model_name)
+        if content is message.content:
+            return message
+        return message.model_copy(update={'content': content})
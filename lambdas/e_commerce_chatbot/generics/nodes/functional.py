@@ -3,6 +3,7 @@ from typing import Any, Dict, List
 from typing import Optional, Callable
 
 from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.runnables import RunnableConfig
 from langgraph.constants import END
 from langgraph.prebuilt import ToolNode
 from langgraph.types import interrupt
@@ -16,7 +17,7 @@ class StaticResponseNode(Node):
         self.response = response
         self.tool_calls = tool_calls or []
 
-    def process(self, state: Any, config: Dict) -> Dict:
+    def process(self, state: Any, config: RunnableConfig) -> Dict:
         self.update_state(state)
         return {
             'messages': [AIMessage(content=str(self.response), tool_calls=self.tool_calls)]
@@ -34,7 +35,7 @@ class GetUserInputNode(Node):
         self.update_field = update_field
         self.format_response = format_response
 
-    def process(self, state: Any, config: Dict) -> Dict[str, Any]:
+    def process(self, state: Any, config: RunnableConfig) -> Dict[str, Any]:
         if os.getenv('ENV') == 'prod':
             response = interrupt("human_input")
             return {self.update_field: self.format_response(response)}
@@ -61,7 +62,7 @@ class ToolCallingNode(Node):
         self.tools = tools
         self.tool_node = ToolNode(self.tools)
 
-    def process(self, state: Any, config: Dict):
+    def process(self, state: Any, config: RunnableConfig):
         try:
             tool_result = self.tool_node
 
@@ -82,7 +83,7 @@ class FunctionalNode(Node):
         super().__init__(name)
         self.fn = fn
 
-    def process(self, state: Any, config: Dict) -> Dict:
+    def process(self, state: Any, config: RunnableConfig) -> Dict:
         result = self.fn(state)
 
         if not isinstance(result, Dict):
@@ -1,26 +1,27 @@
 from typing import Any, Dict
 from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableConfig
 
 from lambdas.e_commerce_chatbot.generics.nodes.base import LLMNode
 
 
 class SimpleLLMNode(LLMNode):
-    def process(self, state: Any, config: Dict) -> Dict:
+    def build_runnable(self) -> Any:
+        if not self.tools:
+            return self.llm
+        return self.llm.bind_tools(
+            tools=self.tools,
+            tool_choice=self.tool_choice
+        )
+
+    def process(self, state: Any, config: RunnableConfig) -> Dict:
         messages = self._get_messages(state)
-        tool_list_response = self._handle_list_tool_message(messages)
+        tool_list_response = self._handle_list_tool_message(state['messages'])
         if tool_list_response:
             return tool_list_response
 
         try:
-            llm_instance = self.llm
-
-            if self.tools:
-                llm_instance = self.llm.bind_tools(
-                    tools=self.tools,
-                    tool_choice=self.tool_choice
-                )
-
-            result = llm_instance.invoke(messages, config)
+            result = self._invoke(messages, config)
 
             return {
                 'messages': [AIMessage(content=result.content, tool_calls=result.tool_calls)]
@@ -31,18 +32,17 @@ class SimpleLLMNode(LLMNode):
 
 
 class StructuredOutputLLMNode(LLMNode):
-    def process(self, state: Any, config: Dict) -> Dict:
+    def build_runnable(self) -> Any:
+        return self.bind_output_model()
+
+    def process(self, state: Any, config: RunnableConfig) -> Dict:
         messages = self._get_messages(state)
-        tool_list_response = self._handle_list_tool_message(messages)
+        tool_list_response = self._handle_list_tool_message(state['messages'])
         if tool_list_response:
             return tool_list_response
 
         try:
-            llm_instance = self.llm.with_structured_output(
-                self.output_model, 
-                method='function_calling'
-            )
-            result = llm_instance.invoke(messages, config)
+            result = self._parsed(self._invoke(messages, config))
             return result.model_dump()
         except Exception as e:
             print(f'Erro ao gerar resposta estruturada: {e}')
@@ -60,14 +60,14 @@ class StateUpdateLLMNode(LLMNode):
         super().__init__(*args, **kwargs)
         self.state_field = state_field
 
-    def process(self, state: Any, config: Dict) -> Dict:
+    def process(self, state: Any, config: RunnableConfig) -> Dict:
         messages = self._get_messages(state)
-        tool_list_response = self._handle_list_tool_message(messages)
+        tool_list_response = self._handle_list_tool_message(state['messages'])
         if tool_list_response:
             return tool_list_response
 
         try:
-            result = self.llm.invoke(messages, config)
+            result = self._invoke(messages, config)
 
             return {self.state_field: result.content}
         except Exception as e:
@@ -87,17 +87,16 @@ class StateUpdateStructureOutputLLMNode(LLMNode):
         self.state_field = state_field
         self.attribute = attribute
 
-    def process(self, state: Any, config: Dict) -> Dict:
+    def build_runnable(self) -> Any:
+        return self.bind_output_model()
+
+    def process(self, state: Any, config: RunnableConfig) -> Dict:
         messages = self._get_messages(state)
-        tool_list_response = self._handle_list_tool_message(messages)
+        tool_list_response = self._handle_list_tool_message(state['messages'])
         if tool_list_response:
             return tool_list_response
         try: 
-            llm_instance = self.llm.with_structured_output(
-                self.output_model,
-                method='function_calling'
-            )
-            result = llm_instance.invoke(messages, config)
+            result = self._parsed(self._invoke(messages, config))
             result_parsed = result.model_dump()
             return{self.state_field: result_parsed[self.attribute]}
         except Exception as e:
@@ -0,0 +1,65 @@
+import threading
+from typing import Any, Dict
+
+from shared.configs.logging_config import logger
+
+_lock = threading.Lock()
+_stats: Dict[str, Dict[str, float]] = {}
+
+
+def _token_usage(message: Any) -> Dict[str, int]:
+    """
+    Tokens de entrada, cacheados pelo provedor e de saída de uma resposta do ChatOpenAI. Usa o
+    `usage_metadata` e, em versões antigas do langchain-openai, o `token_usage` da resposta.
+    """
+    usage = getattr(message, 'usage_metadata', None) or {}
+    if usage:
+        details = usage.get('input_token_details') or {}
+        return {
+            'input_tokens': usage.get('input_tokens', 0),
+            'cached_tokens': details.get('cache_read', 0) or 0,
+            'output_tokens': usage.get('output_tokens', 0)
+        }
+
+    token_usage = (getattr(message, 'response_metadata', None) or {}).get('token_usage') or {}
+    details = token_usage.get('prompt_tokens_details') or {}
+    return {
+        'input_tokens': token_usage.get('prompt_tokens', 0),
+        'cached_tokens': details.get('cached_tokens', 0) or 0,
+        'output_tokens': token_usage.get('completion_tokens', 0)
+    }
+
+
+def record_usage(node_name: str, message: Any, latency_ms: float) -> None:
+    """Acumula por node os tokens (e quantos vieram do cache de prompt do provedor) e a latência."""
+    usage = _token_usage(message)
+    with _lock:
+        stats = _stats.setdefault(node_name, {
+            'calls': 0, 'input_tokens': 0, 'cached_tokens': 0, 'output_tokens': 0, 'latency_ms': 0.0
+        })
+        stats['calls'] += 1
+        stats['latency_ms'] += latency_ms
+        for key, value in usage.items():
+            stats[key] += value
+
+    logger.info(f"LLM usage node={node_name} input_tokens={usage['input_tokens']} "
+                f"cached_tokens={usage['cached_tokens']} output_tokens={usage['output_tokens']} "
+                f"latency_ms={latency_ms:.0f}")
+
+
+def usage_stats() -> Dict[str, Dict[str, float]]:
+    """Totais por node no container, com a taxa de acerto do cache e a latência média."""
+    with _lock:
+        result = {}
+        for node_name, stats in _stats.items():
+            result[node_name] = dict(
+                stats,
+                cache_hit_rate=stats['cached_tokens'] / stats['input_tokens'] if stats['input_tokens'] else 0.0,
+                mean_latency_ms=stats['latency_ms'] / stats['calls']
+            )
+        return result
+
+
+def reset_usage_stats() -> None:
+    with _lock:
+        _stats.clear()
@@ -1,4 +1,4 @@
-from typing import Annotated
+from typing import Annotated, Optional
 
 from langchain_core.messages import AnyMessage
 from langgraph.graph import add_messages
@@ -7,6 +7,8 @@ from pydantic import BaseModel
 
 class MessagesState(BaseModel):
     messages: Annotated[list[AnyMessage], add_messages]
+    # Mensagens antigas resumidas pelo ConversationSummarizer (memory/summary.py)
+    summary: Optional[str] = None
 
     def __getitem__(self, item):
         return getattr(self, item, None)
\ No newline at end of file
@@ -3,6 +3,18 @@ from typing import Optional, Dict, TypedDict, Callable
 from langgraph.graph import StateGraph
 
 
+def bind_config(process_func: Callable, config: Optional[Dict] = None) -> Callable:
+    """
+    Fixa um config no node apenas quando ele for informado.
+    Sem config, o próprio LangGraph injeta o config da execução, o que permite
+    compilar o grafo uma única vez e reaproveitá-lo entre threads. O LangGraph só injeta
+    no parâmetro anotado como `RunnableConfig`, por isso os `process` dos nodes usam essa anotação.
+    """
+    if config is None:
+        return process_func
+    return lambda state: process_func(state, config)
+
+
 class SubgraphBuilder:
     def __init__(self, state: type(TypedDict), name: str, suffix: str):
         self.graph = StateGraph(state)
@@ -19,12 +31,7 @@ class SubgraphBuilder:
         if process_func is None:
             process_func = node.process
 
-        if config is None:
-            callable_process = process_func
-        else:
-            callable_process = lambda state: process_func(state, config)
-
-        self.graph.add_node(node_name, callable_process)
+        self.graph.add_node(node_name, bind_config(process_func, config))
         return node_name
 
     def add_edge(self, from_node: str, to_node: str):
@@ -7,6 +7,7 @@ from lambdas.e_commerce_chatbot.generics.nodes.llm import StructuredOutputLLMNod
 from lambdas.e_commerce_chatbot.graphs.prompts import ROUTER_PROMPT
 from lambdas.e_commerce_chatbot.memory.checkpointer import DynamoDBSaver
 from lambdas.e_commerce_chatbot.generics.flow import save_graph_as_png
+from lambdas.e_commerce_chatbot.generics.subgraphs import bind_config
 
 from lambdas.e_commerce_chatbot.subgraphs.generic.subgraph import create_generic_subgraph
 from lambdas.e_commerce_chatbot.subgraphs.cancelation.subgraph import create_fallback_subgraph
@@ -62,8 +63,8 @@ def create_workflow(config: Dict = None):
         return routes.get(state['route'], subgraph_generic.name)
     
     
-    workflow.add_node(get_user_input.name, lambda state: get_user_input.process(state, config))
-    workflow.add_node(router_node.name, lambda state: router_node.process(state, config))
+    workflow.add_node(get_user_input.name, bind_config(get_user_input.process, config))
+    workflow.add_node(router_node.name, bind_config(router_node.process, config))
     
     
     workflow.add_edge(START, router_node.name)
@@ -86,11 +87,34 @@ def create_workflow(config: Dict = None):
     return workflow.compile()
 
 
+_cached_workflow = None
+
+
+def is_graph_cache_enabled() -> bool:
+    return os.getenv('GRAPH_CACHE_ENABLED', 'true').lower() == 'true'
+
+
+def get_workflow(config: Dict = None):
+    """
+    Retorna o grafo compilado uma única vez por container.
+    O config da thread é passado em tempo de execução (graph.stream(..., config=config)),
+    então o mesmo grafo atende qualquer thread. Com GRAPH_CACHE_ENABLED=false o grafo
+    volta a ser construído a cada chamada, com o config fixado nos nodes.
+    """
+    global _cached_workflow
+
+    if not is_graph_cache_enabled():
+        return create_workflow(config=config)
+
+    if _cached_workflow is None:
+        _cached_workflow = create_workflow()
+    return _cached_workflow
+
 
 def run_graph():
     config = {"configurable": {"thread_id": "+5511999999999"}}
 
-    graph = create_workflow(config=config)
+    graph = get_workflow(config=config)
     if os.getenv('ENV') == 'dev':
         save_graph_as_png(graph, 'docs/graph_img/graph.png')
         pass
@@ -8,15 +8,24 @@ import boto3
 from langchain_core.messages import HumanMessage
 from langgraph.types import Command
 
-from lambdas.e_commerce_chatbot.graph import create_workflow
+from lambdas.e_commerce_chatbot.graph import get_workflow, get_user_input
 from lambdas.e_commerce_chatbot.memory.amnesia import check_for_amnesia_commands
 from lambdas.e_commerce_chatbot.memory.utils import verify_checkpointer
 from shared.configs.logging_config import logger
 from lambdas.e_commerce_chatbot.memory.log_manager import LogManager
+from lambdas.e_commerce_chatbot.memory.summary import ConversationSummarizer
 from lambdas.e_commerce_chatbot.utils.lambda_utils import validate_event, split_message, bold_correction
+from lambdas.e_commerce_chatbot.utils.debounce_utils import is_debounce_event, process_debounced_turns
 
 from lambdas.e_commerce_chatbot.send_message import send_message_to_wpp
 
+summarizer = ConversationSummarizer()
+lambda_client = boto3.client('lambda')
+
+# Evento da invocação assíncrona que a própria Lambda dispara para resumir o histórico de uma thread
+SUMMARY_EVENT_KEY = 'summarize_thread_id'
+
+
 def create_thread_config(instance: str, cellphone: str) -> dict:
     """
     Cria a configuração do thread baseado na instância e número do celular.
@@ -25,24 +34,6 @@ def create_thread_config(instance: str, cellphone: str) -> dict:
     return {"configurable": {"thread_id": thread_id}}
 
 
-def verify_checkpointer(config: Dict) -> bool:
-    thread_id = config["configurable"]["thread_id"]
-
-    dynamodb_client = boto3.client('dynamodb')
-    checkpointer_table = os.getenv('DYNAMODB_CHECKPOINT_TABLE')
-
-    try:
-        response = dynamodb_client.query(
-            TableName=checkpointer_table,
-            KeyConditionExpression="thread_id = :thread_id_value",
-            ExpressionAttributeValues={":thread_id_value": {"S": thread_id}}
-        )
-        return response.get('Count', 0) > 0
-    except Exception as e:
-        logger.error(f"Erro ao verificar thread_id {thread_id} na tabela {checkpointer_table}: {e}")
-        return False
-
-
 def initialize_state(user_message: str, has_checkpoint: bool) -> dict:
     if has_checkpoint:
         return {"messages": HumanMessage(content=user_message)}
@@ -77,6 +68,20 @@ def stream_graph(graph, input_data, config: Dict):
     return collected_outputs
 
 
+def flush_checkpoint_writes(graph) -> None:
+    """Grava os writes que o checkpointer ainda mantém em buffer antes de a Lambda ser congelada."""
+    checkpointer = getattr(graph, 'checkpointer', None)
+    if hasattr(checkpointer, 'flush_writes'):
+        checkpointer.flush_writes()
+
+
+def clear_prefetched_checkpoints(graph) -> None:
+    """Descarta checkpoints pré-carregados que não foram usados, para não servir um estado antigo em outra invocação."""
+    checkpointer = getattr(graph, 'checkpointer', None)
+    if hasattr(checkpointer, 'clear_prefetched'):
+        checkpointer.clear_prefetched()
+
+
 def process_graph(graph, state, config, user_message, has_checkpoint) -> list:
     log_manager = LogManager()
     thread_id = config["configurable"]["thread_id"]
@@ -85,7 +90,10 @@ def process_graph(graph, state, config, user_message, has_checkpoint) -> list:
         input_data = state
         if has_checkpoint:
             input_data = Command(resume=user_message) if user_message else state
-        collected_outputs = stream_graph(graph, input_data, config)
+        try:
+            collected_outputs = stream_graph(graph, input_data, config)
+        finally:
+            flush_checkpoint_writes(graph)
 
         log_manager.format_and_save(thread_id, state, user_message, dict(collected_outputs))
 
@@ -95,7 +103,56 @@ def process_graph(graph, state, config, user_message, has_checkpoint) -> list:
         raise
 
 
+def summarize_history(graph, config) -> None:
+    """
+    Resume as mensagens antigas da thread. Uma falha aqui não afeta nenhuma resposta: o resumo
+    é tentado de novo depois do próximo turno.
+    """
+    try:
+        if summarizer.maybe_summarize(graph, config, waiting_node=get_user_input.name):
+            flush_checkpoint_writes(graph)
+    except Exception as e:
+        logger.error(f"Erro ao resumir o histórico de {config['configurable']['thread_id']}: {e}")
+
+
+def schedule_summary(graph, config) -> None:
+    """
+    Dispara o resumo numa invocação assíncrona (InvocationType='Event') desta mesma Lambda, para
+    que a chamada ao LLM do resumo não atrase o retorno do turno nem o próximo turno do debounce.
+    Fora da Lambda (sem AWS_LAMBDA_FUNCTION_NAME) o resumo roda no próprio processo.
+    """
+    thread_id = config["configurable"]["thread_id"]
+    try:
+        if not summarizer.needs_summary(graph, config, waiting_node=get_user_input.name):
+            return
+
+        function_name = os.getenv('AWS_LAMBDA_FUNCTION_NAME')
+        if not function_name:
+            summarize_history(graph, config)
+            return
+
+        lambda_client.invoke(
+            FunctionName=function_name,
+            InvocationType='Event',
+            Payload=json.dumps({SUMMARY_EVENT_KEY: thread_id})
+        )
+    except Exception as e:
+        logger.error(f"Erro ao agendar o resumo do histórico de {thread_id}: {e}")
+
+
 def lambda_handler(event, context):
+    if SUMMARY_EVENT_KEY in event:
+        config = {"configurable": {"thread_id": event[SUMMARY_EVENT_KEY]}}
+        summarize_history(get_workflow(config=config), config)
+        return {"statusCode": 200, "body": json.dumps("Summary processed")}
+
+    if is_debounce_event(event):
+        response = process_debounced_turns(event, lambda turn_event: lambda_handler(turn_event, context))
+        return response or {
+            "statusCode": 200,
+            "body": json.dumps("Message was updated, skipping processing")
+        }
+
     validation_error = validate_event(event, ['phone_number', 'message', 'instance'])
     if validation_error:
         return validation_error
@@ -110,11 +167,13 @@ def lambda_handler(event, context):
     if special_response:
         return send_message_to_wpp(phone_number, special_response, instance)
 
-    graph = create_workflow(config=config)
-    has_checkpoint = verify_checkpointer(config)
-    state = initialize_state(user_message, has_checkpoint)
+    graph = get_workflow(config=config)
+    clear_prefetched_checkpoints(graph)
 
     try:
+        has_checkpoint = verify_checkpointer(config, checkpointer=graph.checkpointer)
+        state = initialize_state(user_message, has_checkpoint)
+
         response_messages = process_graph(graph, state, config, user_message, has_checkpoint)
         logger.info(f"response_messages: {response_messages}")
 
@@ -124,6 +183,8 @@ def lambda_handler(event, context):
             for part in split_messages:
                 send_message_to_wpp(phone_number, part, instance)
 
+        schedule_summary(graph, config)
+
         return {
             "statusCode": 200,
             "body": json.dumps({"messages_sent": len(response_messages)})
@@ -133,3 +194,5 @@ def lambda_handler(event, context):
             "statusCode": 500,
             "body": json.dumps({"error": str(e)})
         }
+    finally:
+        clear_prefetched_checkpoints(graph)
@@ -1,9 +1,11 @@
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 import boto3
 from boto3.dynamodb.conditions import Key
-from typing import Any, Tuple, Dict, Iterator, Optional, Sequence
-import time
+from typing import Any, Tuple, Dict, Iterator, List, Optional, Sequence
 
 from langchain_core.runnables import RunnableConfig
 
@@ -18,6 +20,7 @@ from langgraph.checkpoint.base import (
 
 from langgraph.checkpoint.serde.base import SerializerProtocol
 
+from lambdas.e_commerce_chatbot.memory.serde import build_serializer
 from lambdas.e_commerce_chatbot.memory.write import Write
 from shared.configs.logging_config import logger
 
@@ -25,7 +28,11 @@ from shared.configs.logging_config import logger
 class DynamoDBSaver(BaseCheckpointSaver):
     """A checkpoint saver that stores checkpoints in DynamoDB using JSON-compatible formats."""
 
-    WIDTH = 20  # Width for zero-padding timestamps
+    WIDTH = 20  # Width for zero-padding timestamps (legacy sort keys)
+    WRITES_TAIL_PAGE_SIZE = 10  # Writes read speculatively alongside the latest checkpoint
+    RETENTION_PRUNE_INTERVAL = 10  # Prune every N steps instead of on every put
+    BATCH_WRITE_SIZE = 25  # BatchWriteItem request limit
+    BATCH_WRITE_BACKOFF = 0.05  # Seconds before the first resend of UnprocessedItems
 
     def __init__(
             self,
@@ -34,30 +41,330 @@ class DynamoDBSaver(BaseCheckpointSaver):
             region_name: str = os.getenv('CHECKPOINTER_AWS_REGION'),
             endpoint_url: Optional[str] = None,
             serde: Optional[SerializerProtocol] = None,
+            legacy_lookup: bool = os.getenv('CHECKPOINTER_LEGACY_LOOKUP', 'true').lower() == 'true',
+            concurrent_reads: bool = os.getenv('CHECKPOINTER_CONCURRENT_READS', 'false').lower() == 'true',
+            retention_checkpoints: Optional[int] = int(os.getenv('CHECKPOINTER_RETENTION_CHECKPOINTS', '0')) or None,
+            ttl_seconds: Optional[int] = int(os.getenv('CHECKPOINTER_TTL_SECONDS', '0')) or None,
+            buffer_writes: bool = os.getenv('CHECKPOINTER_BUFFER_WRITES', 'false').lower() == 'true',
     ) -> None:
-        super().__init__(serde=serde)
+        super().__init__(serde=serde or build_serializer())
         self.dynamodb = boto3.resource('dynamodb', region_name=region_name, endpoint_url=endpoint_url)
         self.table = self.dynamodb.Table(table_name)
-        self.writes_table = self.dynamodb.Table(writes_table_name)
+        self.legacy_lookup = legacy_lookup
+        self.concurrent_reads = concurrent_reads
+        self.retention_checkpoints = retention_checkpoints
+        self.ttl_seconds = ttl_seconds
+        self.buffer_writes = buffer_writes
+        # Writes not yet sent to DynamoDB, keyed by primary key so a rewritten write replaces the old one
+        self._write_buffer: Dict[Tuple[str, str], Dict] = {}
+        self._write_buffer_lock = threading.Lock()
+        # Latest checkpoint tuple loaded by `prefetch_tuple`, consumed by the next `get_tuple` of the thread
+        self._prefetched: Dict[Tuple[str, str], Optional[CheckpointTuple]] = {}
+
+        if concurrent_reads:
+            # boto3 resources are not thread-safe, so the writes table gets its own session
+            writes_dynamodb = boto3.session.Session().resource(
+                'dynamodb', region_name=region_name, endpoint_url=endpoint_url)
+            self.writes_table = writes_dynamodb.Table(writes_table_name)
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='checkpoint-writes')
+        else:
+            self.writes_table = self.dynamodb.Table(writes_table_name)
+            self._executor = None
+
+    @staticmethod
+    def checkpoint_sort_key(checkpoint_ns: str, checkpoint_id: str) -> str:
+        """Checkpoint ids are time-ordered (uuid6), so the sort key keeps the latest checkpoint last."""
+        return f'{checkpoint_ns}#{checkpoint_id}'
+
+    def _get_checkpoint_item(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> Optional[Dict]:
+        """Fetch a specific checkpoint with a single GetItem."""
+        response = self.table.get_item(
+            Key={'thread_id': thread_id, 'sort_key': self.checkpoint_sort_key(checkpoint_ns, checkpoint_id)}
+        )
+        item = response.get('Item')
+        if item is None and self.legacy_lookup:
+            item = self._find_legacy_checkpoint_item(thread_id, checkpoint_ns, checkpoint_id)
+        return item
+
+    def _find_legacy_checkpoint_item(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> Optional[Dict]:
+        """
+        Fallback for checkpoints written with the old timestamp sort key, which can only be
+        found by filtering the partition. Follows LastEvaluatedKey so long threads are not
+        silently truncated at the 1 MB page limit.
+        """
+        query_kwargs = {
+            'KeyConditionExpression': Key('thread_id').eq(thread_id) & Key('sort_key').begins_with(
+                f'{checkpoint_ns}#'),
+            'FilterExpression': Key('checkpoint_id').eq(checkpoint_id),
+        }
+        return next(self._query_items(self.table, query_kwargs), None)
+
+    @staticmethod
+    def _query_items(table, query_kwargs: Dict) -> Iterator[Dict]:
+        """Lazily yield query results, fetching the next page only when the current one is consumed."""
+        query_kwargs = dict(query_kwargs)
+        while True:
+            response = table.query(**query_kwargs)
+            yield from response.get('Items', [])
+            if 'LastEvaluatedKey' not in response:
+                return
+            query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    def _load_metadata(self, item: Dict) -> CheckpointMetadata:
+        metadata = item['metadata']
+        if hasattr(metadata, 'value'):
+            metadata = bytes(metadata.value)
+
+        try:
+            # Items written before `metadata_type` existed share the checkpoint's type tag
+            metadata_type = item.get('metadata_type', item['type'])
+            deserialized_metadata = self.serde.loads_typed((metadata_type, metadata))
+            if isinstance(deserialized_metadata, (tuple, list)) and len(deserialized_metadata) > 1:
+                return deserialized_metadata[1]
+            return deserialized_metadata
+        except Exception as e:
+            logger.error(f"Erro ao deserializar metadata: {str(e)}", exc_info=True)
+            return {}
+
+    def _load_checkpoint(self, item: Dict) -> Checkpoint:
+        checkpoint_data = item['checkpoint']
+        if hasattr(checkpoint_data, 'value'):
+            checkpoint_data = bytes(checkpoint_data.value)
+        return self.serde.loads_typed((item['type'], checkpoint_data))
+
+    def _expires_at(self) -> Optional[int]:
+        """Epoch seconds for the table's TTL attribute; idle threads expire as a whole."""
+        if not self.ttl_seconds:
+            return None
+        return int(time.time()) + self.ttl_seconds
+
+    @staticmethod
+    def _delete_keys(table, keys: Sequence[Dict]) -> None:
+        # batch_writer sends 25-item BatchWriteItem requests and resends UnprocessedItems
+        with table.batch_writer() as batch:
+            for key in keys:
+                batch.delete_item(Key=key)
+
+    def prune(self, thread_id: str, keep_last: Optional[int] = None) -> int:
+        """
+        Delete all but the newest `keep_last` checkpoints of a thread, together with the writes of the
+        deleted checkpoints.
+
+        Every subgraph call opens its own `node:task_id` namespace, so retention applies to the whole
+        thread: a subgraph namespace whose checkpoints are all older than the latest root checkpoint
+        belongs to a task that already finished and is deleted entirely. Only the namespaces of the
+        task running from the latest root checkpoint (e.g. an interrupted subgraph) are kept, and
+        trimmed to `keep_last` like the root namespace.
+        Returns the number of checkpoints deleted.
+        """
+        keep_last = keep_last or self.retention_checkpoints
+        if not keep_last:
+            raise ValueError("keep_last or retention_checkpoints must be set to prune checkpoints")
+
+        query_kwargs = {
+            'KeyConditionExpression': Key('thread_id').eq(thread_id),
+            'ScanIndexForward': False,
+            'ProjectionExpression': 'thread_id, sort_key, checkpoint_id',
+        }
+        checkpoints_by_ns: Dict[str, List[Dict]] = {}
+        for item in self._query_items(self.table, query_kwargs):
+            checkpoints_by_ns.setdefault(item['sort_key'].split('#')[0], []).append(item)
+
+        root_checkpoints = checkpoints_by_ns.get('')
+        if not root_checkpoints:
+            return 0
+        latest_root_checkpoint_id = root_checkpoints[0]['checkpoint_id']
+
+        expired_checkpoints, expired_writes = [], []
+        for checkpoint_ns, checkpoints in checkpoints_by_ns.items():
+            if checkpoint_ns and checkpoints[0]['checkpoint_id'] < latest_root_checkpoint_id:
+                expired = checkpoints
+                writes_condition = Key('sort_key').begins_with(f'{checkpoint_ns}#')
+            else:
+                retained, expired = checkpoints[:keep_last], checkpoints[keep_last:]
+                if not expired:
+                    continue
+                # Write sort keys start with '{ns}#{checkpoint_id}#', so every write older than the
+                # oldest retained checkpoint falls in a single key range
+                writes_condition = Key('sort_key').between(
+                    f'{checkpoint_ns}#', self.checkpoint_sort_key(checkpoint_ns, retained[-1]['checkpoint_id']))
+
+            expired_checkpoints.extend(expired)
+            expired_writes.extend(self._query_items(self.writes_table, {
+                'KeyConditionExpression': Key('thread_id').eq(thread_id) & writes_condition,
+                'ProjectionExpression': 'thread_id, sort_key',
+            }))
+
+        if not expired_checkpoints:
+            return 0
+
+        self._delete_keys(
+            self.table, [{'thread_id': thread_id, 'sort_key': item['sort_key']} for item in expired_checkpoints])
+        self._delete_keys(self.writes_table, expired_writes)
+
+        logger.info(f"Pruned {len(expired_checkpoints)} checkpoint(s) of thread {thread_id}")
+        return len(expired_checkpoints)
+
+    @staticmethod
+    def _parent_config(thread_id: str, checkpoint_ns: str, item: Dict) -> Optional[RunnableConfig]:
+        parent_checkpoint_id = item.get('parent_checkpoint_id')
+        if not parent_checkpoint_id:
+            return None
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": parent_checkpoint_id,
+            }
+        }
+
+    @staticmethod
+    def _matches_filter(metadata: CheckpointMetadata, filter: Optional[Dict[str, Any]]) -> bool:
+        if not filter:
+            return True
+        return all(metadata.get(key) == value for key, value in filter.items())
+
+    def _load_write(self, write_item: Dict) -> Tuple[str, str, Any]:
+        value_data = write_item['value']
+        if hasattr(value_data, 'value'):
+            value_data = bytes(value_data.value)
+
+        value = self.serde.loads_typed((write_item['type'], value_data))
+        return write_item['task_id'], write_item['channel'], value
+
+    def _load_pending_writes(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> List[Tuple[str, str, Any]]:
+        write_sort_key_prefix = f'{checkpoint_ns}#{checkpoint_id}#'
+        query_kwargs = {
+            'KeyConditionExpression': Key('thread_id').eq(thread_id) & Key('sort_key').begins_with(
+                write_sort_key_prefix),
+            'ScanIndexForward': True
+        }
+        return [self._load_write(write_item) for write_item in self._query_items(self.writes_table, query_kwargs)]
+
+    def _query_writes_tail(self, thread_id: str, checkpoint_ns: str) -> Tuple[List[Dict], bool]:
+        """
+        Read the newest writes of the namespace. Write sort keys embed the time-ordered checkpoint id,
+        so the pending writes of the latest checkpoint sit at the end of the partition and can be
+        fetched before the latest checkpoint id is known.
+        """
+        response = self.writes_table.query(
+            KeyConditionExpression=Key('thread_id').eq(thread_id) & Key('sort_key').begins_with(f'{checkpoint_ns}#'),
+            ScanIndexForward=False,
+            Limit=self.WRITES_TAIL_PAGE_SIZE
+        )
+        return response.get('Items', []), 'LastEvaluatedKey' in response
+
+    def _pending_writes_from_tail(
+            self,
+            tail: Tuple[List[Dict], bool],
+            thread_id: str,
+            checkpoint_ns: str,
+            checkpoint_id: str
+    ) -> List[Tuple[str, str, Any]]:
+        write_items, has_more = tail
+        write_sort_key_prefix = f'{checkpoint_ns}#{checkpoint_id}#'
+
+        if has_more and write_items[-1]['sort_key'] >= write_sort_key_prefix:
+            # The tail page did not reach past this checkpoint's writes, read them explicitly
+            return self._load_pending_writes(thread_id, checkpoint_ns, checkpoint_id)
+
+        matching_items = [item for item in write_items if item['sort_key'].startswith(write_sort_key_prefix)]
+        return [self._load_write(write_item) for write_item in reversed(matching_items)]
+
+    def _batch_write(self, items_by_table: Dict[str, List[Dict]]) -> None:
+        """
+        Put items of one or more tables in full 25-item BatchWriteItem calls, resending
+        UnprocessedItems with exponential backoff until DynamoDB accepts all of them.
+        """
+        requests = [
+            (table_name, {'PutRequest': {'Item': item}})
+            for table_name, items in items_by_table.items()
+            for item in items
+        ]
+
+        for start in range(0, len(requests), self.BATCH_WRITE_SIZE):
+            request_items: Dict[str, List[Dict]] = {}
+            for table_name, request in requests[start:start + self.BATCH_WRITE_SIZE]:
+                request_items.setdefault(table_name, []).append(request)
+
+            attempt = 0
+            while request_items:
+                if attempt:
+                    time.sleep(min(self.BATCH_WRITE_BACKOFF * 2 ** (attempt - 1), 1))
+                response = self.dynamodb.batch_write_item(RequestItems=request_items)
+                request_items = response.get('UnprocessedItems')
+                attempt += 1
+
+    def _take_buffered_writes(self) -> List[Dict]:
+        with self._write_buffer_lock:
+            items, self._write_buffer = list(self._write_buffer.values()), {}
+        return items
+
+    def flush_writes(self) -> int:
+        """
+        Send the writes buffered by `put_writes` (with `buffer_writes`). `put` flushes them together with
+        the next checkpoint; call this at the end of an invocation, since the writes of an interrupted
+        step are not followed by another checkpoint. Returns the number of writes sent.
+        """
+        items = self._take_buffered_writes()
+        if items:
+            self._batch_write({self.writes_table.name: items})
+        return len(items)
+
+    def prefetch_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """
+        Load the latest checkpoint of a thread ahead of a run (e.g. to know whether the thread exists).
+        The next `get_tuple` for the same thread and namespace returns this tuple instead of reading it
+        again; any `put`/`put_writes` on the thread discards it.
+        """
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        config = {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns}}
+
+        self._prefetched.pop((thread_id, checkpoint_ns), None)
+        checkpoint_tuple = self.get_tuple(config)
+        self._prefetched[(thread_id, checkpoint_ns)] = checkpoint_tuple
+        return checkpoint_tuple
+
+    def clear_prefetched(self) -> None:
+        """
+        Drop prefetched tuples that were not consumed. Call at the start and end of each invocation: the
+        container outlives it, and another container may have advanced the thread in the meantime.
+        """
+        self._prefetched.clear()
 
     def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
-        """Fetch a checkpoint tuple using a given configuration."""
+        """
+        Fetch a checkpoint tuple using a given configuration.
+
+        With `concurrent_reads` the pending writes are queried in a background thread while the
+        checkpoint is read, so a resumed turn pays for one round trip instead of two.
+        """
+        if self.buffer_writes:
+            self.flush_writes()
+
         thread_id = config["configurable"]["thread_id"]
         checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
         checkpoint_id = get_checkpoint_id(config)
 
+        if not checkpoint_id and (thread_id, checkpoint_ns) in self._prefetched:
+            return self._prefetched.pop((thread_id, checkpoint_ns))
+
+        writes_future = None
+        writes_tail_future = None
+
         if checkpoint_id:
-            # Need to scan for item with matching checkpoint_id
-            response = self.table.query(
-                KeyConditionExpression=Key('thread_id').eq(thread_id) & Key('sort_key').begins_with(
-                    f'{checkpoint_ns}#'),
-                FilterExpression=Key('checkpoint_id').eq(checkpoint_id)
-            )
-            items = response.get('Items', [])
-            if not items:
+            if self._executor:
+                writes_future = self._executor.submit(
+                    self._load_pending_writes, thread_id, checkpoint_ns, checkpoint_id)
+
+            item = self._get_checkpoint_item(thread_id, checkpoint_ns, checkpoint_id)
+            if item is None:
                 return None
-            item = items[0]
         else:
+            if self._executor:
+                writes_tail_future = self._executor.submit(self._query_writes_tail, thread_id, checkpoint_ns)
+
             # Fetch the latest checkpoint for the thread_id and checkpoint_ns
             response = self.table.query(
                 KeyConditionExpression=Key('thread_id').eq(thread_id) & Key('sort_key').begins_with(
@@ -81,69 +388,19 @@ class DynamoDBSaver(BaseCheckpointSaver):
             "checkpoint_id": checkpoint_id,
         }
 
-        checkpoint_type = item['type']
-
-        checkpoint_data = item['checkpoint']
-        if hasattr(checkpoint_data, 'value'):
-            checkpoint_data = bytes(checkpoint_data.value)
-
-        # Deserialize checkpoint data
-        checkpoint = self.serde.loads_typed((checkpoint_type, checkpoint_data))
+        checkpoint = self._load_checkpoint(item)
 
         # Get pending writes from "checkpoint_writes" table
-        write_sort_key_prefix = f'{checkpoint_ns}#{checkpoint_id}#'
-        pending_writes = []
-
-        # Query writes_table
-        response = self.writes_table.query(
-            KeyConditionExpression=Key('thread_id').eq(thread_id) & Key('sort_key').begins_with(write_sort_key_prefix),
-            ScanIndexForward=True
-        )
-        write_items = response.get('Items', [])
-
-        for write_item in write_items:
-            task_id = write_item['task_id']
-            channel = write_item['channel']
-            value_type = write_item['type']
-            value_data = write_item['value']
-
-            if hasattr(value_data, 'value'):
-                value_data = bytes(value_data.value)
-
-            value = self.serde.loads_typed((value_type, value_data))
-            pending_writes.append((task_id, channel, value))
-
-        metadata = item['metadata']
-        if hasattr(metadata, 'value'):
-            metadata = bytes(metadata.value)
-
-        logger.info(f"Checkpoint type: {checkpoint_type}")
-        logger.info(f"Raw metadata type: {type(metadata)}")
-
-        try:
-            deserialized_metadata = self.serde.loads_typed((checkpoint_type, metadata))
-            if isinstance(deserialized_metadata, (tuple, list)) and len(deserialized_metadata) > 1:
-                metadata = deserialized_metadata[1]
-            else:
-                metadata = deserialized_metadata
-
-            logger.info(f"Deserialized metadata type: {type(metadata)}")
-        except Exception as e:
-            logger.error(f"Erro ao deserializar metadata: {str(e)}", exc_info=True)
-            metadata = {}
-
-        # Get parent config if any
-        parent_checkpoint_id = item.get('parent_checkpoint_id')
-        if parent_checkpoint_id:
-            parent_config = {
-                "configurable": {
-                    "thread_id": thread_id,
-                    "checkpoint_ns": checkpoint_ns,
-                    "checkpoint_id": parent_checkpoint_id,
-                }
-            }
+        if writes_future is not None:
+            pending_writes = writes_future.result()
+        elif writes_tail_future is not None:
+            pending_writes = self._pending_writes_from_tail(
+                writes_tail_future.result(), thread_id, checkpoint_ns, checkpoint_id)
         else:
-            parent_config = None
+            pending_writes = self._load_pending_writes(thread_id, checkpoint_ns, checkpoint_id)
+
+        metadata = self._load_metadata(item)
+        parent_config = self._parent_config(thread_id, checkpoint_ns, item)
 
         return CheckpointTuple(
             {"configurable": config_values},
@@ -161,73 +418,72 @@ class DynamoDBSaver(BaseCheckpointSaver):
             before: Optional[RunnableConfig] = None,
             limit: Optional[int] = None,
     ) -> Iterator[CheckpointTuple]:
-        """List checkpoints that match a given configuration and filter criteria."""
+        """
+        List checkpoints newest first, lazily paging through the partition as the caller iterates.
+
+        `before` is pushed into the sort key condition and metadata filters are evaluated
+        before the checkpoint blob is deserialized, so memory stays constant on long threads.
+        """
 
         if config is None:
             raise ValueError("config must be provided for listing checkpoints in DynamoDB")
 
+        if self.buffer_writes:
+            self.flush_writes()
+
         thread_id = config["configurable"]["thread_id"]
         checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
         checkpoint_ns_prefix = f'{checkpoint_ns}#'
 
+        before_checkpoint_id = get_checkpoint_id(before) if before else None
+        if before_checkpoint_id:
+            sort_key_condition = Key('sort_key').between(
+                checkpoint_ns_prefix, self.checkpoint_sort_key(checkpoint_ns, before_checkpoint_id))
+        else:
+            sort_key_condition = Key('sort_key').begins_with(checkpoint_ns_prefix)
+
         query_kwargs = {
-            'KeyConditionExpression': Key('thread_id').eq(thread_id) & Key('sort_key').begins_with(
-                checkpoint_ns_prefix),
+            'KeyConditionExpression': Key('thread_id').eq(thread_id) & sort_key_condition,
             'ScanIndexForward': False  # Descending order
         }
 
-        if limit is not None:
-            query_kwargs['Limit'] = limit
+        if limit is not None and not filter:
+            # Page size only; the BETWEEN bound is inclusive, so leave room for the `before` item itself
+            query_kwargs['Limit'] = limit + 1 if before_checkpoint_id else limit
 
-        response = self.table.query(**query_kwargs)
-        items = response.get('Items', [])
+        yielded = 0
+        for item in self._query_items(self.table, query_kwargs):
+            if item['checkpoint_id'] == before_checkpoint_id:
+                continue
 
-        for item in items:
             try:
-                checkpoint_type = item['type']
-                checkpoint_data = item['checkpoint']
-                if hasattr(checkpoint_data, 'value'):
-                    checkpoint_data = bytes(checkpoint_data.value)
-
-                checkpoint = self.serde.loads_typed((checkpoint_type, checkpoint_data))
-
-                sort_key_parts = item['sort_key'].split('#')
-                checkpoint_ns = sort_key_parts[0]
-                checkpoint_id = item['checkpoint_id']
-
-                metadata = item['metadata']
-                if hasattr(metadata, 'value'):
-                    metadata = bytes(metadata.value)
-                metadata = self.serde.loads_typed((checkpoint_type, metadata))[1]
-
-                parent_checkpoint_id = item.get('parent_checkpoint_id')
-                if parent_checkpoint_id:
-                    parent_config = {
-                        "configurable": {
-                            "thread_id": item['thread_id'],
-                            "checkpoint_ns": checkpoint_ns,
-                            "checkpoint_id": parent_checkpoint_id,
-                        }
-                    }
-                else:
-                    parent_config = None
+                metadata = self._load_metadata(item)
+                if not self._matches_filter(metadata, filter):
+                    continue
 
-                yield CheckpointTuple(
+                checkpoint_ns = item['sort_key'].split('#')[0]
+                checkpoint_tuple = CheckpointTuple(
                     {
                         "configurable": {
                             "thread_id": item['thread_id'],
                             "checkpoint_ns": checkpoint_ns,
-                            "checkpoint_id": checkpoint_id,
+                            "checkpoint_id": item['checkpoint_id'],
                         }
                     },
-                    checkpoint,
+                    self._load_checkpoint(item),
                     metadata,
-                    parent_config,
+                    self._parent_config(item['thread_id'], checkpoint_ns, item),
                 )
             except Exception as e:
-                logger.error(f"Erro ao processar item {item}: {str(e)}", exc_info=True)
+                logger.error(f"Erro ao processar item {item['sort_key']}: {str(e)}", exc_info=True)
                 continue
 
+            yield checkpoint_tuple
+
+            yielded += 1
+            if limit is not None and yielded >= limit:
+                return
+
     def put(
             self,
             config: RunnableConfig,
@@ -235,17 +491,24 @@ class DynamoDBSaver(BaseCheckpointSaver):
             metadata: CheckpointMetadata,
             new_versions: ChannelVersions,
     ) -> RunnableConfig:
-        """Store a checkpoint with its configuration and metadata."""
+        """
+        Store a checkpoint with its configuration and metadata.
+
+        With `buffer_writes` the writes buffered since the previous checkpoint are sent in the same
+        BatchWriteItem call as the checkpoint item, so a step costs one request instead of two.
+        """
 
         thread_id = config["configurable"]["thread_id"]
         checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
         checkpoint_id = checkpoint["id"]
-        checkpoint_created_at = int(time.time() * 1000)
-        sort_key = f'{checkpoint_ns}#{checkpoint_created_at:0{self.WIDTH}d}'
+        sort_key = self.checkpoint_sort_key(checkpoint_ns, checkpoint_id)
+        self._prefetched.pop((thread_id, checkpoint_ns), None)
+
+        parent_checkpoint_id = config["configurable"].get("checkpoint_id")
 
         type_, checkpoint_data = self.serde.dumps_typed(checkpoint)
 
-        parent_checkpoint_id = config["configurable"].get("checkpoint_id")
+        metadata_type, metadata_data = self.serde.dumps_typed(metadata)
 
         item = {
             'thread_id': thread_id,
@@ -254,10 +517,23 @@ class DynamoDBSaver(BaseCheckpointSaver):
             'parent_checkpoint_id': parent_checkpoint_id,
             'type': type_,
             'checkpoint': checkpoint_data,
-            'metadata': self.serde.dumps_typed(metadata)[1],
+            'metadata_type': metadata_type,
+            'metadata': metadata_data,
         }
 
-        self.table.put_item(Item=item)
+        expires_at = self._expires_at()
+        if expires_at:
+            item['expires_at'] = expires_at
+
+        if self.buffer_writes:
+            self._batch_write({self.table.name: [item], self.writes_table.name: self._take_buffered_writes()})
+        else:
+            self.table.put_item(Item=item)
+
+        # Subgraph namespaces are pruned along with the thread when the root graph checkpoints
+        if (self.retention_checkpoints and not checkpoint_ns
+                and metadata.get('step', 0) % self.RETENTION_PRUNE_INTERVAL == 0):
+            self.prune(thread_id)
 
         return {
             "configurable": {
@@ -281,19 +557,33 @@ class DynamoDBSaver(BaseCheckpointSaver):
         if checkpoint_id is None:
             raise ValueError("Missing checkpoint_id")
 
-        with self.writes_table.batch_writer() as batch:
-            for idx, (channel, value) in enumerate(writes):
-                type_, serialized_value = self.serde.dumps_typed(value)
-
-                write = Write(
-                    thread_id=thread_id,
-                    checkpoint_ns=checkpoint_ns,
-                    checkpoint_id=checkpoint_id,
-                    task_id=task_id,
-                    idx=idx,
-                    channel=channel,
-                    type=type_,
-                    value=serialized_value
-                )
+        self._prefetched.pop((thread_id, checkpoint_ns), None)
+        expires_at = self._expires_at()
+
+        items = []
+        for idx, (channel, value) in enumerate(writes):
+            type_, serialized_value = self.serde.dumps_typed(value)
+
+            write = Write(
+                thread_id=thread_id,
+                checkpoint_ns=checkpoint_ns,
+                checkpoint_id=checkpoint_id,
+                task_id=task_id,
+                idx=idx,
+                channel=channel,
+                type=type_,
+                value=serialized_value,
+                expires_at=expires_at
+            )
+            items.append(write.to_dynamodb_item())
+
+        if self.buffer_writes:
+            # Sent with the next checkpoint (see `put`) or by `flush_writes`
+            with self._write_buffer_lock:
+                for item in items:
+                    self._write_buffer[(item['thread_id'], item['sort_key'])] = item
+            return
 
-                batch.put_item(Item=write.to_dynamodb_item())
+        with self.writes_table.batch_writer() as batch:
+            for item in items:
+                batch.put_item(Item=item)
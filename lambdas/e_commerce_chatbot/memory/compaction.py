@@ -0,0 +1,119 @@
+import argparse
+import os
+from typing import Dict, Optional, Tuple
+
+import boto3
+from boto3.dynamodb.conditions import Key
+
+from lambdas.e_commerce_chatbot.memory.checkpointer import DynamoDBSaver
+from shared.configs.logging_config import logger
+
+
+def _scan_keys(table):
+    scan_kwargs = {'ProjectionExpression': 'thread_id, sort_key'}
+    while True:
+        response = table.scan(**scan_kwargs)
+        yield from response.get('Items', [])
+        if 'LastEvaluatedKey' not in response:
+            return
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+class CheckpointCompactor:
+    """
+    Job de compactação das tabelas do checkpointer.
+
+    Remove os `checkpoint_writes` de checkpoints superados (qualquer checkpoint anterior ao último
+    da thread/namespace, cujos writes já foram aplicados no checkpoint seguinte) ou que não existem
+    mais. As remoções são feitas em lotes de 25 itens via BatchWriteItem.
+    """
+
+    def __init__(
+            self,
+            table_name: str,
+            writes_table_name: str,
+            region_name: Optional[str] = None,
+            endpoint_url: Optional[str] = None,
+            dry_run: bool = False,
+    ) -> None:
+        dynamodb_resource = boto3.resource('dynamodb', region_name=region_name, endpoint_url=endpoint_url)
+        self.table = dynamodb_resource.Table(table_name)
+        self.writes_table = dynamodb_resource.Table(writes_table_name)
+        self.dry_run = dry_run
+        self._latest_checkpoint_ids: Dict[Tuple[str, str], Optional[str]] = {}
+
+    def _latest_checkpoint_id(self, thread_id: str, checkpoint_ns: str) -> Optional[str]:
+        key = (thread_id, checkpoint_ns)
+        if key not in self._latest_checkpoint_ids:
+            response = self.table.query(
+                KeyConditionExpression=Key('thread_id').eq(thread_id) & Key('sort_key').begins_with(
+                    f'{checkpoint_ns}#'),
+                ScanIndexForward=False,
+                Limit=1,
+                ProjectionExpression='checkpoint_id',
+            )
+            items = response.get('Items', [])
+            self._latest_checkpoint_ids[key] = items[0]['checkpoint_id'] if items else None
+        return self._latest_checkpoint_ids[key]
+
+    def _delete(self, batch, key: Dict) -> None:
+        if self.dry_run:
+            logger.debug(f"[dry-run] Removeria {key}")
+            return
+        batch.delete_item(Key=key)
+
+    def compact_writes(self) -> int:
+        deleted = 0
+        with self.writes_table.batch_writer() as batch:
+            for key in _scan_keys(self.writes_table):
+                checkpoint_ns, checkpoint_id = key['sort_key'].split('#')[:2]
+                latest_checkpoint_id = self._latest_checkpoint_id(key['thread_id'], checkpoint_ns)
+
+                if latest_checkpoint_id is None or checkpoint_id < latest_checkpoint_id:
+                    self._delete(batch, key)
+                    deleted += 1
+
+        logger.info(f"Compactação de writes concluída: {deleted} item(ns) removido(s)")
+        return deleted
+
+    def run(self) -> Dict[str, int]:
+        return {'writes': self.compact_writes()}
+
+
+def prune_all_threads(saver: DynamoDBSaver, keep_last: int) -> int:
+    """
+    Aplica a retenção de `keep_last` checkpoints em todas as threads da tabela, removendo também os
+    namespaces de subgrafos já concluídos (ver `DynamoDBSaver.prune`).
+    """
+    thread_ids = {key['thread_id'] for key in _scan_keys(saver.table)}
+
+    return sum(saver.prune(thread_id, keep_last=keep_last) for thread_id in thread_ids)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compacta as tabelas de checkpoints e writes.')
+    parser.add_argument('--table-name', default=os.getenv('DYNAMODB_CHECKPOINT_TABLE'))
+    parser.add_argument('--writes-table-name', default=os.getenv('DYNAMODB_WRITES_TABLE'))
+    parser.add_argument('--region-name', default=os.getenv('CHECKPOINTER_AWS_REGION'))
+    parser.add_argument('--endpoint-url', default=None, help='ex.: http://localhost:8000 para o DynamoDB Local')
+    parser.add_argument('--keep-last', type=int, default=None, help='também aplica a retenção em todas as threads')
+    parser.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args()
+
+    if args.keep_last and not args.dry_run:
+        saver = DynamoDBSaver(
+            table_name=args.table_name,
+            writes_table_name=args.writes_table_name,
+            region_name=args.region_name,
+            endpoint_url=args.endpoint_url,
+        )
+        logger.info(f"Retenção aplicada: {prune_all_threads(saver, args.keep_last)} checkpoint(s) removido(s)")
+
+    compactor = CheckpointCompactor(
+        table_name=args.table_name,
+        writes_table_name=args.writes_table_name,
+        region_name=args.region_name,
+        endpoint_url=args.endpoint_url,
+        dry_run=args.dry_run,
+    )
+    logger.info(f"Compactação concluída: {compactor.run()}")
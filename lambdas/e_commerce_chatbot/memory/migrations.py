@@ -0,0 +1,77 @@
+import argparse
+import os
+from typing import Dict, Optional
+
+import boto3
+
+from lambdas.e_commerce_chatbot.memory.checkpointer import DynamoDBSaver
+from shared.configs.logging_config import logger
+
+
+def _is_legacy_sort_key(sort_key: str) -> bool:
+    """Sort keys antigos usam o timestamp em milissegundos com zero-padding (`{ns}#{timestamp}`)."""
+    suffix = sort_key.rsplit('#', 1)[-1]
+    return len(suffix) == DynamoDBSaver.WIDTH and suffix.isdigit()
+
+
+def migrate_checkpoint_sort_keys(
+        table_name: str,
+        region_name: Optional[str] = None,
+        endpoint_url: Optional[str] = None,
+        dry_run: bool = False,
+) -> Dict[str, int]:
+    """
+    Regrava os checkpoints com sort_key por timestamp no formato `{ns}#{checkpoint_id}`,
+    permitindo buscar um checkpoint específico com um único GetItem.
+    A migração é idempotente: itens já migrados são ignorados.
+    """
+    dynamodb_resource = boto3.resource('dynamodb', region_name=region_name, endpoint_url=endpoint_url)
+    table = dynamodb_resource.Table(table_name)
+
+    stats = {'scanned': 0, 'migrated': 0}
+    scan_kwargs = {}
+
+    logger.info(f"Iniciando migração de sort_key na tabela '{table_name}' (dry_run={dry_run})")
+
+    while True:
+        response = table.scan(**scan_kwargs)
+        items = response.get('Items', [])
+        stats['scanned'] += len(items)
+
+        legacy_items = [item for item in items if _is_legacy_sort_key(item['sort_key'])]
+
+        if legacy_items and not dry_run:
+            with table.batch_writer() as batch:
+                for item in legacy_items:
+                    checkpoint_ns = item['sort_key'].rsplit('#', 1)[0]
+                    new_item = dict(item)
+                    new_item['sort_key'] = DynamoDBSaver.checkpoint_sort_key(checkpoint_ns, item['checkpoint_id'])
+
+                    batch.put_item(Item=new_item)
+                    batch.delete_item(Key={'thread_id': item['thread_id'], 'sort_key': item['sort_key']})
+                    logger.debug(f"Migrando {item['sort_key']} -> {new_item['sort_key']}")
+
+        stats['migrated'] += len(legacy_items)
+
+        if 'LastEvaluatedKey' not in response:
+            break
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    logger.info(f"Migração concluída na tabela '{table_name}': {stats}")
+    return stats
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Migra os sort_keys da tabela de checkpoints.')
+    parser.add_argument('--table-name', default=os.getenv('DYNAMODB_CHECKPOINT_TABLE'))
+    parser.add_argument('--region-name', default=os.getenv('CHECKPOINTER_AWS_REGION'))
+    parser.add_argument('--endpoint-url', default=None)
+    parser.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args()
+
+    migrate_checkpoint_sort_keys(
+        table_name=args.table_name,
+        region_name=args.region_name,
+        endpoint_url=args.endpoint_url,
+        dry_run=args.dry_run,
+    )
@@ -0,0 +1,84 @@
+import os
+import zlib
+from typing import Any, Optional, Tuple
+
+from langgraph.checkpoint.serde.base import SerializerProtocol
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+COMPRESSION_NONE = 'none'
+COMPRESSION_ZLIB = 'zlib'
+COMPRESSION_ZSTD = 'zstd'
+
+
+def load_zstandard():
+    """
+    Imports `zstandard` only when zstd is used: it is optional (zlib is always available) and is
+    not shipped in the Lambda package. Returns None when it is not installed.
+    """
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+class CompressedSerializer(SerializerProtocol):
+    """
+    Wraps another serializer (msgpack via JsonPlusSerializer by default) and compresses its output.
+
+    The codec is appended to the stored type tag (e.g. `msgpack+zstd`), the same convention
+    LangGraph uses for encrypted payloads, so items written without compression keep loading.
+    """
+
+    def __init__(
+            self,
+            compression: str = COMPRESSION_ZLIB,
+            serde: Optional[SerializerProtocol] = None,
+            min_size: int = 1024,
+            level: Optional[int] = None,
+    ) -> None:
+        if compression not in (COMPRESSION_NONE, COMPRESSION_ZLIB, COMPRESSION_ZSTD):
+            raise ValueError(f"Unsupported compression: {compression}")
+        if compression == COMPRESSION_ZSTD and load_zstandard() is None:
+            raise ValueError("zstd compression requires the 'zstandard' package")
+
+        self.compression = compression
+        self.serde = serde or JsonPlusSerializer()
+        self.min_size = min_size
+        self.level = level
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        type_, data = self.serde.dumps_typed(obj)
+
+        # Small payloads (metadata, most writes) do not shrink enough to pay for the codec
+        if self.compression == COMPRESSION_NONE or len(data) < self.min_size:
+            return type_, data
+
+        return f'{type_}+{self.compression}', self._compress(data)
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        type_, payload = data
+        base_type, _, codec = type_.partition('+')
+
+        if codec in (COMPRESSION_ZLIB, COMPRESSION_ZSTD):
+            return self.serde.loads_typed((base_type, self._decompress(codec, payload)))
+        return self.serde.loads_typed(data)
+
+    def _compress(self, data: bytes) -> bytes:
+        if self.compression == COMPRESSION_ZSTD:
+            return load_zstandard().ZstdCompressor(level=self.level or 3).compress(data)
+        return zlib.compress(data, self.level or 6)
+
+    @staticmethod
+    def _decompress(codec: str, data: bytes) -> bytes:
+        if codec == COMPRESSION_ZSTD:
+            zstandard = load_zstandard()
+            if zstandard is None:
+                raise ValueError("Cannot read zstd-compressed checkpoint without the 'zstandard' package")
+            return zstandard.ZstdDecompressor().decompress(data)
+        return zlib.decompress(data)
+
+
+def build_serializer(compression: Optional[str] = None) -> CompressedSerializer:
+    """Builds the checkpoint serializer from CHECKPOINTER_COMPRESSION (none, zlib or zstd)."""
+    return CompressedSerializer(compression=compression or os.getenv('CHECKPOINTER_COMPRESSION', COMPRESSION_ZLIB))
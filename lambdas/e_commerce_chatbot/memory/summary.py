@@ -0,0 +1,126 @@
+import os
+from typing import List, Optional
+
+from langchain_core.messages import AIMessage, HumanMessage, RemoveMessage, SystemMessage, ToolMessage
+
+from lambdas.e_commerce_chatbot.generics.nodes.clients import get_chat_model
+from lambdas.e_commerce_chatbot.generics.nodes.context import truncate_text
+from shared.configs.logging_config import logger
+
+# A cada quantos turnos antigos (mensagens do cliente fora da janela recente) o resumo é refeito; 0 desliga
+SUMMARY_EVERY_TURNS = int(os.getenv('CONVERSATION_SUMMARY_EVERY_TURNS', '10'))
+# Mensagens mais recentes que continuam no canal `messages` depois do resumo
+SUMMARY_KEEP_MESSAGES = int(os.getenv('CONVERSATION_SUMMARY_KEEP_MESSAGES', '12'))
+SUMMARY_TOOL_OUTPUT_MAX_TOKENS = 300
+
+SUMMARY_PROMPT = (
+    'Você mantém a memória de longo prazo de um atendimento de e-commerce pelo WhatsApp. '
+    'Atualize o resumo com as mensagens novas. Preserve dados do cliente, números de pedido, '
+    'produtos citados, problemas relatados, o que já foi respondido e o que ficou pendente. '
+    'Responda só com o resumo, em tópicos curtos.'
+)
+
+
+def summary_message(summary: str) -> SystemMessage:
+    """Como o resumo entra no prompt dos nodes, logo depois da system message."""
+    return SystemMessage(content=f'Resumo da conversa até aqui:\n{summary}')
+
+
+def split_for_summary(messages: List, keep_messages: int = SUMMARY_KEEP_MESSAGES) -> int:
+    """
+    Índice a partir do qual as mensagens ficam no histórico. O corte nunca cai entre uma
+    chamada de tool e os seus resultados.
+    """
+    index = max(0, len(messages) - keep_messages)
+    while index > 0 and isinstance(messages[index], ToolMessage):
+        index -= 1
+    return index
+
+
+def _transcript(messages: List) -> str:
+    lines = []
+    for message in messages:
+        content = message.content if isinstance(message.content, str) else str(message.content)
+        if isinstance(message, HumanMessage):
+            lines.append(f'Cliente: {content}')
+        elif isinstance(message, ToolMessage):
+            lines.append(f'Resultado de ferramenta: {truncate_text(content, SUMMARY_TOOL_OUTPUT_MAX_TOKENS)}')
+        elif isinstance(message, AIMessage) and content:
+            lines.append(f'Assistente: {content}')
+    return '\n'.join(lines)
+
+
+class ConversationSummarizer:
+    """
+    Dobra as mensagens antigas da thread no campo `summary` do estado e as remove do canal
+    `messages` com RemoveMessage, mantendo checkpoint e prompt de tamanho limitado.
+
+    Roda numa invocação assíncrona da Lambda disparada depois do turno, fora do tempo de
+    resposta, e só quando o grafo está parado no get_user_input do grafo principal: com um
+    subgrafo interrompido, o estado dele ainda guarda as mensagens antigas e as devolveria ao terminar.
+    """
+
+    def __init__(
+            self,
+            every_turns: int = SUMMARY_EVERY_TURNS,
+            keep_messages: int = SUMMARY_KEEP_MESSAGES,
+            llm=None
+    ):
+        self.every_turns = every_turns
+        self.keep_messages = keep_messages
+        self.llm = llm or get_chat_model(os.getenv('OPENAI_LLM_MODEL_NAME'), temperature=0)
+
+    def should_summarize(self, messages: List) -> bool:
+        if self.every_turns <= 0:
+            return False
+        older = messages[:split_for_summary(messages, self.keep_messages)]
+        return sum(isinstance(message, HumanMessage) for message in older) >= self.every_turns
+
+    def summarize(self, previous_summary: Optional[str], messages: List) -> str:
+        prompt = [
+            SystemMessage(content=SUMMARY_PROMPT),
+            HumanMessage(content=f'Resumo atual:\n{previous_summary or "(vazio)"}\n\n'
+                                 f'Mensagens novas:\n{_transcript(messages)}')
+        ]
+        return self.llm.invoke(prompt).content
+
+    def _pending_snapshot(self, graph, config: dict, waiting_node: str):
+        """Snapshot da thread se ela está parada em `waiting_node` e já tem turnos para resumir."""
+        if getattr(graph, 'checkpointer', None) is None:
+            return None
+
+        snapshot = graph.get_state(config)
+        if snapshot.next != (waiting_node,):
+            return None
+        if not self.should_summarize(snapshot.values.get('messages', [])):
+            return None
+        return snapshot
+
+    def needs_summary(self, graph, config: dict, waiting_node: str) -> bool:
+        """Verificação barata (só lê o checkpoint) usada para decidir se vale disparar o resumo."""
+        return self._pending_snapshot(graph, config, waiting_node) is not None
+
+    def maybe_summarize(self, graph, config: dict, waiting_node: str) -> bool:
+        """
+        Resume a thread se ela acumulou `every_turns` turnos fora da janela recente.
+        Retorna True quando o estado foi atualizado.
+        """
+        snapshot = self._pending_snapshot(graph, config, waiting_node)
+        if snapshot is None:
+            return False
+
+        messages = snapshot.values.get('messages', [])
+        older = messages[:split_for_summary(messages, self.keep_messages)]
+        summary = self.summarize(snapshot.values.get('summary'), older)
+
+        # Um turno novo pode ter começado enquanto o resumo era gerado; nesse caso fica para depois
+        if graph.get_state(config).next != (waiting_node,):
+            return False
+
+        graph.update_state(config, {
+            'summary': summary,
+            'messages': [RemoveMessage(id=message.id) for message in older]
+        })
+        logger.info(f"Resumo atualizado para {config['configurable']['thread_id']}: "
+                    f"{len(older)} mensagens removidas do histórico")
+        return True
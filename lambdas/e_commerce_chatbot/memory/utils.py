@@ -5,20 +5,44 @@ import boto3
 
 from shared.configs.logging_config import logger
 
+_dynamodb_client = None
+
+
+def _get_dynamodb_client():
+    global _dynamodb_client
+    if _dynamodb_client is None:
+        _dynamodb_client = boto3.client('dynamodb')
+    return _dynamodb_client
+
+
+def _thread_has_checkpoint(thread_id: str) -> bool:
+    """Sonda com Limit=1: lê no máximo um item da partição em vez da partição inteira."""
+    response = _get_dynamodb_client().query(
+        TableName=os.getenv('DYNAMODB_CHECKPOINT_TABLE'),
+        KeyConditionExpression="thread_id = :thread_id_value",
+        ExpressionAttributeValues={":thread_id_value": {"S": thread_id}},
+        Select='COUNT',
+        Limit=1
+    )
+    return response.get('Count', 0) > 0
 
-def verify_checkpointer(config: Dict) -> bool:
-    thread_id = config["configurable"]["thread_id"]
 
-    dynamodb_client = boto3.client('dynamodb')
-    checkpointer_table = os.getenv('DYNAMODB_CHECKPOINT_TABLE')
+def verify_checkpointer(config: Dict, checkpointer=None) -> bool:
+    """
+    Indica se o thread já tem checkpoint.
+
+    Com o checkpointer do grafo, o último checkpoint é carregado por `prefetch_tuple` e reaproveitado
+    pelo `get_tuple` que o LangGraph faz em seguida, sem leitura extra. Sem checkpointer, usa uma
+    sonda com Limit=1.
+    """
+    thread_id = config["configurable"]["thread_id"]
 
     try:
-        response = dynamodb_client.query(
-            TableName=checkpointer_table,
-            KeyConditionExpression="thread_id = :thread_id_value",
-            ExpressionAttributeValues={":thread_id_value": {"S": thread_id}}
-        )
-        return response.get('Count', 0) > 0
+        if hasattr(checkpointer, 'prefetch_tuple'):
+            return checkpointer.prefetch_tuple(config) is not None
+
+        return _thread_has_checkpoint(thread_id)
     except Exception as e:
-        logger.error(f"Erro ao verificar thread_id {thread_id} na tabela {checkpointer_table}: {e}")
+        logger.error(f"Erro ao verificar thread_id {thread_id} na tabela {os.getenv('DYNAMODB_CHECKPOINT_TABLE')}: {e}")
         return False
+
@@ -1,4 +1,4 @@
-from typing import Any
+from typing import Any, Optional
 
 
 class Write:
@@ -12,6 +12,7 @@ class Write:
             channel: str,
             type: str,
             value: Any,
+            expires_at: Optional[int] = None,
     ):
         self.thread_id = thread_id
         self.checkpoint_ns = checkpoint_ns
@@ -21,9 +22,10 @@ class Write:
         self.channel = channel
         self.type = type
         self.value = value
+        self.expires_at = expires_at
 
     def to_dynamodb_item(self):
-        return {
+        item = {
             'thread_id': self.thread_id,
             'sort_key': f"{self.checkpoint_ns}#{self.checkpoint_id}#{self.task_id}#{self.idx:010d}",
             'task_id': self.task_id,
@@ -32,6 +34,9 @@ class Write:
             'type': self.type,
             'value': self.value
         }
+        if self.expires_at:
+            item['expires_at'] = self.expires_at
+        return item
 
     @classmethod
     def from_dynamodb_item(cls, item):
@@ -49,5 +54,6 @@ class Write:
             idx=item['idx'],
             channel=item['channel'],
             type=item['type'],
-            value=value
+            value=value,
+            expires_at=item.get('expires_at')
         )
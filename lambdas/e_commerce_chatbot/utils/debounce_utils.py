@@ -0,0 +1,48 @@
+import os
+from typing import Callable, Optional
+
+import boto3
+
+from lambdas.debouncer.common.debounce_state import DynamoDBMessageStore, dispatch_deadline, message_text
+from shared.configs.logging_config import logger
+
+# Tabela de debounce do post_message; só definida quando o Step Functions invoca o chatbot diretamente
+DEBOUNCE_DYNAMODB_TABLE = os.getenv('DEBOUNCE_DYNAMODB_TABLE')
+message_store = DynamoDBMessageStore(
+    boto3.resource('dynamodb').Table(DEBOUNCE_DYNAMODB_TABLE)) if DEBOUNCE_DYNAMODB_TABLE else None
+
+
+def is_debounce_event(event: dict) -> bool:
+    """Entrada do Step Functions de debounce, quando ele invoca o chatbot sem o process_message."""
+    return 'cellphone_number' in event and 'last_update' in event
+
+
+def process_debounced_turns(event: dict, handle_turn: Callable[[dict], dict], store=None) -> Optional[dict]:
+    """
+    Responde a conversa do debounce com o mesmo claim/release do process_message: a conversa fica
+    `dispatched` enquanto o turno roda, então os fragmentos que chegam no meio dele ficam no item
+    em vez de abrir outra execução, e viram o turno seguinte nesta mesma invocação.
+    Retorna a resposta do último turno, ou None quando chegou mensagem mais nova (a execução dela
+    responde a conversa). Levanta MediaPendingError enquanto há mídias em extração.
+    """
+    store = store or message_store
+    instance_name, cellphone_number = event['instance_name'], event['cellphone_number']
+
+    def turn_event(message: str, last_update: int) -> dict:
+        return {'instance': instance_name, 'phone_number': cellphone_number, 'message': message,
+                'last_update': last_update}
+
+    if store is None:
+        return handle_turn(turn_event(event.get('message'), event['last_update']))
+
+    item = store.claim_message(instance_name, cellphone_number, event['last_update'], dispatch_deadline())
+    if item is None:
+        logger.info(f"Mensagem atualizada, ignorando a execução de {cellphone_number}")
+        return None
+
+    response = None
+    while item is not None:
+        last_update = int(item['last_update'])
+        response = handle_turn(turn_event(message_text(item) or event.get('message'), last_update))
+        item = store.release_message(instance_name, cellphone_number, last_update, dispatch_deadline())
+    return response
@@ -34,6 +34,24 @@ module "dynamodb_received_messages" {
   range_key_type = "S"
 }
 
+# Ids das mensagens do WhatsApp já recebidas, para descartar reenvios do webhook
+module "dynamodb_webhook_dedup" {
+  source             = "./modules/aws/dynamodb"
+  table_name         = "conversational_debouncer_webhook_dedup"
+  hash_key_name      = "message_id"
+  hash_key_type      = "S"
+  ttl_attribute_name = "expires_at"
+}
+
+# Cache de transcrições e descrições de imagem (chave: modelo + SHA-256 da mídia)
+module "dynamodb_extraction_cache" {
+  source             = "./modules/aws/dynamodb"
+  table_name         = "conversational_debouncer_extraction_cache"
+  hash_key_name      = "cache_key"
+  hash_key_type      = "S"
+  ttl_attribute_name = "expires_at"
+}
+
 
 
 
@@ -136,11 +154,17 @@ module "lambda_post_message" {
   zip_file      = "./deployments/post_message.zip"
   layers = []
   environment_variables = {
-    STEP_FUNCTION_ARN        = module.step_function_whatsapp_debounce.state_machine_arn
-    DYNAMODB_TABLE           = module.dynamodb_received_messages.table_name
-    OPENAI_API_KEY           = var.openai_api_key
-    OPENAI_AUDIO_MODEL_NAME  = "whisper-1"
-    OPENAI_VISION_MODEL_NAME = "gpt-4o-mini"
+    STEP_FUNCTION_ARN             = module.step_function_whatsapp_debounce.state_machine_arn
+    DYNAMODB_TABLE                = module.dynamodb_received_messages.table_name
+    OPENAI_API_KEY                = var.openai_api_key
+    OPENAI_AUDIO_MODEL_NAME       = "whisper-1"
+    OPENAI_VISION_MODEL_NAME      = "gpt-4o-mini"
+    DEBOUNCE_WINDOW_POLICY        = "adaptive"
+    # Áudios e imagens são extraídos numa invocação assíncrona da própria Lambda
+    MEDIA_EXTRACTION_MODE         = "async"
+    MEDIA_PENDING_TIMEOUT_SECONDS = "30"
+    EXTRACTION_CACHE_TABLE        = module.dynamodb_extraction_cache.table_name
+    WEBHOOK_DEDUP_TABLE           = module.dynamodb_webhook_dedup.table_name
   }
 
   create_api_gw        = true
@@ -155,9 +179,13 @@ module "lambda_process_message" {
   role_arn      = aws_iam_role.lambda_role.arn
   zip_file      = "./deployments/process_message.zip"
   layers = []
+  # Invoca o chatbot de forma síncrona; precisa cobrir o timeout dele e o turno das mensagens enfileiradas
+  timeout       = 60
   environment_variables = {
     DYNAMODB_TABLE             = module.dynamodb_received_messages.table_name
     PROCESSING_LAMBDA_FUNCTION = module.lambda_conversational.function_name
+    PROCESSING_INVOCATION_TYPE = "RequestResponse"
+    DISPATCH_TIMEOUT_SECONDS   = "60"
     # add your chatbot lambda function name here
   }
 
@@ -195,6 +223,11 @@ module "lambda_conversational" {
     ENV                              = "prod"
     FIRECRAWL_API_KEY                = var.firecrawl_api_key
     TARGET_LAMBDA                    = module.lambda_send_message_api.lambda_arn
+    # Usada quando o Step Functions invoca o chatbot diretamente (debounce_direct_invocation)
+    DEBOUNCE_DYNAMODB_TABLE          = module.dynamodb_received_messages.table_name
+    DISPATCH_TIMEOUT_SECONDS         = "60"
+    # Encodings do tiktoken embutidos no ZIP pelo build.py; nada é baixado em runtime
+    TIKTOKEN_CACHE_DIR               = "/var/task/tiktoken_cache"
   }
 
 }
@@ -209,6 +242,7 @@ module "step_function_whatsapp_debounce" {
   source                     = "./modules/aws/step_functions"
   step_functions_role_arn    = aws_iam_role.step_functions_role.arn
   process_message_lambda_arn = module.lambda_process_message.lambda_arn
+  chatbot_lambda_arn         = var.debounce_direct_invocation ? module.lambda_conversational.lambda_arn : null
 }
 
 
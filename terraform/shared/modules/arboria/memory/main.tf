@@ -5,6 +5,7 @@ module "dynamodb_checkpoints" {
   hash_key_type  = var.hash_key_type
   range_key_name = var.range_key_name
   range_key_type = var.range_key_type
+  ttl_attribute_name = var.ttl_attribute_name
 }
 
 module "dynamodb_writes" {
@@ -14,4 +15,5 @@ module "dynamodb_writes" {
   hash_key_type  = var.hash_key_type
   range_key_name = var.range_key_name
   range_key_type = var.range_key_type
+  ttl_attribute_name = var.ttl_attribute_name
 }
\ No newline at end of file
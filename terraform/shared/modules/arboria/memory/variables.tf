@@ -27,6 +27,12 @@ variable "range_key_type" {
   default     = "S"
 }
 
+variable "ttl_attribute_name" {
+  description = "Attribute used by the checkpointer to expire idle threads"
+  type        = string
+  default     = "expires_at"
+}
+
 variable "environment" {
   type = string
 }
\ No newline at end of file
@@ -38,4 +38,13 @@ resource "aws_dynamodb_table" "this" {
       non_key_attributes = global_secondary_index.value.non_key_attributes
     }
   }
+
+  # Habilita o TTL quando o nome do atributo for fornecido
+  dynamic "ttl" {
+    for_each = var.ttl_attribute_name != "" ? [1] : []
+    content {
+      attribute_name = var.ttl_attribute_name
+      enabled        = true
+    }
+  }
 }
\ No newline at end of file
@@ -40,4 +40,10 @@ variable "attributes" {
     type = string
   }))
   default = []
+}
+
+variable "ttl_attribute_name" {
+  description = "Attribute holding the expiration epoch (empty disables TTL)"
+  type        = string
+  default     = ""
 }
\ No newline at end of file
@@ -1,11 +1,33 @@
+locals {
+  # Invocação direta: o chatbot faz o delete condicional do debounce, sem a Lambda process_message
+  process_message_function_arn = coalesce(var.chatbot_lambda_arn, var.process_message_lambda_arn)
+}
+
 resource "aws_sfn_state_machine" "whatsapp_debounce" {
   name     = "e_commerce_WhatsAppDebounce"
   role_arn = var.step_functions_role_arn
 
   definition = jsonencode({
     Comment = "WhatsApp Message Debounce Workflow"
-    StartAt = "Wait 10 Seconds"
+    StartAt = "Has Debounce Window"
     States = {
+      # post_message calcula a janela por conversa; entradas sem wait_seconds mantêm os 10 segundos
+      "Has Debounce Window" = {
+        Type = "Choice"
+        Choices = [
+          {
+            Variable  = "$.wait_seconds"
+            IsPresent = true
+            Next      = "Wait Debounce Window"
+          }
+        ]
+        Default = "Wait 10 Seconds"
+      }
+      "Wait Debounce Window" = {
+        Type        = "Wait"
+        SecondsPath = "$.wait_seconds"
+        Next        = "Process Message"
+      }
       "Wait 10 Seconds" = {
         Type    = "Wait"
         Seconds = 10
@@ -16,9 +38,18 @@ resource "aws_sfn_state_machine" "whatsapp_debounce" {
         Resource   = "arn:aws:states:::lambda:invoke",
         OutputPath = "$.Payload",
         Parameters = {
-          FunctionName = replace(var.process_message_lambda_arn, ":$LATEST", "")
+          FunctionName = replace(local.process_message_function_arn, ":$LATEST", "")
           "Payload.$"  = "$"
         }
+        # Aguarda as mídias da conversa ainda em extração (o post_message marca pending_media)
+        Retry = [
+          {
+            ErrorEquals     = ["MediaPendingError"]
+            IntervalSeconds = 3
+            MaxAttempts     = 10
+            BackoffRate     = 1
+          }
+        ]
         End = true
       }
     }
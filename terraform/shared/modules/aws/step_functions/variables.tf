@@ -7,3 +7,9 @@ variable "process_message_lambda_arn" {
   description = "ARN of the process_message Lambda function"
   type        = string
 }
+
+variable "chatbot_lambda_arn" {
+  description = "ARN of the chatbot Lambda; when set, the state machine invokes it directly instead of process_message"
+  type        = string
+  default     = null
+}
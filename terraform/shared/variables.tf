@@ -33,4 +33,8 @@ variable "evolution_api_base_url" {
 
 variable "firecrawl_api_key"{}
 
-
+variable "debounce_direct_invocation" {
+  description = "Step Functions invokes the chatbot Lambda directly (conditional delete on the debounce table) instead of process_message"
+  type        = bool
+  default     = false
+}
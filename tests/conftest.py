@@ -0,0 +1,97 @@
+"""
+Fixtures dos testes do chatbot: AWS simulada pelo moto e o ChatOpenAI respondendo por um
+transport fake do httpx, então nenhum teste acessa a rede.
+
+    python -m pytest -q
+"""
+import json
+import os
+import sys
+
+import pytest
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+CHATBOT_DIR = os.path.join(BASE_DIR, 'lambdas', 'e_commerce_chatbot')
+
+for path in (BASE_DIR, CHATBOT_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+os.environ.setdefault('ENV', 'prod')
+os.environ.setdefault('OPENAI_API_KEY', 'sk-test')
+os.environ.setdefault('OPENAI_LLM_MODEL_NAME', 'gpt-4o-mini')
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+os.environ.setdefault('DYNAMODB_CHECKPOINT_TABLE', 'test_checkpoints')
+os.environ.setdefault('DYNAMODB_WRITES_TABLE', 'test_writes')
+os.environ.setdefault('TARGET_LAMBDA', 'test_target')
+
+REPLY = 'Claro, posso ajudar.'
+
+
+def fake_openai(request):
+    """Responde como a API de chat: texto fixo, ou a tool forçada pelo structured output do router."""
+    import httpx
+
+    body = json.loads(request.content)
+    message = {'role': 'assistant', 'content': REPLY}
+    tool_choice = body.get('tool_choice')
+    if isinstance(tool_choice, dict):
+        message = {'role': 'assistant', 'content': None, 'tool_calls': [{
+            'id': 'call_test', 'type': 'function',
+            'function': {'name': tool_choice['function']['name'], 'arguments': json.dumps({'route': 'generic'})}
+        }]}
+    return httpx.Response(200, json={
+        'id': 'chatcmpl-test', 'object': 'chat.completion', 'created': 0, 'model': body['model'],
+        'choices': [{'index': 0, 'message': message, 'finish_reason': 'stop'}],
+        'usage': {'prompt_tokens': 1, 'completion_tokens': 1, 'total_tokens': 2}
+    })
+
+
+def create_checkpoint_tables() -> None:
+    import boto3
+
+    dynamodb = boto3.client('dynamodb')
+    for table_name in (os.environ['DYNAMODB_CHECKPOINT_TABLE'], os.environ['DYNAMODB_WRITES_TABLE']):
+        dynamodb.create_table(
+            TableName=table_name,
+            KeySchema=[
+                {'AttributeName': 'thread_id', 'KeyType': 'HASH'},
+                {'AttributeName': 'sort_key', 'KeyType': 'RANGE'},
+            ],
+            AttributeDefinitions=[
+                {'AttributeName': 'thread_id', 'AttributeType': 'S'},
+                {'AttributeName': 'sort_key', 'AttributeType': 'S'},
+            ],
+            BillingMode='PAY_PER_REQUEST',
+        )
+
+
+@pytest.fixture(scope='session')
+def chatbot():
+    """
+    Módulo lambda_function importado dentro do mock do AWS: o checkpointer e os clients boto3
+    criados no import ficam apontando para o moto durante toda a sessão.
+    """
+    import httpx
+    from moto import mock_aws
+
+    with mock_aws():
+        create_checkpoint_tables()
+
+        from lambdas.e_commerce_chatbot.generics.nodes import clients
+        clients._http_client = httpx.Client(transport=httpx.MockTransport(fake_openai))
+        clients._chat_models.clear()
+
+        import lambdas.e_commerce_chatbot.lambda_function as lambda_function
+        yield lambda_function
+
+
+@pytest.fixture
+def sent_messages(chatbot, monkeypatch):
+    """Mensagens que iriam para o WhatsApp, sem chamar a Lambda de envio nem gravar o log."""
+    sent = []
+    monkeypatch.setattr(chatbot, 'send_message_to_wpp', lambda phone, message, instance: sent.append(message))
+    monkeypatch.setattr(chatbot.LogManager, 'format_and_save', lambda *args, **kwargs: None)
+    return sent
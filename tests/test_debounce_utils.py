@@ -0,0 +1,90 @@
+import time
+
+import pytest
+
+from lambdas.debouncer.common.debounce_state import MediaPendingError
+
+
+@pytest.fixture
+def debounce_table(chatbot):
+    import boto3
+
+    table = boto3.resource('dynamodb').create_table(
+        TableName=f'test_received_messages_{time.monotonic_ns()}',
+        KeySchema=[
+            {'AttributeName': 'instance_name', 'KeyType': 'HASH'},
+            {'AttributeName': 'cellphone_number', 'KeyType': 'RANGE'},
+        ],
+        AttributeDefinitions=[
+            {'AttributeName': 'instance_name', 'AttributeType': 'S'},
+            {'AttributeName': 'cellphone_number', 'AttributeType': 'S'},
+        ],
+        BillingMode='PAY_PER_REQUEST',
+    )
+    table.put_item(Item={
+        'instance_name': 'loja', 'cellphone_number': '5511900000005', 'fragments': ['oi', 'tudo bem?'],
+        'last_update': 100, 'execution_status': 'pending'
+    })
+    return table
+
+
+KEY = {'instance_name': 'loja', 'cellphone_number': '5511900000005'}
+
+
+def event(last_update: int) -> dict:
+    return dict(KEY, last_update=last_update)
+
+
+def process(debounce_table, last_update: int, handle_turn):
+    from lambdas.debouncer.common.debounce_state import DynamoDBMessageStore
+    from lambdas.e_commerce_chatbot.utils.debounce_utils import process_debounced_turns
+
+    return process_debounced_turns(event(last_update), handle_turn, store=DynamoDBMessageStore(debounce_table))
+
+
+def test_turn_runs_with_conversation_dispatched(debounce_table):
+    turns = []
+
+    def handle_turn(turn_event):
+        turns.append((turn_event['message'], debounce_table.get_item(Key=KEY)['Item']['execution_status']))
+        return {'statusCode': 200}
+
+    assert process(debounce_table, 100, handle_turn) == {'statusCode': 200}
+    assert turns == [('oi tudo bem?', 'dispatched')]
+    assert 'Item' not in debounce_table.get_item(Key=KEY)
+
+
+def test_fragment_sent_mid_turn_becomes_next_turn(debounce_table):
+    messages = []
+
+    def handle_turn(turn_event):
+        messages.append(turn_event['message'])
+        if len(messages) == 1:
+            # O post_message só anexa o fragmento: a conversa dispatched não abre outra execução
+            debounce_table.update_item(
+                Key=KEY,
+                UpdateExpression='SET fragments = list_append(if_not_exists(fragments, :empty), :fragment), '
+                                 'last_update = :lu',
+                ExpressionAttributeValues={':empty': [], ':fragment': ['e o frete?'], ':lu': 101}
+            )
+        return {'statusCode': 200}
+
+    process(debounce_table, 100, handle_turn)
+
+    assert messages == ['oi tudo bem?', 'e o frete?']
+    assert 'Item' not in debounce_table.get_item(Key=KEY)
+
+
+def test_superseded_execution_skips_turn(debounce_table):
+    assert process(debounce_table, 99, lambda turn_event: pytest.fail('turno não deveria rodar')) is None
+
+
+def test_claim_waits_for_pending_media(debounce_table):
+    debounce_table.update_item(
+        Key=KEY,
+        UpdateExpression='SET pending_media = :media, pending_media_deadline = :deadline',
+        ExpressionAttributeValues={':media': {'media-1'}, ':deadline': int(time.time()) + 30}
+    )
+
+    with pytest.raises(MediaPendingError):
+        process(debounce_table, 100, lambda turn_event: pytest.fail('turno não deveria rodar'))
@@ -0,0 +1,74 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+BURSTS = 5
+FRAGMENTS_PER_BURST = 8
+
+
+@pytest.fixture
+def dynamodb_service(chatbot, monkeypatch):
+    import boto3
+    from moto.core.botocore_stubber import BotocoreStubber
+
+    from lambdas.debouncer.post_message.services.dynamodb_service import DynamoDBService
+
+    # O DynamoDB aplica cada UpdateItem atomicamente; o moto não tem locks, então as requisições
+    # são serializadas como no benchmarks/bench_debounce_upsert.py
+    stubber_lock = threading.Lock()
+    stubber_call = BotocoreStubber.__call__
+
+    def locked_call(self, *args, **kwargs):
+        with stubber_lock:
+            return stubber_call(self, *args, **kwargs)
+
+    monkeypatch.setattr(BotocoreStubber, '__call__', locked_call)
+
+    table_name = f'test_received_messages_{time.monotonic_ns()}'
+    boto3.client('dynamodb').create_table(
+        TableName=table_name,
+        KeySchema=[
+            {'AttributeName': 'instance_name', 'KeyType': 'HASH'},
+            {'AttributeName': 'cellphone_number', 'KeyType': 'RANGE'},
+        ],
+        AttributeDefinitions=[
+            {'AttributeName': 'instance_name', 'AttributeType': 'S'},
+            {'AttributeName': 'cellphone_number', 'AttributeType': 'S'},
+        ],
+        BillingMode='PAY_PER_REQUEST',
+    )
+    return DynamoDBService(table_name)
+
+
+def test_concurrent_bursts_keep_every_fragment(dynamodb_service):
+    from benchmarks.common import CallCounter
+
+    counter = CallCounter(dynamodb_service._table.meta.client)
+    with ThreadPoolExecutor(max_workers=FRAGMENTS_PER_BURST) as executor:
+        for burst in range(BURSTS):
+            cellphone_number = f'55119000000{burst:02d}'
+            fragments = [f'f{i}' for i in range(FRAGMENTS_PER_BURST)]
+
+            counter.reset()
+            list(executor.map(
+                lambda text: dynamodb_service.append_message('loja', cellphone_number, text, int(time.time())),
+                fragments
+            ))
+
+            assert counter.calls == {'UpdateItem': FRAGMENTS_PER_BURST}
+            item = dynamodb_service._table.get_item(
+                Key={'instance_name': 'loja', 'cellphone_number': cellphone_number})['Item']
+            assert sorted(item['fragments']) == fragments
+
+
+def test_redelivered_message_is_not_appended_twice(dynamodb_service):
+    # O start da execução falhou depois do append e a Evolution reenviou o webhook
+    first, _ = dynamodb_service.append_message('loja', '5511900000099', 'oi', 100, 'arn-1', message_ids={'wamid-1'})
+    retry, _ = dynamodb_service.append_message('loja', '5511900000099', 'oi', 101, 'arn-2', message_ids={'wamid-1'})
+
+    assert first['text'] == retry['text'] == 'oi'
+    item = dynamodb_service._table.get_item(Key={'instance_name': 'loja', 'cellphone_number': '5511900000099'})['Item']
+    assert item['fragments'] == ['oi']
+    assert item['execution_arn'] == 'arn-2'
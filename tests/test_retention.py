@@ -0,0 +1,23 @@
+from boto3.dynamodb.conditions import Key
+
+
+def _count_items(table, thread_id):
+    response = table.query(KeyConditionExpression=Key('thread_id').eq(thread_id), Select='COUNT')
+    return response['Count']
+
+
+def test_retention_keeps_thread_size_flat(chatbot, sent_messages, monkeypatch):
+    checkpointer = chatbot.get_workflow().checkpointer
+    monkeypatch.setattr(checkpointer, 'retention_checkpoints', 2)
+    monkeypatch.setattr(checkpointer, 'RETENTION_PRUNE_INTERVAL', 1)
+
+    event = {'instance': 'loja', 'phone_number': '5511900000005', 'message': 'oi'}
+    thread_id = chatbot.create_thread_config('loja', '5511900000005')['configurable']['thread_id']
+    sizes = []
+    for turn in range(15):
+        assert chatbot.lambda_handler(dict(event, message=f'mensagem {turn}'), None)['statusCode'] == 200
+        sizes.append(_count_items(checkpointer.table, thread_id) + _count_items(checkpointer.writes_table, thread_id))
+
+    # Cada turno abre um namespace `subgraph_*` novo; a retenção da thread também remove os concluídos
+    assert len(set(sizes[1:])) == 1, sizes
+    assert _count_items(checkpointer.table, thread_id) == 2
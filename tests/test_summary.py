@@ -0,0 +1,30 @@
+import json
+
+from tests.conftest import REPLY
+
+
+def test_summary_runs_in_async_invocation(chatbot, sent_messages, monkeypatch):
+    invocations = []
+    monkeypatch.setenv('AWS_LAMBDA_FUNCTION_NAME', 'chatbot')
+    monkeypatch.setattr(chatbot.lambda_client, 'invoke', lambda **kwargs: invocations.append(kwargs))
+    monkeypatch.setattr(chatbot.summarizer, 'every_turns', 1)
+    monkeypatch.setattr(chatbot.summarizer, 'keep_messages', 2)
+
+    event = {'instance': 'loja', 'phone_number': '5511900000003', 'message': 'oi'}
+    for message in ('oi', 'tem no azul?'):
+        assert chatbot.lambda_handler(dict(event, message=message), None)['statusCode'] == 200
+
+    # O turno só agenda o resumo; o histórico continua inteiro até a invocação assíncrona rodar
+    config = chatbot.create_thread_config('loja', '5511900000003')
+    graph = chatbot.get_workflow(config=config)
+    assert len(graph.get_state(config).values['messages']) == 4
+    assert len(invocations) == 1
+    assert invocations[0]['FunctionName'] == 'chatbot'
+    assert invocations[0]['InvocationType'] == 'Event'
+
+    response = chatbot.lambda_handler(json.loads(invocations[0]['Payload']), None)
+
+    assert response['statusCode'] == 200
+    values = graph.get_state(config).values
+    assert values['summary'] == REPLY
+    assert [message.content for message in values['messages']] == ['tem no azul?', REPLY]
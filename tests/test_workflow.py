@@ -0,0 +1,41 @@
+from tests.conftest import REPLY
+
+
+def test_first_turn_runs_through_cached_workflow(chatbot, sent_messages):
+    event = {'instance': 'loja', 'phone_number': '5511900000001', 'message': 'oi'}
+
+    response = chatbot.lambda_handler(event, None)
+
+    assert response['statusCode'] == 200, response
+    assert sent_messages == [REPLY]
+
+    config = chatbot.create_thread_config('loja', '5511900000001')
+    snapshot = chatbot.get_workflow(config=config).get_state(config)
+    assert snapshot.next == (chatbot.get_user_input.name,)
+
+
+def test_next_turn_resumes_from_checkpoint(chatbot, sent_messages):
+    event = {'instance': 'loja', 'phone_number': '5511900000002', 'message': 'oi'}
+
+    assert chatbot.lambda_handler(event, None)['statusCode'] == 200
+    response = chatbot.lambda_handler(dict(event, message='qual o prazo de entrega?'), None)
+
+    assert response['statusCode'] == 200, response
+    assert sent_messages == [REPLY, REPLY]
+
+    config = chatbot.create_thread_config('loja', '5511900000002')
+    graph = chatbot.get_workflow(config=config)
+    assert graph is chatbot.get_workflow()
+    contents = [message.content for message in graph.get_state(config).values['messages']]
+    assert contents == ['oi', REPLY, 'qual o prazo de entrega?', REPLY]
+
+
+def test_handler_discards_prefetched_checkpoints(chatbot, sent_messages):
+    checkpointer = chatbot.get_workflow().checkpointer
+    # Deixado por uma invocação anterior que falhou antes do get_tuple consumir o prefetch
+    checkpointer._prefetched[('loja#5511900000009', '')] = None
+
+    event = {'instance': 'loja', 'phone_number': '5511900000004', 'message': 'oi'}
+    assert chatbot.lambda_handler(event, None)['statusCode'] == 200
+
+    assert checkpointer._prefetched == {}